@@ -50,6 +50,10 @@ def extract_knowledge_types(docs: list) -> dict:
         "meta": meta[:5]
     }
 
+def _note_task_done(context: Context, task_id: str):
+    # итоги занятия ведёт ConductorState.agg — отмечаем сразу, без обхода заданий в конце
+    context.progress["Conductor"].note_task_done(task_id)
+
 def start_task(context: Context, task_id: str):
     for task in context.progress.get("Organizer", {}).get("tasks", []):
         if task["id"] == task_id:
@@ -69,6 +73,7 @@ def mark_task_complete(context: Context, task_id: str):
             else:
                 task["duration_sec"] = None
             task["is_completed"] = True
+            _note_task_done(context, task_id)
             print(f"✅ Задание {task_id} завершено.")
             return
 
@@ -80,6 +85,8 @@ def update_task_status(context: Context, task_id: str, status: str, answer: str
     for task in context.progress.get("Organizer", {}).get("tasks", []):
         if task["id"] == task_id:
             task["status"] = status
+            if status == "completed":
+                _note_task_done(context, task_id)
             if answer:
                 task["student_answer"] = answer
             print(f"📌 Обновлён статус задания {task_id} → {status}")
@@ -104,9 +111,13 @@ class KnowledgeBase:
         self.doc_names = []
         self.vectorizer = None
         self.doc_vectors = None
+        self.discipline = None
+        self.version = 0  # растёт при переиндексации (ключ для кэшей ответов)
 
     def load(self, discipline: str):
         self.docs = load_documents(discipline)
+        self.discipline = discipline
+        self.version += 1
         self.doc_names = [f"doc_{i+1}" for i in range(len(self.docs))]
         if not self.docs:
             print("⚠️ База знаний пуста")
@@ -338,22 +349,15 @@ def _patch_runtime_hooks():
     else:
         print("⚠️ RelationalTuner not available; patch skipped")
 
-    # ---- безопасный патч Expert.respond ----
-    if _ExpertClass is not None and hasattr(_ExpertClass, "respond"):
-        try:
-            _old_respond = _ExpertClass.respond  # type: ignore[attr-defined]
-            def _expert_respond_patched(self, context, *args, **kwargs):
-                return _old_respond(self, context, *args, **kwargs)
-            _ExpertClass.respond = _expert_respond_patched  # type: ignore[attr-defined]
-            print("✅ Expert.respond patched")
-        except Exception as e:
-            print(f"⚠️ Expert.respond patch skipped: {e}")
-    else:
-        print("⚠️ Expert.respond not found; patch skipped")
+    # Expert.respond здесь больше не оборачиваем: метод ставится один раз
+    # конвейером стадий (см. Sprint 9.1 ниже)
 
 # вызвать ОДИН раз
 _patch_runtime_hooks()
 
+# исходная реализация Expert.respond (до установки конвейера) — для legacy-обёрток ниже
+_old_respond = getattr(_ExpertClass, "respond", None)
+
 # ================================
 # 🧩 Patch: Empathy inside Expert
 # ================================
@@ -434,6 +438,7 @@ print("✅ Empathy integrated: Expert.respond теперь возвращает
 # ==========================================
 import time
 from collections import deque
+from core.clock import wall_time, clock_sleep   # подменяемые часы (SimulatedClock для прогонов)
 
 # параметры — можно подправить под себя
 LAT_FAST_SEC   = 12.0   # быстрее этого — считаем "высокая вовлечённость"
@@ -450,22 +455,12 @@ def _ensure_latency_buffer(context: 'Context'):
     if "latency_buffer" not in context.progress["Expert"]:
         context.progress["Expert"]["latency_buffer"] = deque(maxlen=LAT_WINDOW_N)
 
-if _ExpertClass is not None and hasattr(_ExpertClass, "respond"):
-    try:
-        _old_expert_respond_latency = _ExpertClass.respond  # type: ignore[attr-defined]
-        def _respond_latency_patched(self, context, *args, **kwargs):
-            # если нужна логика по latency — добавишь позже; сейчас просто прокидываем
-            return _old_expert_respond_latency(self, context, *args, **kwargs)
-        _ExpertClass.respond = _respond_latency_patched  # type: ignore[attr-defined]
-        print("✅ Expert.respond (latency) patched")
-    except Exception as e:
-        print(f"⚠️ Expert.respond (latency) patch skipped: {e}")
-else:
-    print("⚠️ Expert.respond not found; latency patch skipped")
+# без сквозной обёртки: legacy-функции ниже вызывают исходный respond напрямую
+_old_expert_respond_latency = _old_respond
 
 def _respond_with_latency(self, question: str, context: 'Context') -> dict:
     # 1) до вызова оригинала — измеряем задержку
-    now = time.time()
+    now = wall_time()
     # гарантируем поля
     context.progress.setdefault("Expert", {})
     last_ts = context.progress["Expert"].get("last_interaction_time", None)
@@ -547,7 +542,7 @@ def _ensure_latency_buffer(context: 'Context'):
 
 def _respond_with_latency_fixed(self, question: str, context: 'Context') -> dict:
     # 1) измеряем реальную задержку БЕЗ изменения last_interaction_time
-    now = time.time()
+    now = wall_time()
     context.progress.setdefault("Expert", {})
     last_ts = context.progress["Expert"].get("last_interaction_time", None)
     latency = None
@@ -631,83 +626,211 @@ except NameError:
                 return answer_data
         tuner = _DummyTuner()
 
-def _ensure_latency_struct(context: 'Context'):
-    context.progress.setdefault("Expert", {})
-    ex = context.progress["Expert"]
-    ex.setdefault("dialog_history", [])
-    ex.setdefault("last_answer", None)
-    ex.setdefault("engagement", 0.5)
-    ex.setdefault("confidence", 0.5)
-    ex.setdefault("last_interaction_time", time.time())
-    if "latency_buffer" not in ex:
-        ex["latency_buffer"] = deque(maxlen=LAT_WINDOW_N)
-
-# === Полная замена метода respond ===
-def _expert_respond_unified(self, question: str, context: 'Context') -> dict:
-    print(f"[Expert] Вопрос: {question}")
-    _ensure_latency_struct(context)
+from core.state import ExpertState
+
+def _ensure_latency_struct(context: 'Context') -> ExpertState:
+    # ExpertState (core/state.py) создаётся один раз на сессию уже со значениями по умолчанию
+    return context.progress["Expert"]
+
+# === Полная замена метода respond: явный конвейер стадий (Sprint 9.1) ===
+# Порядок стадий фиксирован и объявлен один раз; каждая стадия замеряется perf_counter_ns.
+# Тайминги попадают в answer["timings_ns"], агрегат — в EXPERT_PIPELINE.report().
+from typing import Optional
+from core.pipeline import RespondPipeline
+from core.answer_cache import ANSWER_CACHE, RETRIEVAL_CACHE, make_answer_key, normalize_question, retrieval_key
+from core.dedup import get_session_detector
+
+EXPERT_STAGES = ("metrics", "classify", "retrieve", "format", "empathy", "latency", "persist")
+EXPERT_PIPELINE = RespondPipeline(EXPERT_STAGES)
+
+# --- Бюджет задержки ответа (Sprint 9.3): live — жёстче, async — мягче
+LATENCY_BUDGET_MS = {"live": 1500.0, "async": 8000.0}
+# уровни обслуживания от дорогого к дешёвому
+ANSWER_TIERS = ("full", "top1", "brief", "cached", "near_duplicate")
+EXPERT_TIER_COUNTS = {t: 0 for t in ANSWER_TIERS}
+# EWMA реальной стоимости kb.search (нс); попадания в кэш сюда не входят
+_SEARCH_COST = {"ewma_ns": None, "alpha": 0.2}
+
+def latency_budget_ms(context: 'Context') -> float:
+    return LATENCY_BUDGET_MS.get(getattr(context, "mode", "live"), LATENCY_BUDGET_MS["live"])
+
+def _pick_tier(st: dict) -> str:
+    """Выбор уровня по оставшемуся бюджету и средним длительностям стадий."""
+    remaining = st["deadline_ns"] - time.perf_counter_ns()
+    est_retrieve = _SEARCH_COST["ewma_ns"]
+    est_format = EXPERT_PIPELINE.avg_ns("format")
+    if est_retrieve is None or est_format is None:
+        # статистики ещё нет — работаем в полном режиме, пока бюджет не исчерпан
+        return "full" if remaining > 0 else "brief"
+    if remaining >= est_retrieve + est_format:
+        return "full"
+    if remaining >= est_retrieve / 2 + est_format:
+        return "top1"
+    return "brief"
+
+def _is_followup(q: str) -> bool:
+    q = q.strip().lower()
+    if len(q.split()) <= 4: return True
+    if re.match(r"^(а|и)\b", q): return True
+    if re.search(r"\b(подробнее|поясни|уточни|разверни)\b", q): return True
+    return False
+
+def kb_retrieve(kb, query: str, top_k: int = 2) -> tuple:
+    """kb.search + сборка base/sources с кэшем выдачи по (KB, версия KB, запрос, top_k)."""
+    rkey = retrieval_key(kb, query, top_k)
+    rec = RETRIEVAL_CACHE.get(rkey)
+    if rec is not None:
+        return rec["base"], rec["sources"]
+    t0 = time.perf_counter_ns()
+    results = kb.search(query, top_k=top_k)
+    dt = time.perf_counter_ns() - t0
+    cost = _SEARCH_COST["ewma_ns"]
+    _SEARCH_COST["ewma_ns"] = dt if cost is None else cost + _SEARCH_COST["alpha"] * (dt - cost)
+    if not results:
+        base = "Извините, в базе знаний нет информации по этому вопросу."
+        sources = []
+    else:
+        combined_text = "\n".join([doc for doc, _, _ in results])
+        base = f"На основе материалов курса:\n{combined_text[:800]}..."
+        sources = [name for _, name, _ in results]
+    RETRIEVAL_CACHE.put(rkey, {"base": base, "sources": sources})
+    return base, sources
+
+# brief: бюджет исчерпан — kb.search не зовём, берём только то, что уже есть в кэше выдачи
+BRIEF_NO_RETRIEVAL = "Коротко: сейчас отвечаю без поиска по материалам курса — уточните вопрос, и я разверну ответ."
+
+def kb_retrieve_cached(kb, query: str) -> Optional[tuple]:
+    """Выдача KB только из RETRIEVAL_CACHE (top_k 2, затем 1), без поиска; None — в кэше нет."""
+    for top_k in (2, 1):
+        rec = RETRIEVAL_CACHE.get(retrieval_key(kb, query, top_k))
+        if rec is not None:
+            return rec["base"], rec["sources"]
+    return None
+
+def build_shared_answer(base: str, sources: list, intents: list, detail: str) -> dict:
+    """Студент-независимая часть ответа (то, что лежит в ANSWER_CACHE)."""
+    return {
+        "base": base,
+        "sources": sources,
+        "answer": make_brief(base, 300) if detail == "short" else base,
+        "explanation": make_explanation(base, intents, detail),
+    }
+
+@EXPERT_PIPELINE.stage("metrics")
+def _stage_metrics(st: dict):
+    question, context = st["question"], st["context"]
+    ex = _ensure_latency_struct(context)
+    # latency_buffer (deque) стадии правят на месте — это версия не видит, отмечаем сами
+    ex.touch("latency_buffer")
 
     # Сброс памяти
     if question.strip().lower() in {"сброс", "reset", "очистить память"}:
-        return reset_dialog(context)
+        st["result"] = reset_dialog(context)
+        st["stop"] = True
+        return
 
-    ex = context.progress["Expert"]
+    st["ex"] = ex
 
     # 1) Latency: измеряем по прошлому таймстемпу (не меняем его до конца обработки)
-    now = time.time()
-    last_ts = ex.get("last_interaction_time", now)
-    latency = max(0.0, now - last_ts) if last_ts else None
+    now = st["now"] = wall_time()
+    last_ts = ex.last_interaction_time
+    latency = st["latency"] = max(0.0, now - last_ts) if last_ts else None
 
     # 2) Обновляем «семантические» метрики (вовлечённость/уверенность) по тексту
-    #    (твои функции/логика 5.4)
     # Простейшая версия: быстрый ответ ↑ вовлечённость, ключевые слова сдвигают уверенность
     ql = question.lower()
     if latency is not None:
         if latency <= LAT_FAST_SEC:
-            ex["engagement"] = min(1.0, ex.get("engagement",0.5) + DELTA_ENG_FAST)
+            ex.engagement = min(1.0, ex.engagement + DELTA_ENG_FAST)
         elif latency >= LAT_SLOW_SEC:
-            ex["engagement"] = max(0.0, ex.get("engagement",0.5) + DELTA_ENG_SLOW)
+            ex.engagement = max(0.0, ex.engagement + DELTA_ENG_SLOW)
     if any(w in ql for w in ["не понимаю","сложно","устал","плохо"]):
-        ex["confidence"] = max(0.0, ex.get("confidence",0.5) + DELTA_CONF_DN)
+        ex.confidence = max(0.0, ex.confidence + DELTA_CONF_DN)
     if any(w in ql for w in ["получилось","спасибо","понятно","легко"]):
-        ex["confidence"] = min(1.0, ex.get("confidence",0.5) + DELTA_CONF_UP)
+        ex.confidence = min(1.0, ex.confidence + DELTA_CONF_UP)
 
+@EXPERT_PIPELINE.stage("classify")
+def _stage_classify(st: dict):
+    question = st["question"]
     # 3) Намерения и детализация
-    intents = detect_intents(question)           # ['why','how','what_if','examples']
-    detail  = detect_detail_level(question)      # 'short'|'long' (или твои варианты)
+    st["intents"] = detect_intents(question)           # ['why','how','what_if','examples']
+    st["detail"]  = detect_detail_level(question)      # 'short'|'long'
 
     # 4) Поддержка follow-up
-    history = ex["dialog_history"]
-    augmented_query, in_reply_to = question, None
-    def _is_followup(q: str) -> bool:
-        q = q.strip().lower()
-        if len(q.split()) <= 4: return True
-        if re.match(r"^(а|и)\b", q): return True
-        if re.search(r"\b(подробнее|поясни|уточни|разверни)\b", q): return True
-        return False
+    history = st["ex"].dialog_history
+    st["augmented_query"], st["in_reply_to"] = question, None
     if history and _is_followup(question):
         last = history[-1]
-        in_reply_to = last.get("question")
+        in_reply_to = st["in_reply_to"] = last.get("question")
         prev_snippet = (last.get("answer") or "")[:200]
-        augmented_query = f"{in_reply_to}. {question}. Контекст: {prev_snippet}"
+        st["augmented_query"] = f"{in_reply_to}. {question}. Контекст: {prev_snippet}"
+
+@EXPERT_PIPELINE.stage("retrieve")
+def _stage_retrieve(st: dict):
+    # 5a) Общий кэш: студент-независимая часть ответа (follow-up зависит от истории — не кэшируем)
+    if st["in_reply_to"] is None:
+        kb = st["expert"].kb
+        st["cache_key"] = make_answer_key(st["context"], st["question"], st["detail"],
+                                          st["intents"], getattr(kb, "version", 0))
+        shared = ANSWER_CACHE.get(st["cache_key"])
+        if shared is not None:
+            st["tier"] = "cached"
+            st["shared"] = shared
+            st["base"], st["sources"] = shared["base"], shared["sources"]
+            return
 
-    # 5) RAG-поиск
-    results = self.kb.search(augmented_query, top_k=2)
-    if not results:
-        base = "Извините, в базе знаний нет информации по этому вопросу."
-        sources = []
-    else:
-        combined_text = "\n".join([doc for doc, _, _ in results])
-        base = f"На основе материалов курса:\n{combined_text[:800]}..."
-        sources = [name for _, name, _ in results]
+    # 5b) Почти-дубль недавнего вопроса этой сессии → прошлый результат поиска
+    detector = get_session_detector(st["context"])
+    sig, prev, sim = detector.lookup(st["augmented_query"])
+    if prev is not None:
+        st["tier"] = "near_duplicate"
+        st["near_duplicate_of"] = {"question": prev["question"], "similarity": round(sim, 3)}
+        st["base"], st["sources"] = prev["base"], prev["sources"]
+        return
 
-    # 6) Формируем ответ/пояснение/next_steps
-    answer = make_brief(base, 300) if detail == "short" else base
-    explanation = make_explanation(base, intents, detail)
-    next_steps  = build_next_steps(intents, context)
+    # 5c) Деградация под нагрузкой: бюджет на исходе → дешевле стратегия
+    tier = st["tier"] = _pick_tier(st)
+    if tier != "full" and st.get("cache_key") is not None:
+        shared = ANSWER_CACHE.get_loose(st["cache_key"])
+        if shared is not None:
+            st["tier"] = "cached"
+            st["shared"] = shared
+            st["base"], st["sources"] = shared["base"], shared["sources"]
+            return
+
+    # 5-brief) на поиск времени нет: только готовая выдача из кэша, иначе короткая заглушка
+    if tier == "brief":
+        cached = kb_retrieve_cached(st["expert"].kb, st["augmented_query"])
+        if cached is None:
+            # заглушка, а не ответ: помечаем, чтобы её не приняли за настоящий
+            st["degraded"] = True
+            cached = (BRIEF_NO_RETRIEVAL, [])
+        st["base"], st["sources"] = cached
+        return
+
+    # 5) RAG-поиск (через кэш выдачи — его прогревает TaskPrefetcher)
+    top_k = 2 if tier == "full" else 1
+    st["base"], st["sources"] = kb_retrieve(st["expert"].kb, st["augmented_query"], top_k)
+    detector.remember(sig, {"question": st["question"], "base": st["base"], "sources": st["sources"]})
+
+@EXPERT_PIPELINE.stage("format")
+def _stage_format(st: dict):
+    ex, base, intents, detail = st["ex"], st["base"], st["intents"], st["detail"]
+    # 6) Формируем ответ/пояснение (из кэша, если есть) и персональные next_steps
+    shared = st.get("shared")
+    if shared is None and st["tier"] == "brief":
+        # только краткая выжимка; в общий кэш деградированный ответ не кладём
+        shared = {"base": base, "sources": st["sources"], "answer": make_brief(base, 300),
+                  "explanation": "Ключевая мысль: см. основную часть ответа."}
+    elif shared is None:
+        shared = build_shared_answer(base, st["sources"], intents, detail)
+        if st.get("cache_key") is not None and st["tier"] == "full":
+            ANSWER_CACHE.put(st["cache_key"], shared)
+    answer, explanation = shared["answer"], shared["explanation"]
+    next_steps  = build_next_steps(intents, st["context"])
 
     # 7) Подача (темп/манера) по уверенности (мягко)
-    conf = ex["confidence"]
+    conf = ex.confidence
     if conf < 0.3:
         pace = "упрощённый"; tone = "дружелюбный наставник"
     elif conf > 0.7:
@@ -715,27 +838,36 @@ def _expert_respond_unified(self, question: str, context: 'Context') -> dict:
     else:
         pace = "обычный";     tone = "нейтральный преподаватель"
 
-    answer_data = {
-        "question": question,
-        "in_reply_to": in_reply_to,
+    st["result"] = {
+        "question": st["question"],
+        "in_reply_to": st["in_reply_to"],
         "intents": intents,
         "detail": detail,
         "answer": answer,
         "explanation": explanation,
-        "sources": sources,
+        "sources": list(st["sources"]),
         "next_steps": next_steps,
         "pace": pace,
         "tone": tone,
-        "engagement": ex["engagement"],
-        "confidence": ex["confidence"]
+        "engagement": ex.engagement,
+        "confidence": ex.confidence,
+        "cache_hit": "shared" in st,
+        "tier": st["tier"],
+        "degraded": st.get("degraded", False),
+        "near_duplicate_of": st.get("near_duplicate_of"),
+        "budget_ms": st["budget_ms"]
     }
+    EXPERT_TIER_COUNTS[st["tier"]] += 1
 
+@EXPERT_PIPELINE.stage("empathy")
+def _stage_empathy(st: dict):
     # 8) Эмпатическая обвязка
+    answer_data = st["result"]
     try:
         enriched = tuner.embellish(
             answer_data,
-            context,
-            user_text=question,
+            st["context"],
+            user_text=st["question"],
             tone_override=None,
             position=None  # auto
         )
@@ -743,10 +875,13 @@ def _expert_respond_unified(self, question: str, context: 'Context') -> dict:
         enriched = answer_data
         enriched.setdefault("answer_empathic", enriched.get("answer",""))
         enriched.setdefault("empathy", {"situation":"start","tone":"warm","intro":None,"outro":None})
+    st["result"] = enriched
 
+@EXPERT_PIPELINE.stage("latency")
+def _stage_latency(st: dict):
     # 9) Latency buffer + средняя + мягкая автоподстройка темпа по среднему
-    _ensure_latency_struct(context)
-    buf: deque = ex["latency_buffer"]
+    enriched, latency = st["result"], st["latency"]
+    buf: deque = st["ex"].latency_buffer
     if latency is not None:
         buf.append(latency)
     avg = (sum(buf)/len(buf)) if buf else None
@@ -758,18 +893,42 @@ def _expert_respond_unified(self, question: str, context: 'Context') -> dict:
         elif avg < LAT_FAST_SEC and enriched.get("pace") != "ускоренный":
             enriched["pace"] = "ускоренный"
 
+@EXPERT_PIPELINE.stage("persist")
+def _stage_persist(st: dict):
+    ex, enriched, context = st["ex"], st["result"], st["context"]
     # 10) Обновляем last_interaction_time только в самом конце
-    ex["last_interaction_time"] = now
+    ex.last_interaction_time = st["now"]
 
     # 11) Сохраняем историю
-    history.append(enriched)
-    ex["last_answer"] = enriched
+    ex.dialog_history.append(enriched)
+    ex.last_answer = enriched
     context.progress.setdefault("RelationalTuner", {})
     context.progress["RelationalTuner"]["last"] = enriched.get("empathy")
 
-    return enriched
+def _expert_respond_unified(self, question: str, context: 'Context', budget_ms: float = None) -> dict:
+    """
+    budget_ms — сколько осталось на ответ (по умолчанию из LATENCY_BUDGET_MS по context.mode).
+    Если бюджет на исходе, retrieve/format переходят на дешёвый уровень (см. ANSWER_TIERS).
+    """
+    print(f"[Expert] Вопрос: {question}")
+    if budget_ms is None:
+        budget_ms = latency_budget_ms(context)
+    st = {"expert": self, "question": question, "context": context, "tier": "full",
+          "budget_ms": budget_ms,
+          "deadline_ns": time.perf_counter_ns() + int(budget_ms * 1e6)}
+    return EXPERT_PIPELINE.run(st)
+
+def expert_timing_report() -> dict:
+    """Агрегированные тайминги стадий Expert.respond (count / avg_ms / max_ms) + уровни обслуживания."""
+    report = EXPERT_PIPELINE.report()
+    report["tiers"] = dict(EXPERT_TIER_COUNTS)
+    return report
+
+# ставим метод один раз — без цепочки обёрток
+if _ExpertClass is not None:
+    _ExpertClass.respond = _expert_respond_unified  # type: ignore[attr-defined]
 
-print("✅ Expert.respond заменён на единый вариант (без обёрток): RAG + память + уровни/тон + эмпатия + latency.")
+print("✅ Expert.respond заменён на конвейер стадий: metrics → classify → retrieve → format → empathy → latency → persist.")
 
 import random
 
@@ -877,7 +1036,11 @@ try:
     expert  # уже был определён где-то выше?
 except NameError:
     expert = (Expert(kb) if Expert is not None else None)
-ctx = Context(
+# контексты живут в реестре сессий: поиск по student_id/task_id, выгрузка по TTL/памяти
+from core.sessions import SessionManager
+SESSIONS = SessionManager()
+ctx = SESSIONS.get_or_create(
+    student_id="demo",
     discipline="Цифровая культура",
     lesson_number=2,
     topic="Генерация инфографики",
@@ -902,14 +1065,12 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any, List, Tuple
 import hashlib, io, wave, math, time, random
 import numpy as np
+from core.state import TTSState
 
 # --- 0) Утилиты и слот состояния в Context
-def _ensure_tts_slot(context: Context):
-    context.progress.setdefault("TTS", {})
-    slot = context.progress["TTS"]
-    slot.setdefault("cache", {})          # hash -> {"path": "file://...", "sr": 16000, "word_ts": [...], "phonemes": [...]}
-    slot.setdefault("dir", "/mnt/data/tts_cache")
-    return slot
+def _ensure_tts_slot(context: Context) -> TTSState:
+    # TTSState: cache (hash -> {"path": "file://...", "sr": 16000, "word_ts": [...], "phonemes": [...]}) и dir
+    return context.progress["TTS"]
 
 def _hash_key(text: str, voice: Optional[str], emotion: Optional[str], rate: float) -> str:
     key = f"{text}|{voice or ''}|{emotion or ''}|{rate:.3f}"
@@ -1086,108 +1247,192 @@ def build_say_script_from_answer(answer: Dict[str, Any], context: Context) -> Di
     return {"lines": lines, "emotion_hint": emotion, "gesture_hints": []}
 
 # --- 7) Подписчик EventBus: expert_answer -> build_say_script -> TTS -> publish tts_done/tts_failed
-def make_expert_answer_handler_tts(tts: TTSService, bus: EventBus):
-    def _handler(ev: Event):
-        try:
-            ans = ev.payload.get("answer", {}) or {}
-            text_full = ans.get("answer") or ""
-            if not isinstance(text_full, str) or not text_full.strip():
-                # ничего синтезировать
-                return
-
-            # сценарист: интро/ядро/аутро → склеиваем в одну строку для TTS
-            say = build_say_script_from_answer(ans, bus.context)
-            text_parts = [seg["text"] for seg in say.get("lines", []) if seg.get("text")]
-            text_tts = (" ".join(text_parts)).strip() or text_full.strip()
-
-            # эмоция/скорость из Motivator
-            emotion, rate = pick_emotion_and_rate(bus.context)
+def handle_expert_answer_tts(tts: TTSService, bus: EventBus, ev: Event):
+    try:
+        ans = ev.payload.get("answer", {}) or {}
+        text_full = ans.get("answer") or ""
+        if not isinstance(text_full, str) or not text_full.strip():
+            # ничего синтезировать
+            return
 
-            # синтез
-            out = tts.synthesize(bus.context, text=text_tts, emotion=emotion, rate=rate)
+        # сценарист: интро/ядро/аутро → склеиваем в одну строку для TTS
+        say = build_say_script_from_answer(ans, bus.context)
+        text_parts = [seg["text"] for seg in say.get("lines", []) if seg.get("text")]
+        text_tts = (" ".join(text_parts)).strip() or text_full.strip()
+
+        # эмоция/скорость из Motivator
+        emotion, rate = pick_emotion_and_rate(bus.context)
+
+        # синтез
+        out = tts.synthesize(bus.context, text=text_tts, emotion=emotion, rate=rate)
+
+        # публикуем tts_done
+        bus.publish(Event(
+            type="tts_done",
+            source="tts",
+            payload={
+                "text": text_tts,
+                "audio": out["path"],         # file://...
+                "sr": out["sr"],
+                "word_ts": out.get("word_ts", []),
+                "phonemes": out.get("phonemes", []),
+                "emotion": emotion
+            }
+        ))
+    except Exception as e:
+        bus.publish(Event(
+            type="tts_failed",
+            source="tts",
+            payload={"reason": str(e), "fallback_text": ev.payload.get("answer", {}).get("answer", "")}
+        ))
 
-            # публикуем tts_done
-            bus.publish(Event(
-                type="tts_done",
-                source="tts",
-                payload={
-                    "text": text_tts,
-                    "audio": out["path"],         # file://...
-                    "sr": out["sr"],
-                    "word_ts": out.get("word_ts", []),
-                    "phonemes": out.get("phonemes", []),
-                    "emotion": emotion
-                }
-            ))
-        except Exception as e:
-            bus.publish(Event(
-                type="tts_failed",
-                source="tts",
-                payload={"reason": str(e), "fallback_text": ev.payload.get("answer", {}).get("answer", "")}
-            ))
+def make_expert_answer_handler_tts(tts: TTSService, bus: EventBus):
+    def _handler(ev: Event):
+        handle_expert_answer_tts(tts, bus, ev)
     return _handler
 
 # --- 8) Хелпер: создать сервис и прикрутить к bus
 def attach_tts_to_bus(bus: EventBus, engine: str = "piper", default_voice: Optional[str]=None) -> TTSService:
     adapter = PiperAdapter() if engine.lower()=="piper" else RHVoiceAdapter()
     tts = TTSService(adapter=adapter, default_voice=default_voice)
-    bus.subscribe("expert_answer", make_expert_answer_handler_tts(tts, bus))
+    # синтез + запись WAV — медленно: в пул, чтобы Motivator/Organizer не ждали
+    bus.subscribe("expert_answer", make_expert_answer_handler_tts(tts, bus), blocking=True)
 
     # базовое логирование
-    def _logger(ev: Event):
-        print(f"🪵 [LOG] {ev.type} <- {ev.source} :: keys={list(ev.payload.keys())}")
-    bus.subscribe("tts_done", _logger)
-    bus.subscribe("tts_failed", _logger)
+    bus.subscribe("tts_done", log_event)
+    bus.subscribe("tts_failed", log_event)
     return tts
 
+# ============================================
+# 🔮 Sprint 9.5 — Предвыборка KB/TTS под задания Organizer
+# (tasks_ready → фоново греем RETRIEVAL_CACHE/ANSWER_CACHE и TTS-кэш)
+# ============================================
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+# один пул предвыборки на процесс (как BLOCKING_EXECUTOR у шины): прогрев — фоновая
+# работа, отдельный поток на каждую сессию не нужен
+PREFETCH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+class TaskPrefetcher:
+    """
+    На tasks_ready прогревает кэши для текста заданий: выдачу KB по instruction/goal/hints,
+    общий ответ на instruction/goal и TTS-аудио для instruction/hints.
+    Работает в фоне (общий PREFETCH_POOL), чтобы не задерживать переход в work.
+    """
+
+    def __init__(self, expert, tts: Optional[TTSService] = None, pool: Optional[ThreadPoolExecutor] = None):
+        self.expert = expert
+        self.tts = tts
+        self._pool = pool or PREFETCH_POOL
+        self._jobs = set()
+        self.stats = {"jobs": 0, "retrievals": 0, "answers": 0, "tts": 0, "errors": 0}
+
+    def on_tasks_ready(self, ev: Event, context: Context):
+        org = context.progress.get("Organizer", {}) or {}
+        tasks = list(org.get("tasks") or [])
+        if tasks:
+            self.stats["jobs"] += 1
+            job = self._pool.submit(self._prefetch, context, tasks)
+            self._jobs.add(job)
+            job.add_done_callback(self._jobs.discard)
+
+    def _prefetch(self, context: Context, tasks: List[dict]):
+        kb = self.expert.kb if self.expert is not None else None
+        emotion, rate = pick_emotion_and_rate(context)
+        for task in tasks:
+            try:
+                questions = [t for t in (task.get("instruction"), task.get("goal")) if t]
+                hints = [h for h in (task.get("hints") or []) if h]
+                if kb is not None:
+                    for text in questions + hints:
+                        for top_k in (2, 1):
+                            kb_retrieve(kb, text, top_k)
+                            self.stats["retrievals"] += 1
+                    for q in questions:
+                        self._warm_answer(kb, context, q)
+                if self.tts is not None:
+                    for text in ([task["instruction"]] if task.get("instruction") else []) + hints:
+                        self.tts.synthesize(context, text=text, emotion=emotion, rate=rate)
+                        self.stats["tts"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+
+    def _warm_answer(self, kb, context: Context, question: str):
+        intents = detect_intents(question)
+        detail = detect_detail_level(question)
+        key = make_answer_key(context, question, detail, intents, getattr(kb, "version", 0))
+        if ANSWER_CACHE.get(key) is None:
+            base, sources = kb_retrieve(kb, question, 2)
+            ANSWER_CACHE.put(key, build_shared_answer(base, sources, intents, detail))
+            self.stats["answers"] += 1
+
+    def shutdown(self, wait: bool = True):
+        """Отпустить сессию: общий пул не останавливаем, при wait=True дожидаемся своих задач."""
+        if wait:
+            wait_futures(list(self._jobs))
+
+def attach_prefetcher(bus: EventBus, expert, tts: Optional[TTSService] = None) -> TaskPrefetcher:
+    pf = TaskPrefetcher(expert, tts=tts)
+    bus.subscribe("tasks_ready", lambda ev: pf.on_tasks_ready(ev, bus.context))
+    return pf
+
 # ============================================
 # 🔁 Sprint 7.3 — Перезапуск цикла занятия
 # ============================================
 from typing import Dict, Any, Optional
-import copy
 import time
 
+from core.state import StateSnapshot
+
 # --- 1) Снапшот/реставрация прогресса (бережно) ---
 
 def snapshot_progress(context: Context) -> Dict[str, Any]:
     """
-    Делаем неглубокий снимок ключевых модулей; 
-    Organizer + Motivator сохраняем полностью; Expert — только метрики/последний ответ.
+    Снимок ключевых модулей (core/state.py):
+    Organizer / Motivator / Cartographer — StateSnapshot (копирование при записи: ссылки на поля
+    + версия слота; поле копируется в снимок только при первой записи в него после снимка);
+    Expert — только метрики/последний ответ.
     """
     p = context.progress
+    ex = p.get("Expert") or {}
     snap = {
-        "Motivator": copy.deepcopy(p.get("Motivator", {})),
-        "Organizer": copy.deepcopy(p.get("Organizer", {})),
+        "Motivator": p["Motivator"].snapshot(),
+        "Organizer": p["Organizer"].snapshot(),
+        "Cartographer": p["Cartographer"].snapshot(),
         "Expert_meta": {
-            "engagement": (p.get("Expert", {}) or {}).get("engagement"),
-            "confidence": (p.get("Expert", {}) or {}).get("confidence"),
-            "latency_avg_sec": (p.get("Expert", {}) or {}).get("latency_avg_sec"),
-            "last_answer": (p.get("Expert", {}) or {}).get("last_answer"),
+            "engagement": ex.get("engagement"),
+            "confidence": ex.get("confidence"),
+            "latency_avg_sec": ex.get("latency_avg_sec"),
+            "last_answer": ex.get("last_answer"),
         },
-        "Cartographer": copy.deepcopy(p.get("Cartographer", {})),
-        "EventBus_log_tail": copy.deepcopy((p.get("EventBus", {}) or {}).get("log", [])[-20:])
+        # лог — кольцевой буфер: хвост и так собирается в новые словари
+        "EventBus_log_tail": (p.get("EventBus") or {}).get("log", [])[-20:]
     }
     return snap
 
 def restore_progress(context: Context, snap: Dict[str, Any], *, full: bool):
     """
     Возвращаем сохранённые куски прогресса.
+    Для слотов-снимков трогаем только поля, изменившиеся после снимка.
     full=True: очищаем историю Expert (диалог), остальное бережём.
     """
     p = context.progress
-    p.setdefault("Motivator", {}).update(snap.get("Motivator", {}))
-    p.setdefault("Organizer", {}).update(snap.get("Organizer", {}))
-    p.setdefault("Cartographer", {}).update(snap.get("Cartographer", {}))
-
-    p.setdefault("Expert", {})
+    for name in ("Motivator", "Organizer", "Cartographer"):
+        saved = snap.get(name)
+        if isinstance(saved, StateSnapshot):
+            p[name].restore(saved)
+        elif saved:
+            p[name].update(saved)
+
+    ex = p["Expert"]
     if full:
         # Полный рестарт: чистим историю диалога, но оставляем полезные метрики
-        p["Expert"]["dialog_history"] = []
-        p["Expert"]["last_answer"] = None
+        ex["dialog_history"] = []
+        ex["last_answer"] = None
     # Вернём базовые метрики эксперта
     for k, v in (snap.get("Expert_meta") or {}).items():
         if v is not None:
-            p["Expert"][k] = v
+            ex[k] = v
 
 # --- 2) Хелперы рестарта этапа/всего занятия ---
 
@@ -1197,7 +1442,7 @@ def restart_current_stage(conductor: 'Conductor', bus: EventBus, *, reason: str
     - повторно объявляем stage_changed на ту же стадию
     - триггерим базовые действия для этапа (goals/tasks/work/reflection/wrapup)
     """
-    stage = conductor.stage
+    stage = conductor._stage()  # стадия живёт в ConductorState, у HostedSession нет своих полей
     bus.publish(Event(type="stage_changed", source="conductor", payload={"stage": stage, "reason": reason or "restart_stage"}))
 
     # Локальные «пере-входы» в этап (то, что вы делали в 7.2)
@@ -1222,15 +1467,8 @@ def restart_current_stage(conductor: 'Conductor', bus: EventBus, *, reason: str
         bus.publish(Event(type="student_question", source="system", payload={"text": "Давай коротко подумаем: что сейчас мешает двигаться дальше?"}))
 
     elif stage == "wrapup":
-        # сгенерируем свежую краткую сводку (как в 7.2)
-        summary = {
-            "topic": bus.context.topic,
-            "answers_count": len((bus.context.progress.get("Expert", {}) or {}).get("dialog_history", [])),
-            "work_turns": 0,  # можно дорассчитать из Conductor
-            "tasks_available": bool((bus.context.progress.get("Organizer", {}) or {}).get("tasks")),
-            "motivation_level": (bus.context.progress.get("Motivator", {}) or {}).get("level", 1),
-            "style": (bus.context.progress.get("Motivator", {}) or {}).get("last", {}).get("style", {})
-        }
+        # свежая сводка — из агрегатов Conductor (без обхода истории)
+        summary = conductor.lesson_summary()
         bus.publish(Event(type="lesson_finished", source="conductor", payload={"summary": summary}))
 
 def restart_full(conductor: 'Conductor', bus: EventBus, *, reason: str = ""):
@@ -1243,10 +1481,10 @@ def restart_full(conductor: 'Conductor', bus: EventBus, *, reason: str = ""):
     ctx = bus.context
     snap = snapshot_progress(ctx)
 
-    # Сброс состояния ведущего цикла
-    conductor.stage = "start"
-    conductor.answers_count = 0
-    conductor.work_turns = 0
+    # Сброс состояния ведущего цикла — в ConductorState, как в make_restart_handler
+    slot = ctx.progress.setdefault("Conductor", {})
+    slot["work_turns"] = 0
+    conductor._set_stage("start")
 
     restore_progress(ctx, snap, full=True)
 
@@ -1320,20 +1558,20 @@ def test_restart_via_bus(bus: EventBus, conductor: 'Conductor'):
     print("\n— Частичный перезапуск текущего этапа")
     bus.publish(Event(type="restart", source="tester",
                       payload={"mode": "stage", "reason": "retry_current"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     bus.publish(Event(type="student_question", source="student",
                       payload={"text": "Можно ещё раз про выбор диаграммы?"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     print("\n— Полный перезапуск (с начала)")
     bus.publish(Event(type="restart", source="tester",
                       payload={"mode": "full", "reason": "not_understood"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     bus.publish(Event(type="student_question", source="student",
                       payload={"text": "Ок, повторим цели занятия кратко?"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     from pprint import pprint
     print("\n📜 Хвост EventBus лога:")
@@ -1342,6 +1580,7 @@ def test_restart_via_bus(bus: EventBus, conductor: 'Conductor'):
 
 import json, csv, os, time
 from datetime import datetime
+from core.codec import encode_context
 
 def _ts_human(ts: float) -> str:
     try:
@@ -1352,10 +1591,15 @@ def _ts_human(ts: float) -> str:
 def export_eventbus_logs(ctx,
                          json_path: str = None,
                          csv_path: str = None,
-                         extra_meta: dict = None):
-    """Сохраняет EventBus лог + сводные метаданные в JSON/CSV."""
+                         extra_meta: dict = None,
+                         checkpoint_path: str = None):
+    """
+    Сохраняет EventBus лог + сводные метаданные в JSON/CSV.
+    checkpoint_path — дополнительно весь контекст в бинарном кодеке (core/codec.py),
+    его можно поднять decode_context() в другом процессе.
+    """
     eb = (ctx.progress.get("EventBus") or {})
-    log = eb.get("log", [])
+    log = list(eb.get("log", []))
     session_id = eb.get("id", "unknown-session")
 
     # --- базовые метаданные
@@ -1425,8 +1669,15 @@ def export_eventbus_logs(ctx,
                 "payload_keys": ",".join(rec.get("payload_keys", [])),
             })
 
+    paths = {"json": json_path, "csv": csv_path, "meta": meta}
+    if checkpoint_path is not None:
+        os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+        with open(checkpoint_path, "wb") as f:
+            f.write(encode_context(ctx))
+        paths["checkpoint"] = checkpoint_path
+
     print(f"✅ Сохранено:\n- JSON: {json_path}\n- CSV:  {csv_path}")
-    return {"json": json_path, "csv": csv_path, "meta": meta}
+    return paths
 
 # Пример вызова:
 # export_eventbus_logs(ctx)
@@ -1437,6 +1688,7 @@ def export_eventbus_logs(ctx,
 # ============================================
 from pprint import pprint
 import time, random
+from core.clock import SimulatedClock, use_clock
 
 def _tail_log(n=10):
     return ctx.progress.get("EventBus", {}).get("log", [])[-n:]
@@ -1456,7 +1708,7 @@ def _answers_count():
 
 def _reset_for_scenario():
     # мягкая очистка только нужных частей, без сноса индекса/KB
-    ctx.progress["EventBus"]["log"] = []
+    ctx.progress["EventBus"]["log"].clear()
     ctx.progress["Conductor"]["work_turns"] = 0
     ctx.progress["Conductor"]["summary"] = {}
     ctx.progress["Conductor"]["stage"] = "start"
@@ -1476,15 +1728,15 @@ def scenario_smooth():
     # Работа: 2 содержательных вопроса
     bus.publish(Event(type="student_question", source="student",
                       payload={"text": "С чего начать подготовку данных для инфографики?"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
     bus.publish(Event(type="student_question", source="student",
                       payload={"text": "Как выбрать подходящий тип диаграммы для сравнения?"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     # Ответ рефлексии
     bus.publish(Event(type="student_reflection", source="student",
                       payload={"text": "Немного волновался, но стало понятнее."}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     print("Стадия:", _stage())
     print("Ответов эксперта:", _answers_count())
@@ -1506,7 +1758,7 @@ def scenario_mistakes():
     ]
     for q in bad_prompts:
         bus.publish(Event(type="student_question", source="student", payload={"text": q}))
-        time.sleep(0.05)
+        clock_sleep(0.05)
 
     mot = _mot()
     print("Стадия:", _stage())
@@ -1531,7 +1783,7 @@ def scenario_low_motivation():
     # 2) короткие/неуверенные ответы
     for q in ["Да", "Не понимаю", "Хм…"]:
         bus.publish(Event(type="student_question", source="student", payload={"text": q}))
-        time.sleep(0.05)
+        clock_sleep(0.05)
 
     mot = _mot()
     print("Стадия:", _stage())
@@ -1552,19 +1804,19 @@ def scenario_restart():
 
     # Немного «работы»
     bus.publish(Event(type="student_question", source="student", payload={"text": "Как оформить легенду к диаграмме?"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     # Частичный рестарт текущего этапа
     bus.publish(Event(type="restart", source="tester", payload={"mode": "stage", "reason": "retry_current"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
     bus.publish(Event(type="student_question", source="student", payload={"text": "Ещё раз: где подписывать значения?"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     # Полный рестарт с начала
     bus.publish(Event(type="restart", source="tester", payload={"mode": "full", "reason": "not_understood"}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
     bus.publish(Event(type="student_question", source="student", payload={"text": "Повтори кратко цели занятия, пожалуйста."}))
-    time.sleep(0.05)
+    clock_sleep(0.05)
 
     print("Стадия:", _stage())
     print("Ответов эксперта:", _answers_count())
@@ -1572,6 +1824,28 @@ def scenario_restart():
     print("Хвост лога:")
     pprint(_tail_log(8))
 
+# ---------- Сценарий 5: Час занятия на виртуальных часах ----------
+def scenario_slow_pace_simulated(minutes: int = 60, pause_sec: float = 90.0):
+    """
+    Медленный студент: вопрос раз в pause_sec в течение часа. На SimulatedClock паузы
+    мгновенные, а задержки (latency_sec) и темп считаются так же, как вживую.
+    """
+    _print_header(f"Сценарий 5: {minutes} мин. занятия на виртуальных часах")
+    sim = SimulatedClock()
+    t0 = time.perf_counter()
+    with use_clock(sim):
+        ctx.progress["Expert"].last_interaction_time = wall_time()
+        _reset_for_scenario()
+        for i in range(int(minutes * 60 // pause_sec)):
+            clock_sleep(pause_sec)
+            bus.publish(Event(type="student_question", source="student",
+                              payload={"text": f"Вопрос {i + 1}: можно ещё раз помедленнее?"}))
+        last = ctx.progress["Expert"].last_answer or {}
+    print("Виртуально прошло, мин:", round(sim.monotonic() / 60, 1),
+          "| реально, с:", round(time.perf_counter() - t0, 3))
+    print("Средняя задержка, с:", last.get("latency_avg_sec"), "| темп:", last.get("pace"))
+    print("Motivator:", {k: _mot().get(k) for k in ["level", "level_name"]})
+
 # ---------- Запуск всех ----------
 def run_all_scenarios():
     print("ℹ️ Используем ctx/expert/bus/conductor (и motivator/organizer, если есть).")
@@ -1579,6 +1853,7 @@ def run_all_scenarios():
     scenario_mistakes()
     scenario_low_motivation()
     scenario_restart()
+    scenario_slow_pace_simulated()
 
 # ▶️ Запуск
 run_all_scenarios()
@@ -1587,7 +1862,7 @@ paths
 
 print("🎯 Мини‑тест TTS-пайплайна")
 bus.publish(Event(type="student_question", source="student", payload={"text": "Как выбрать тип диаграммы для сравнения?"}))
-time.sleep(0.1)
+clock_sleep(0.1)
 
 # посмотрим хвост event-лога
 from pprint import pprint
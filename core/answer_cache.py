@@ -0,0 +1,97 @@
+# core/answer_cache.py
+
+# ============================================
+# 🧩 Sprint 9.2 — Общий кэш ответов (между студентами)
+# ============================================
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import re
+import threading
+
+_WS_RE = re.compile(r"\s+")
+_EDGE_PUNCT = " \t\n.,!?…:;«»\"'()-"
+
+
+def normalize_question(q: str) -> str:
+    """Нижний регистр, схлопнутые пробелы, без пунктуации по краям."""
+    return _WS_RE.sub(" ", (q or "").lower()).strip(_EDGE_PUNCT)
+
+
+def make_answer_key(context, question: str, detail: str, intents, kb_version: int) -> Tuple:
+    """Ключ студент-независимой части ответа."""
+    return (context.discipline, context.topic, normalize_question(question),
+            detail, tuple(intents), kb_version)
+
+
+def retrieval_key(kb, query: str, top_k: int) -> Tuple:
+    """Ключ выдачи KB: у каждой базы (дисциплины) своя выдача на тот же запрос."""
+    return (id(kb), getattr(kb, "discipline", None), getattr(kb, "version", 0),
+            normalize_question(query), top_k)
+
+
+def _loose_key(key: Tuple) -> Tuple:
+    # (discipline, topic, question, kb_version)
+    return key[:3] + key[5:]
+
+
+class AnswerCache:
+    """
+    LRU-кэш студент-независимой части ответа:
+    {"base", "sources", "answer", "explanation"}.
+    Персональная часть (эмпатия, темп, next_steps, метрики) сюда не попадает.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        # «грубый» индекс без detail/intents: для деградации под нагрузкой
+        self._loose: Dict[Tuple, Tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            rec = self._data.get(key)
+            if rec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return rec
+
+    def get_loose(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Любой закэшированный ответ на тот же вопрос (detail/intents могут отличаться)."""
+        with self._lock:
+            full = self._loose.get(_loose_key(key))
+            rec = self._data.get(full) if full is not None else None
+            if rec is not None:
+                self.hits += 1
+            return rec
+
+    def put(self, key: Tuple, rec: Dict[str, Any]):
+        with self._lock:
+            self._data[key] = rec
+            self._data.move_to_end(key)
+            self._loose[_loose_key(key)] = key
+            while len(self._data) > self.maxsize:
+                old, _ = self._data.popitem(last=False)
+                lk = _loose_key(old)
+                if self._loose.get(lk) == old:
+                    del self._loose[lk]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._loose.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else None}
+
+
+# один кэш на процесс — общий для всех сессий/студентов
+ANSWER_CACHE = AnswerCache()
+# выдача KB: retrieval_key(kb, запрос, top_k) -> {"base", "sources"}
+RETRIEVAL_CACHE = AnswerCache(maxsize=2048)
@@ -0,0 +1,256 @@
+# core/bus_host.py
+
+# ============================================
+# 🏫 Sprint 10.5 — BusHost: много занятий на одной общей таблице маршрутов
+# Требуется: Event, EventLog, handle_*, log_event, ACTIVITY_EVENTS (core/event_bus.py),
+#            ConductorBase, CONDUCTOR_ROUTES (core/conductor.py), make_restart_handler
+# ============================================
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+import uuid
+
+# ── 1) Виды обработчиков: обычные функции (session, event), без замыканий на сессию
+def _kind_expert(s: 'HostedSession', ev: Event):
+    handle_student_question(s.host.expert, s, ev)
+
+def _kind_motivator(s: 'HostedSession', ev: Event):
+    handle_expert_answer_motivation(s.host.motivator, s, ev)
+
+def _kind_organizer(s: 'HostedSession', ev: Event):
+    handle_expert_answer_organizer(s.host.organizer, s, ev)
+
+def _kind_tts(s: 'HostedSession', ev: Event):
+    # синтез — в общий пул, в очередь (сессия, tts)
+    host = s.host
+    host.executor.submit((s.session_id, "tts", 0), host._derived, handle_expert_answer_tts, host.tts, s, ev,
+                         spec=host.tts_queue, event=ev)
+
+def _kind_idle(s: 'HostedSession', ev: Event):
+    handle_inactivity_motivation(s.host.motivator, s, ev)
+
+def _kind_log(s: 'HostedSession', ev: Event):
+    log_event(ev)
+
+def _kind_restart(s: 'HostedSession', ev: Event):
+    make_restart_handler(s, s)(ev)
+
+HANDLER_KINDS: Dict[str, Callable[['HostedSession', Event], None]] = {
+    "expert": _kind_expert,
+    "motivator": _kind_motivator,
+    "organizer": _kind_organizer,
+    "tts": _kind_tts,
+    "idle": _kind_idle,
+    "log": _kind_log,
+    "restart": _kind_restart,
+    # методы Conductor вызываются как функции: сессия сама выступает «self»
+    **{f"conductor.{method}": getattr(ConductorBase, method) for _, method in CONDUCTOR_ROUTES},
+}
+
+# вид → какой общий сервис ему нужен (нет сервиса — вид выпадает при компиляции)
+_KIND_NEEDS = {"expert": "expert", "motivator": "motivator", "organizer": "organizer", "tts": "tts",
+               "idle": "motivator"}
+
+# тип события → виды обработчиков (порядок = порядок вызова, как при подписке на отдельную шину)
+DEFAULT_ROUTES: Dict[str, Tuple[str, ...]] = {
+    "init": ("conductor.on_init",),
+    "goals_ready": ("conductor.on_goals_ready",),
+    "tasks_ready": ("conductor.on_tasks_ready",),
+    "student_question": ("expert", "log"),
+    "expert_answer": ("motivator", "organizer", "log", "tts", "conductor.on_expert_answer"),
+    "motivation_update": ("log", "conductor.on_motivation_update"),
+    "organizer_update": ("log", "conductor.on_organizer_update"),
+    "reflection_answer": ("conductor.on_reflection_answer",),
+    "ask_reflection": ("conductor.on_ask_reflection",),
+    "student_reflection": ("conductor._proxy_reflection",),
+    "restart": ("restart",),
+    "tts_done": ("log",),
+    "tts_failed": ("log",),
+    "inactivity": ("idle", "log"),
+    "timeout": ("idle", "log"),
+    "error": ("log",),
+}
+
+def compile_routes(routes: Dict[str, Tuple[str, ...]], services: Dict[str, Any]) -> Dict[str, Tuple[Callable, ...]]:
+    """Один раз превращаем описание маршрутов в таблицу: тип события → кортеж функций."""
+    table = {}
+    for event_type, kinds in routes.items():
+        fns = []
+        for kind in kinds:
+            need = _KIND_NEEDS.get(kind)
+            if need is not None and services.get(need) is None:
+                continue
+            fns.append(HANDLER_KINDS[kind])
+        if fns:
+            table[event_type] = tuple(fns)
+    return table
+
+# ── 2) Сессия — лёгкая запись состояния; шиной для обработчиков служит она сама
+class HostedSession(ConductorBase):
+    """
+    Состояние одного занятия внутри BusHost: контекст + кольцевой лог.
+    Наследует логику Conductor (методы on_* вызываются по общей таблице),
+    но не подписывается сама и не держит замыканий: expert/motivator/organizer
+    и min_work_turns берутся у хоста. ConductorBase без полей, поэтому у сессии
+    только четыре слота и нет __dict__.
+    """
+    __slots__ = ("session_id", "ctx", "host", "events")
+
+    def __init__(self, host: 'BusHost', context: Context, session_id: str):
+        self.host = host
+        self.ctx = context
+        self.session_id = session_id
+        eb = context.progress.setdefault("EventBus", {})
+        eb["id"] = session_id
+        log = eb.get("log")
+        if not isinstance(log, EventLog):
+            log = eb["log"] = EventLog.from_records(log or [])
+        self.events = log
+        self._init_slot()
+
+    # интерфейс «шины» для handle_* / Conductor / make_restart_handler
+    bus = property(lambda self: self)
+    context = property(lambda self: self.ctx)
+    expert = property(lambda self: self.host.expert)
+    organizer = property(lambda self: self.host.organizer)
+    motivator = property(lambda self: self.host.motivator)
+    min_work_turns = property(lambda self: self.host.min_work_turns)
+
+    def publish(self, event: Event):
+        self.host.publish(self, event)
+
+# ── 3) Хост
+class BusHost:
+    """
+    Одна таблица маршрутов и один набор сервисов на все занятия узла.
+    Сессии ищутся по session_id; publish кладёт событие в общую очередь,
+    которая разбирается итеративно (без рекурсии по каскаду событий).
+    """
+
+    def __init__(self, expert=None, motivator=None, organizer=None, tts=None,
+                 routes: Dict[str, Tuple[str, ...]] = DEFAULT_ROUTES,
+                 min_work_turns: int = 2, journal=None, executor=None, tts_queue=None, store=None):
+        self.expert = expert
+        self.motivator = motivator
+        self.organizer = organizer
+        self.tts = tts
+        self.min_work_turns = min_work_turns
+        self.journal = journal
+        self.executor = executor or BLOCKING_EXECUTOR
+        self.tts_queue = tts_queue
+        self.store = store              # SessionStore: ленивая загрузка и фоновое сохранение
+        self.registry = None            # SessionManager (core/sessions.py): TTL и бюджет памяти
+        self.timers = None              # InactivityScheduler (core/timers.py): простой → inactivity/timeout
+        self.table = compile_routes(routes, {"expert": expert, "motivator": motivator,
+                                             "organizer": organizer, "tts": tts})
+        self.sessions: Dict[str, HostedSession] = {}
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._dispatching = False
+        # глубина вызова обработчиков в этом потоке: publish изнутри обработчика — производное
+        # событие (не корень журнала), извне — корень, даже если другой поток сейчас разбирает очередь
+        self._tls = threading.local()
+
+    # --- сессии
+    def open_session(self, context: Context, session_id: Optional[str] = None) -> HostedSession:
+        sid = session_id or (context.progress.get("EventBus") or {}).get("id") or str(uuid.uuid4())
+        s = self.sessions.get(sid)
+        if s is None:
+            s = self.sessions[sid] = HostedSession(self, context, sid)
+            if self.timers is not None:
+                self.timers.touch(sid, self._timer_event)
+        return s
+
+    def session(self, session_id: str) -> Optional[HostedSession]:
+        s = self.sessions.get(session_id)
+        if s is None and self.registry is not None:
+            # реестр сам поднимет контекст из хранилища и откроет сессию здесь
+            context = self.registry.get(session_id)
+            if context is not None:
+                s = self.open_session(context, session_id)
+        elif s is None and self.store is not None:
+            # после рестарта воркера: поднимаем сессию из хранилища при первом обращении
+            context = self.store.load(session_id)
+            if context is not None:
+                s = self.open_session(context, session_id)
+        return s
+
+    def close_session(self, session_id: str) -> Optional[HostedSession]:
+        self.executor.forget(session_id)
+        if self.timers is not None:
+            self.timers.remove(session_id)
+        s = self.sessions.pop(session_id, None)
+        if s is not None and self.store is not None:
+            self.store.release(session_id, s.ctx)
+        return s
+
+    # --- таймеры простоя
+    def attach_timers(self, scheduler: InactivityScheduler):
+        """Одно колесо на все сессии узла; уже открытые сессии начинают отсчёт сейчас."""
+        self.timers = scheduler
+        for sid in self.sessions:
+            scheduler.touch(sid, self._timer_event)
+
+    def _timer_event(self, session_id: str, event_type: str, idle_sec: float):
+        if session_id not in self.sessions:
+            return              # сессия уже выгружена — будить её ради простоя не нужно
+        self.publish(session_id, Event(type=event_type, source="scheduler",
+                                       payload={"idle_sec": round(idle_sec, 1)}))
+
+    # --- события
+    def publish(self, session, event: Event):
+        s = session if isinstance(session, HostedSession) else self.session(session)
+        if s is None:
+            raise KeyError(session)
+        if self.registry is not None:
+            self.registry.touch(s.session_id)
+        if self.timers is not None and event.type in ACTIVITY_EVENTS:
+            self.timers.touch(s.session_id, self._timer_event)
+        s.events.append_event(event)
+        if self.journal is not None:
+            self.journal.append(s.session_id, event, root=not getattr(self._tls, "depth", 0))
+        with self._lock:
+            self._queue.append((s, event))
+            if self._dispatching:
+                return
+            self._dispatching = True
+        self._drain()
+
+    def _drain(self):
+        table, queue, store, tls = self.table, self._queue, self.store, self._tls
+        touched = {}
+        while True:
+            with self._lock:
+                if not queue:
+                    self._dispatching = False
+                    break
+                s, event = queue.popleft()
+            if store is not None:
+                touched[s.session_id] = s
+            tls.depth = getattr(tls, "depth", 0) + 1
+            try:
+                for fn in table.get(event.type, ()):
+                    try:
+                        fn(s, event)
+                    except Exception as e:
+                        err = Event(type="error", source="bushost", payload={"reason": str(e), "during": event.type})
+                        s.events.append_event(err)
+            finally:
+                tls.depth -= 1
+        for s in touched.values():
+            store.capture(s.session_id, s.ctx)
+        if self.registry is not None:
+            self.registry.maybe_sweep()
+
+    def _derived(self, fn: Callable, *args):
+        """Обработчик из пула (TTS): его publish — производные события, как и в _drain."""
+        tls = self._tls
+        tls.depth = getattr(tls, "depth", 0) + 1
+        try:
+            fn(*args)
+        finally:
+            tls.depth -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self.sessions), "routes": {k: len(v) for k, v in self.table.items()},
+                "pending": len(self._queue)}
@@ -0,0 +1,89 @@
+# core/clock.py
+
+# ============================================
+# 🕰️ Sprint 11.8 — Подменяемые часы: системные и симулированные (прогоны быстрее реального времени)
+# ============================================
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+import time
+
+
+class SystemClock:
+    """Обычное время процесса."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    Виртуальное время: sleep()/advance() сдвигают часы мгновенно.
+    Слушатели (например, InactivityScheduler.advance) вызываются после каждого сдвига
+    с новым монотонным временем — так срабатывают таймеры простоя внутри симуляции.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        self._wall0 = time.time() if start is None else start
+        self._elapsed = 0.0
+        self._listeners: List[Callable[[float], None]] = []
+
+    def time(self) -> float:
+        return self._wall0 + self._elapsed
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("время назад не идёт")
+        self._elapsed += seconds
+        for fn in self._listeners:
+            fn(self._elapsed)
+
+    def add_listener(self, fn: Callable[[float], None]):
+        self._listeners.append(fn)
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock) -> object:
+    """Поставить часы процесса; возвращает прежние."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock):
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
+
+
+# короткие функции для горячих мест: читают текущие часы при каждом вызове
+def wall_time() -> float:
+    return _clock.time()
+
+
+def mono_time() -> float:
+    return _clock.monotonic()
+
+
+def clock_sleep(seconds: float):
+    _clock.sleep(seconds)
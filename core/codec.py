@@ -0,0 +1,349 @@
+# core/codec.py
+
+# ============================================
+# 📦 Sprint 11.4 — Бинарный кодек сессий и ответов (varint, интернированные строки, NumPy-ряды)
+# ============================================
+from collections import deque
+from collections.abc import Mapping
+from typing import Any, Dict, List, Tuple
+import json
+import struct
+import time
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy числовые ряды пишутся обычными списками
+    np = None
+
+from core.context import Context
+from core.state import STATE_TYPES, ModuleState, SessionProgress
+
+# заголовок: магия + версия формата (декодер отказывается от незнакомых версий)
+MAGIC = b"LC"
+VERSION = 1
+
+# теги значений
+T_NONE, T_FALSE, T_TRUE = 0x00, 0x01, 0x02
+T_INT = 0x03          # zigzag varint
+T_FLOAT = 0x04        # float64 LE
+T_STR = 0x05          # новая строка: varint длины + utf-8 (попадает в таблицу)
+T_STR_REF = 0x06      # повтор строки: varint индекса в таблице
+T_BYTES = 0x07
+T_LIST = 0x08         # varint n + элементы
+T_DICT = 0x09         # varint n + пары ключ/значение
+T_ARRAY = 0x0A        # np.ndarray: dtype, ndim, shape, сырые байты
+T_SERIES = 0x0B       # числовой список → float64/int64 массив, декодируется обратно в list
+T_DEQUE = 0x0C        # varint (maxlen + 1, 0 = без ограничения) + вложенное значение
+
+SERIES_MIN_LEN = 8    # короче — выгоднее обычным списком
+
+_DTYPES = ({0: np.dtype("<f8"), 1: np.dtype("<f4"), 2: np.dtype("<i8"), 3: np.dtype("<i4"),
+            4: np.dtype("<i2"), 5: np.dtype("u1"), 6: np.dtype("?")} if np is not None else {})
+_DTYPE_CODES = {dt: code for code, dt in _DTYPES.items()}
+_NP_SCALARS = (np.integer, np.floating, np.bool_) if np is not None else ()
+_F64 = struct.Struct("<d")
+
+
+class CodecError(ValueError):
+    pass
+
+
+# ---------- 1) Кодирование ----------
+
+def _write_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _numeric_series(seq) -> Any:
+    """Однородный числовой список (не bool) → np.ndarray, иначе None."""
+    if np is None:
+        return None
+    first = seq[0]
+    if type(first) is float:
+        if all(type(x) is float for x in seq):
+            return np.asarray(seq, dtype="<f8")
+    elif type(first) is int:
+        if all(type(x) is int for x in seq):
+            try:
+                return np.asarray(seq, dtype="<i8")
+            except OverflowError:
+                return None
+    return None
+
+
+class _Encoder:
+    __slots__ = ("out", "strings")
+
+    def __init__(self):
+        self.out = bytearray(MAGIC)
+        self.out.append(VERSION)
+        self.strings: Dict[str, int] = {}
+
+    def value(self, v: Any):
+        out = self.out
+        t = type(v)
+        if v is None:
+            out.append(T_NONE)
+        elif t is bool:
+            out.append(T_TRUE if v else T_FALSE)
+        elif t is int:
+            out.append(T_INT)
+            _write_varint(out, (v << 1) if v >= 0 else ((-v << 1) - 1))
+        elif t is float:
+            out.append(T_FLOAT)
+            out += _F64.pack(v)
+        elif t is str:
+            idx = self.strings.get(v)
+            if idx is not None:
+                out.append(T_STR_REF)
+                _write_varint(out, idx)
+            else:
+                self.strings[v] = len(self.strings)
+                raw = v.encode("utf-8")
+                out.append(T_STR)
+                _write_varint(out, len(raw))
+                out += raw
+        elif t is dict or isinstance(v, Mapping):
+            if t is not dict and isinstance(v, ModuleState):
+                v = v.to_record()           # рабочие объекты слота (TRANSIENT) не пишем
+            out.append(T_DICT)
+            _write_varint(out, len(v))
+            for k, x in v.items():
+                self.value(k)
+                self.value(x)
+        elif t is list or t is tuple or isinstance(v, list):   # TrackedList слотов (core/state.py)
+            self.sequence(v)
+        elif t is deque:
+            out.append(T_DEQUE)
+            _write_varint(out, 0 if v.maxlen is None else v.maxlen + 1)
+            self.sequence(list(v))
+        elif np is not None and t is np.ndarray:
+            self.array(v, T_ARRAY)
+        elif t is bytes or t is bytearray:
+            out.append(T_BYTES)
+            _write_varint(out, len(v))
+            out += v
+        elif isinstance(v, _NP_SCALARS):
+            self.value(v.item())
+        elif isinstance(v, (set, frozenset)):
+            self.sequence(list(v))
+        else:
+            to_list = getattr(v, "to_list", None)    # EventLog
+            if to_list is None:
+                raise CodecError(f"Тип не кодируется: {t.__name__} (рабочие поля слота — в TRANSIENT)")
+            self.sequence(to_list())
+
+    def sequence(self, seq):
+        if len(seq) >= SERIES_MIN_LEN:
+            arr = _numeric_series(seq)
+            if arr is not None:
+                self.array(arr, T_SERIES)
+                return
+        self.out.append(T_LIST)
+        _write_varint(self.out, len(seq))
+        for x in seq:
+            self.value(x)
+
+    def array(self, arr: 'np.ndarray', tag: int):
+        arr = np.ascontiguousarray(arr)
+        code = _DTYPE_CODES.get(arr.dtype.newbyteorder("<"))
+        if code is None:
+            raise CodecError(f"Неподдерживаемый dtype: {arr.dtype}")
+        arr = arr.astype(_DTYPES[code], copy=False)
+        out = self.out
+        out.append(tag)
+        out.append(code)
+        _write_varint(out, arr.ndim)
+        for dim in arr.shape:
+            _write_varint(out, dim)
+        out += arr.tobytes()
+
+
+def encode(obj: Any) -> bytes:
+    enc = _Encoder()
+    enc.value(obj)
+    return bytes(enc.out)
+
+
+# ---------- 2) Декодирование ----------
+
+class _Decoder:
+    __slots__ = ("buf", "pos", "strings")
+
+    def __init__(self, data: bytes):
+        if data[:2] != MAGIC:
+            raise CodecError("Нет заголовка кодека")
+        if data[2] != VERSION:
+            raise CodecError(f"Неизвестная версия формата: {data[2]}")
+        self.buf = bytes(data)
+        self.pos = 3
+        self.strings: List[str] = []
+
+    def varint(self) -> int:
+        buf, pos = self.buf, self.pos
+        b = buf[pos]
+        if b < 0x80:                      # частый случай: один байт
+            self.pos = pos + 1
+            return b
+        result, shift = b & 0x7F, 7
+        while True:
+            pos += 1
+            b = buf[pos]
+            result |= (b & 0x7F) << shift
+            if b < 0x80:
+                self.pos = pos + 1
+                return result
+            shift += 7
+
+    def value(self) -> Any:
+        buf = self.buf
+        tag = buf[self.pos]
+        self.pos += 1
+        if tag == T_STR_REF:
+            return self.strings[self.varint()]
+        if tag == T_STR:
+            n = self.varint()
+            pos = self.pos
+            s = buf[pos:pos + n].decode("utf-8")
+            self.pos = pos + n
+            self.strings.append(s)
+            return s
+        if tag == T_DICT:
+            value = self.value
+            d = {}
+            for _ in range(self.varint()):
+                k = value()
+                d[k] = value()
+            return d
+        if tag == T_LIST:
+            value = self.value
+            return [value() for _ in range(self.varint())]
+        if tag == T_INT:
+            z = self.varint()
+            return (z >> 1) if not z & 1 else -((z + 1) >> 1)
+        if tag == T_FLOAT:
+            (v,) = _F64.unpack_from(buf, self.pos)
+            self.pos += 8
+            return v
+        if tag == T_NONE:
+            return None
+        if tag == T_TRUE:
+            return True
+        if tag == T_FALSE:
+            return False
+        if tag == T_SERIES:
+            return self.array().tolist()
+        if tag == T_ARRAY:
+            return self.array()
+        if tag == T_DEQUE:
+            maxlen = self.varint()
+            return deque(self.value(), maxlen=(maxlen - 1) if maxlen else None)
+        if tag == T_BYTES:
+            n = self.varint()
+            b = buf[self.pos:self.pos + n]
+            self.pos += n
+            return b
+        raise CodecError(f"Неизвестный тег: {tag:#x}")
+
+    def array(self) -> 'np.ndarray':
+        if np is None:
+            raise CodecError("Для массивов в данных нужен NumPy")
+        dtype = _DTYPES[self.buf[self.pos]]
+        self.pos += 1
+        shape = tuple(self.varint() for _ in range(self.varint()))
+        count = 1
+        for dim in shape:
+            count *= dim
+        nbytes = count * dtype.itemsize
+        arr = np.frombuffer(self.buf, dtype=dtype, count=count, offset=self.pos).reshape(shape).copy()
+        self.pos += nbytes
+        return arr
+
+
+def decode(data: bytes) -> Any:
+    return _Decoder(data).value()
+
+
+def decode_or_json(data: bytes) -> Any:
+    """Для хранилищ со старыми JSON-записями: без заголовка кодека — читаем как JSON."""
+    if data[:2] == MAGIC:
+        return decode(data)
+    return json.loads(bytes(data).decode("utf-8"))
+
+
+# ---------- 3) Контекст целиком (чекпойнт / передача между процессами) ----------
+
+CONTEXT_FIELDS = ("discipline", "lesson_number", "topic", "student_level", "mode",
+                  "student_id", "task_id", "input_type", "data")
+
+
+def encode_context(context: Context) -> bytes:
+    return encode({
+        "meta": {f: getattr(context, f, None) for f in CONTEXT_FIELDS},
+        "progress": context.progress,
+    })
+
+
+def decode_context(data: bytes) -> Context:
+    rec = decode(data)
+    meta = rec.get("meta") or {}
+    context = Context(**{f: meta.get(f) for f in CONTEXT_FIELDS})
+    progress: SessionProgress = context.progress
+    for name, slot in (rec.get("progress") or {}).items():
+        cls = STATE_TYPES.get(name)
+        if cls is not None and isinstance(slot, dict):
+            dict.__setitem__(progress, name, cls.from_dict(slot))
+        else:
+            progress[name] = slot
+    return context
+
+
+# ---------- 4) JSON (формат хранилища по умолчанию) и сравнение ----------
+
+def _json_default(obj):
+    if isinstance(obj, ModuleState):
+        return obj.to_record()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (deque, set, tuple)):
+        return list(obj)
+    if np is not None and isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, _NP_SCALARS):
+        return obj.item()
+    to_list = getattr(obj, "to_list", None)
+    if to_list is None:
+        raise TypeError(f"Тип не сериализуется в JSON: {type(obj).__name__}")
+    return to_list()
+
+
+def encode_json(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def benchmark_codec(obj: Any, n: int = 2000) -> Dict[str, Dict[str, float]]:
+    """
+    Размер и время encode/decode (мкс) для бинарного кодека и json.
+    На обычных слотах (словари и строки) json из C-расширения быстрее, поэтому SessionStore
+    по умолчанию пишет json; бинарный кодек выигрывает в размере на длинных числовых
+    рядах (T_SERIES) — его включают явно: SessionStore(path, encode=codec.encode).
+    """
+    variants: Tuple = (
+        ("binary", encode, decode),
+        ("json", encode_json, lambda b: json.loads(b.decode("utf-8"))),
+    )
+    out = {}
+    for label, enc, dec in variants:
+        data = enc(obj)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            enc(obj)
+        t1 = time.perf_counter()
+        for _ in range(n):
+            dec(data)
+        t2 = time.perf_counter()
+        out[label] = {"bytes": len(data), "encode_us": (t1 - t0) / n * 1e6, "decode_us": (t2 - t1) / n * 1e6}
+    return out
@@ -5,7 +5,8 @@
 # Требуется: ctx, bus, expert уже созданы (и, по возможности, organizer, motivator)
 # ============================================
 from typing import Optional, Dict, Any
-import time
+
+from core.clock import wall_time
 
 # ── 0) Фолбэк для целей (если Cartographer/goals уже есть — возьмём их)
 def _get_or_make_goals(context) -> Dict[str, Any]:
@@ -27,7 +28,77 @@ def _get_or_make_goals(context) -> Dict[str, Any]:
     return goals
 
 # ── 1) Conductor — оркестратор этапов занятия
-class Conductor:
+
+# тип события → метод Conductor (общая таблица: и для отдельной шины, и для BusHost)
+CONDUCTOR_ROUTES = (
+    ("init", "on_init"),
+    ("goals_ready", "on_goals_ready"),
+    ("tasks_ready", "on_tasks_ready"),
+    ("expert_answer", "on_expert_answer"),
+    ("reflection_answer", "on_reflection_answer"),
+    ("ask_reflection", "on_ask_reflection"),     # логируем факт
+    ("student_reflection", "_proxy_reflection"), # на всякий случай также слушаем student_reflection
+    ("motivation_update", "on_motivation_update"),  # итоги: гистограмма уровней мотивации
+    ("organizer_update", "on_organizer_update"),    # итоги: сколько заданий выдано
+)
+
+# ── 1a) Шаги этапов: (conductor, trigger, out) → следующий этап или None («ждём события»)
+# trigger — тип события, запустившего проход (только для первого шага); out — пачка событий
+def _step_start(c: 'Conductor', trigger: Optional[str], out: list) -> Optional[str]:
+    if trigger not in ("init", "goals_ready"):
+        return None
+    # формируем цели (или читаем готовые)
+    goals = _get_or_make_goals(c.ctx)
+    if trigger == "init":
+        out.append(Event(type="goals_ready", source="conductor", payload={"goals": goals}))
+    return "goals"
+
+def _step_goals(c: 'Conductor', trigger: Optional[str], out: list) -> Optional[str]:
+    if trigger == "tasks_ready":
+        return "tasks"          # задания уже объявлены снаружи
+    # генерируем задания (через Organizer, если есть)
+    if c.organizer is not None:
+        org_data = c.organizer.process(c.ctx)
+        out.append(Event(type="organizer_update", source="organizer", payload={"organizer": org_data}))
+    # сигнал «задания готовы»
+    out.append(Event(type="tasks_ready", source="conductor", payload={"has_tasks": c._has_tasks()}))
+    return "tasks"
+
+def _step_tasks(c: 'Conductor', trigger: Optional[str], out: list) -> Optional[str]:
+    # проверяем, что задания действительно существуют
+    if not c._has_tasks():
+        # мягко деградируем: всё равно в work, но помечаем пустой набор
+        out.append(Event(type="warning", source="conductor",
+                         payload={"msg": "Organizer не предоставил задания; продолжаем в режиме work."}))
+    return "work"
+
+def _step_work(c: 'Conductor', trigger: Optional[str], out: list) -> Optional[str]:
+    # условие перехода к рефлексии: достаточно «рабочих» поворотов
+    turns = c.ctx.progress["Conductor"]["work_turns"]
+    if trigger != "expert_answer" or turns < c.min_work_turns:
+        return None
+    # попросим Motivator задать вопрос рефлексии (или сами предложим)
+    out.append(Event(type="ask_reflection", source="conductor",
+                     payload={"reason": "enough_work_turns", "turns": turns}))
+    return "reflection"
+
+def _step_reflection(c: 'Conductor', trigger: Optional[str], out: list) -> Optional[str]:
+    return "wrapup" if trigger == "reflection_answer" else None
+
+def _step_wrapup(c: 'Conductor', trigger: Optional[str], out: list) -> Optional[str]:
+    c._summarize(out)
+    return "finished"
+
+STAGE_STEPS = {
+    "start": _step_start,
+    "goals": _step_goals,
+    "tasks": _step_tasks,
+    "work": _step_work,
+    "reflection": _step_reflection,
+    "wrapup": _step_wrapup,
+}
+
+class ConductorBase:
     """
     Этапы: start → goals → tasks → work → reflection → wrapup → finished
     Условия переходов:
@@ -38,101 +109,112 @@ class Conductor:
       - reflection: получен ответ рефлексии → wrapup
       - wrapup: публикуем lesson_finished, считаем итоги → finished
     На каждом этапе интегрируем Organizer / Motivator, если есть.
-    """
 
-    def __init__(self, context, bus, expert=None, organizer=None, motivator=None, min_work_turns:int=2):
-        self.ctx = context
-        self.bus = bus
-        self.expert = expert
-        self.organizer = organizer
-        self.motivator = motivator
-        self.min_work_turns = min_work_turns
+    Продвижение — цикл по STAGE_STEPS (_advance): за один проход этап сдвигается так
+    далеко, как позволяют условия, а goals_ready/tasks_ready/stage_changed/… копятся
+    в пачку и публикуются после цикла. Свои же goals_ready/tasks_ready Conductor
+    затем пропускает по стадии, поэтому глубина стека не растёт с числом этапов.
 
-        slot = self.ctx.progress.setdefault("Conductor", {})
-        slot.setdefault("stage", "start")
-        slot.setdefault("work_turns", 0)
-        slot.setdefault("summary", {})
-        slot.setdefault("timestamps", {})
-        self._mark_time("created")
+    Базовый класс — только логика, без полей: нужны ctx, bus, organizer, min_work_turns
+    (у Conductor это атрибуты, у HostedSession из core/bus_host.py — слоты и свойства).
+    """
+    __slots__ = ()
 
-        # подписки
-        bus.subscribe("init", self.on_init)
-        bus.subscribe("goals_ready", self.on_goals_ready)
-        bus.subscribe("tasks_ready", self.on_tasks_ready)
-        bus.subscribe("expert_answer", self.on_expert_answer)
-        bus.subscribe("reflection_answer", self.on_reflection_answer)
-        bus.subscribe("ask_reflection", self.on_ask_reflection)  # логируем факт
-        # на всякий случай также слушаем student_reflection
-        bus.subscribe("student_reflection", self._proxy_reflection)
 
     # ── вспомогательное
+    def _init_slot(self):
+        # ConductorState (core/state.py) создаётся со stage="start", work_turns=0, summary/timestamps
+        slot = self.ctx.progress.setdefault("Conductor", {})
+        ts = self._mark_time("created")
+        if slot.agg["stage"] is None:
+            slot.note_stage(slot.stage, ts)     # отсчёт длительности первого этапа
+
     def _stage(self) -> str:
         return self.ctx.progress["Conductor"]["stage"]
 
-    def _set_stage(self, new_stage: str):
-        self.ctx.progress["Conductor"]["stage"] = new_stage
-        self._mark_time(f"stage:{new_stage}")
-        # широковещательно сообщаем об изменении
-        self.bus.publish(Event(type="stage_changed", source="conductor", payload={"stage": new_stage}))
+    def _set_stage(self, new_stage: str, out: Optional[list] = None):
+        slot = self.ctx.progress["Conductor"]
+        slot["stage"] = new_stage
+        slot.note_stage(new_stage, self._mark_time(f"stage:{new_stage}"))
+        # широковещательно сообщаем об изменении (внутри прохода — в общую пачку)
+        ev = Event(type="stage_changed", source="conductor", payload={"stage": new_stage})
+        if out is None:
+            self.bus.publish(ev)
+        else:
+            out.append(ev)
 
-    def _mark_time(self, key: str):
-        ts = time.time()
+    def _mark_time(self, key: str) -> float:
+        ts = wall_time()
         self.ctx.progress["Conductor"]["timestamps"][key] = ts
+        return ts
 
     def _has_tasks(self) -> bool:
         org = self.ctx.progress.get("Organizer", {})
         tasks = org.get("tasks") or org.get("Organizer", {}).get("tasks")
         return bool(tasks)
 
+    def _advance(self, trigger: Optional[str]):
+        """Шаги этапов подряд, пока условия позволяют; события — одной пачкой в конце."""
+        out: list = []
+        stage = self._stage()
+        while True:
+            step = STAGE_STEPS.get(stage)
+            nxt = step(self, trigger, out) if step is not None else None
+            if nxt is None:
+                break
+            self._set_stage(nxt, out)
+            stage, trigger = nxt, None
+        publish = self.bus.publish
+        for ev in out:
+            publish(ev)
+
     # ── обработчики событий
     def on_init(self, ev: Event):
         if self._stage() != "start":
             return
-        # формируем цели (или читаем готовые)
-        goals = _get_or_make_goals(self.ctx)
-        self.bus.publish(Event(type="goals_ready", source="conductor", payload={"goals": goals}))
+        self._advance("init")
 
     def on_goals_ready(self, ev: Event):
         if self._stage() not in {"start", "goals"}:
             return
-        self._set_stage("goals")
-        # генерируем задания (через Organizer, если есть)
-        if self.organizer is not None:
-            org_data = self.organizer.process(self.ctx)
-            self.bus.publish(Event(type="organizer_update", source="organizer", payload={"organizer": org_data}))
-        # сигнал «задания готовы»
-        self.bus.publish(Event(type="tasks_ready", source="conductor", payload={"has_tasks": self._has_tasks()}))
+        self._advance("goals_ready")
 
     def on_tasks_ready(self, ev: Event):
         if self._stage() not in {"goals", "tasks"}:
             return
-        # проверяем, что задания действительно существуют
-        if not self._has_tasks():
-            # мягко деградируем: всё равно в work, но помечаем пустой набор
-            self.bus.publish(Event(type="warning", source="conductor",
-                                   payload={"msg": "Organizer не предоставил задания; продолжаем в режиме work."}))
-        self._set_stage("tasks")
-        # переход в работу
-        self._set_stage("work")
+        self._advance("tasks_ready")
 
     def on_expert_answer(self, ev: Event):
+        # заглушка brief-уровня (degraded) — не ответ: ни в итоги, ни в рабочие повороты
+        answer = ev.payload.get("answer")
+        if isinstance(answer, dict) and answer.get("degraded"):
+            return
+        # ответы эксперта — в итоги на любом этапе (служебные «[auto]»-события не считаем)
+        if ev.source == "expert":
+            self.ctx.progress["Conductor"].note_answer()
         # считаем «рабочие» повороты, но только на этапе work
         if self._stage() != "work":
             return
         self.ctx.progress["Conductor"]["work_turns"] += 1
-        turns = self.ctx.progress["Conductor"]["work_turns"]
+        self._advance("expert_answer")
+
+    def on_motivation_update(self, ev: Event):
+        if ev.source != "motivator":
+            return          # повторная рассылка прежнего снимка (рестарт этапа) — не новая оценка
+        level = (ev.payload.get("last") or {}).get("level")
+        if level is not None:
+            self.ctx.progress["Conductor"].note_motivation(level)
 
-        # условие перехода к рефлексии
-        if turns >= self.min_work_turns:
-            # попросим Motivator задать вопрос рефлексии (или сами предложим)
-            self.bus.publish(Event(type="ask_reflection", source="conductor",
-                                   payload={"reason": "enough_work_turns", "turns": turns}))
-            self._set_stage("reflection")
+    def on_organizer_update(self, ev: Event):
+        tasks = (ev.payload.get("organizer") or {}).get("tasks")
+        if isinstance(tasks, list):
+            ids = [t.get("id") for t in tasks if isinstance(t, dict)]
+            self.ctx.progress["Conductor"].note_tasks(ids)
 
     def on_ask_reflection(self, ev: Event):
         # просто логируем: вопрос рефлексии предложен (его покажет UI/Expert)
         asked = self.ctx.progress.setdefault("Reflection", {}).setdefault("asked", [])
-        asked.append({"ts": time.time(), "reason": ev.payload.get("reason"), "turns": ev.payload.get("turns")})
+        asked.append({"ts": wall_time(), "reason": ev.payload.get("reason"), "turns": ev.payload.get("turns")})
 
     def _proxy_reflection(self, ev: Event):
         """Если где-то опубликовано student_reflection → нормализуем в reflection_answer"""
@@ -145,30 +227,49 @@ class Conductor:
             return
         # сохраняем ответ и переходим к итогам
         reflect = self.ctx.progress.setdefault("Reflection", {})
-        reflect.setdefault("answers", []).append({"ts": time.time(), "text": ev.payload.get("text", "")})
-        self._set_stage("wrapup")
-        self._finish()
+        reflect.setdefault("answers", []).append({"ts": wall_time(), "text": ev.payload.get("text", "")})
+        self._advance("reflection_answer")
 
     # ── подведение итогов
-    def _finish(self):
-        # собираем лёгкий итог
-        expert_hist = self.ctx.progress.get("Expert", {}).get("dialog_history", [])
-        organizer = self.ctx.progress.get("Organizer", {})
-        motivator = self.ctx.progress.get("Motivator", {}).get("last", {})
-
-        summary = {
-            "topic": self.ctx.topic,
-            "answers_count": len(expert_hist),
-            "work_turns": self.ctx.progress["Conductor"]["work_turns"],
-            "tasks_available": bool(organizer.get("tasks")),
-            "motivation_level": self.ctx.progress.get("Motivator", {}).get("level", None),
-            "style": motivator.get("style"),
-        }
+    def lesson_summary(self) -> Dict[str, Any]:
+        """Итоги на текущий момент — из агрегатов ConductorState, O(1) (годится и для дашборда)."""
+        motivator = self.ctx.progress.get("Motivator", {})
+        summary = {"topic": self.ctx.topic, **self.ctx.progress["Conductor"].lesson_summary(wall_time())}
+        if summary["motivation_level"] is None:
+            summary["motivation_level"] = motivator.get("level", None)
+        summary["style"] = (motivator.get("last") or {}).get("style")
+        return summary
+
+    def _summarize(self, out: list):
+        summary = self.lesson_summary()
         self.ctx.progress["Conductor"]["summary"] = summary
+        # публикуем итоги (закрытие занятия — следующим шагом: wrapup → finished)
+        out.append(Event(type="lesson_finished", source="conductor", payload={"summary": summary}))
+
+    def _finish(self):
+        """Итоги и закрытие вне прохода (перезапуск стадии wrapup)."""
+        out: list = []
+        self._summarize(out)
+        self._set_stage("finished", out)
+        for ev in out:
+            self.bus.publish(ev)
+
+class Conductor(ConductorBase):
+    """Conductor на отдельной шине: свои ссылки на сервисы и подписки на CONDUCTOR_ROUTES."""
 
-        # публикуем итоги и закрываем занятие
-        self.bus.publish(Event(type="lesson_finished", source="conductor", payload={"summary": summary}))
-        self._set_stage("finished")
+    def __init__(self, context, bus, expert=None, organizer=None, motivator=None, min_work_turns:int=2):
+        self.ctx = context
+        self.bus = bus
+        self.expert = expert
+        self.organizer = organizer
+        self.motivator = motivator
+        self.min_work_turns = min_work_turns
+
+        self._init_slot()
+
+        # подписки
+        for event_type, method in CONDUCTOR_ROUTES:
+            bus.subscribe(event_type, getattr(self, method))
 
 # ── 2) Подключаем Conductor к уже существующему bus
 conductor = Conductor(
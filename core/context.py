@@ -1,4 +1,5 @@
 # core/context.py
+from core.state import SessionProgress
 
 class Context:
     def __init__(self, 
@@ -20,7 +21,7 @@ class Context:
         self.task_id = task_id
         self.input_type = input_type  # например, "pdf", "image", "url", "docx", "text"
         self.data = data  # путь к файлу или URL
-        self.progress = {}  # словарь с результатами от модулей
+        self.progress = SessionProgress()  # результаты модулей; Expert/Motivator/… — типизированные слоты
 
     def update_progress(self, module_name: str, result: dict):
         """Обновляет прогресс работы одного из модулей."""
@@ -38,5 +39,5 @@ class Context:
             "task_id": self.task_id,
             "input_type": self.input_type,
             "data": self.data,
-            "progress": self.progress,
+            "progress": self.progress.to_dict(),
         }
\ No newline at end of file
@@ -0,0 +1,75 @@
+# core/dedup.py
+
+# ============================================
+# 🧩 Sprint 9.4 — Почти-дубли вопросов в рамках сессии (MinHash)
+# ============================================
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import re
+import zlib
+
+SHINGLE_N = 3            # символьные n-граммы
+NUM_PERM = 32            # длина MinHash-сигнатуры
+RECENT_TURNS = 8         # сколько последних вопросов помним
+DUP_THRESHOLD = 0.8      # оценка Жаккара, выше которой считаем вопрос повтором
+
+_MERSENNE = (1 << 61) - 1
+# детерминированные коэффициенты (одинаковые во всех процессах)
+_PERMS = tuple(((i * 0x9E3779B1 + 0x7F4A7C15) % _MERSENNE | 1,
+                (i * 0x85EBCA77 + 0xC2B2AE3D) % _MERSENNE) for i in range(1, NUM_PERM + 1))
+_CLEAN_RE = re.compile(r"[^\w\s]+")
+_WS_RE = re.compile(r"\s+")
+
+
+def shingles(text: str, n: int = SHINGLE_N) -> set:
+    t = _WS_RE.sub(" ", _CLEAN_RE.sub(" ", (text or "").lower())).strip()
+    t = f" {t} "
+    if len(t) <= n:
+        return {t}
+    return {t[i:i + n] for i in range(len(t) - n + 1)}
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS)
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Оценка коэффициента Жаккара по доле совпавших позиций сигнатуры."""
+    same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return same / NUM_PERM
+
+
+class NearDuplicateDetector:
+    """
+    Держит сигнатуры последних N вопросов сессии вместе с результатом поиска
+    ({"base", "sources", "question"}). lookup() возвращает прошлый результат,
+    если новый вопрос похож сильнее порога.
+    """
+
+    def __init__(self, turns: int = RECENT_TURNS, threshold: float = DUP_THRESHOLD):
+        self.threshold = threshold
+        self.recent: Deque[Tuple[Tuple[int, ...], Dict[str, Any]]] = deque(maxlen=turns)
+
+    def lookup(self, text: str) -> Tuple[Tuple[int, ...], Optional[Dict[str, Any]], float]:
+        sig = minhash(text)
+        best, best_sim = None, 0.0
+        # от свежих к старым: при равенстве берём последний
+        for prev_sig, rec in reversed(self.recent):
+            sim = similarity(sig, prev_sig)
+            if sim > best_sim:
+                best, best_sim = rec, sim
+        if best_sim >= self.threshold:
+            return sig, best, best_sim
+        return sig, None, best_sim
+
+    def remember(self, sig: Tuple[int, ...], rec: Dict[str, Any]):
+        self.recent.append((sig, rec))
+
+
+def get_session_detector(context) -> NearDuplicateDetector:
+    ex = context.progress.setdefault("Expert", {})
+    det = ex.get("dedup")
+    if det is None:
+        det = ex["dedup"] = NearDuplicateDetector()
+    return det
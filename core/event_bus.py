@@ -4,24 +4,457 @@
 # 🧪 Sprint 7.1 — EventBus / Dispatcher + тест
 # ============================================
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple
+import asyncio
+import inspect
+import sys
+import threading
 import time
 import uuid
 
+from core.journal import EventJournal, JournalReader, replay_session
+from core.tracing import Tracer, handler_name
+from core.transport import EventForwarder, EventReceiver, TransportLink
+from core.session_store import SessionStore
+from core.timers import ACTIVITY_EVENTS, InactivityScheduler
+
 # ---------- 1) Структура события ----------
 
-@dataclass
+# интернированные типы событий: один объект str на тип → сравнение/хэш в словаре подписок без копий
+class EventTypes:
+    INIT = sys.intern("init")
+    GOALS_READY = sys.intern("goals_ready")
+    TASKS_READY = sys.intern("tasks_ready")
+    STUDENT_QUESTION = sys.intern("student_question")
+    EXPERT_ANSWER = sys.intern("expert_answer")
+    MOTIVATION_UPDATE = sys.intern("motivation_update")
+    ORGANIZER_UPDATE = sys.intern("organizer_update")
+    ASK_REFLECTION = sys.intern("ask_reflection")
+    STUDENT_REFLECTION = sys.intern("student_reflection")
+    REFLECTION_ANSWER = sys.intern("reflection_answer")
+    STAGE_CHANGED = sys.intern("stage_changed")
+    LESSON_FINISHED = sys.intern("lesson_finished")
+    RESTART = sys.intern("restart")
+    TTS_DONE = sys.intern("tts_done")
+    TTS_FAILED = sys.intern("tts_failed")
+    INACTIVITY = sys.intern("inactivity")
+    TIMEOUT = sys.intern("timeout")
+    ERROR = sys.intern("error")
+
+# часы событий: monotonic_ns при создании; «стенное» время — от общего якоря, по запросу
+_WALL_ANCHOR = time.time()
+_MONO_ANCHOR = time.monotonic_ns()
+
+def mono_to_wall(mono_ns: int) -> float:
+    return _WALL_ANCHOR + (mono_ns - _MONO_ANCHOR) / 1e9
+
 class Event:
-    type: str                    # тип: 'student_question', 'expert_answer', ...
-    payload: Dict[str, Any]      # полезная нагрузка (данные)
-    source: str = "system"       # откуда пришло (student, expert, motivator, fsm, system)
-    ts: float = None             # timestamp
+    """
+    Событие шины: __slots__ вместо __dict__, тип интернирован, время — time.monotonic_ns().
+    ts (unix-время) и payload_keys вычисляются только когда их читают (лог, журнал, печать).
+    """
+    __slots__ = ("type", "payload", "source", "mono_ns", "_ts", "trace_id", "parent_id", "id", "origin")
+
+    def __init__(self, type: str, payload: Dict[str, Any], source: str = "system", ts: Optional[float] = None,
+                 trace_id: Optional[int] = None, parent_id: Optional[int] = None, id: Optional[int] = None,
+                 origin: Optional[str] = None, mono_ns: Optional[int] = None):
+        self.type = sys.intern(type)   # тип: 'student_question', 'expert_answer', ...
+        self.payload = payload         # полезная нагрузка (данные)
+        self.source = source           # откуда пришло (student, expert, motivator, fsm, system)
+        self.mono_ns = time.monotonic_ns() if mono_ns is None else mono_ns
+        self._ts = ts                  # явный timestamp (реплей журнала) или None → из mono_ns
+        # трассировка (проставляет Tracer; 0 — цепочка не семплирована)
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.id = id
+        # узел-источник для событий из другого процесса (None — событие локальное)
+        self.origin = origin
+
+    @property
+    def ts(self) -> float:
+        if self._ts is None:
+            self._ts = mono_to_wall(self.mono_ns)
+        return self._ts
+
+    @ts.setter
+    def ts(self, value: float):
+        self._ts = value
+
+    @property
+    def payload_keys(self) -> List[str]:
+        return list(self.payload)
+
+    def age_ms(self) -> float:
+        """Сколько событие ждёт с момента создания (монотонные часы)."""
+        return (time.monotonic_ns() - self.mono_ns) / 1e6
 
-    def __post_init__(self):
-        if self.ts is None:
-            self.ts = time.time()
     def __repr__(self):
-        return f"Event(type={self.type!r}, source={self.source!r}, ts={int(self.ts)}, payload_keys={list(self.payload.keys())})"
+        return f"Event(type={self.type!r}, source={self.source!r}, ts={int(self.ts)}, payload_keys={self.payload_keys})"
+
+# ---------- 1a) Кольцевой лог событий ----------
+
+# интернированные строки (типы/источники событий) → компактные int-id
+_STR_IDS: Dict[str, int] = {}
+_STR_NAMES: List[str] = []
+
+def intern_id(name: str) -> int:
+    sid = _STR_IDS.get(name)
+    if sid is None:
+        sid = _STR_IDS[name] = len(_STR_NAMES)
+        _STR_NAMES.append(name)
+    return sid
+
+class EventLog:
+    """
+    Лог фиксированной ёмкости (кольцевой буфер): запись — O(1) без копирования списка.
+    Запись хранится компактно: (type_id, source_id, ts, mono_ns, ключи payload). Сам payload
+    лог не держит (его могут менять после публикации); unix-время записи события шины
+    вычисляется из mono_ns только при чтении.
+    Снаружи выглядит как список словарей {"ts","type","source","payload_keys"}:
+    поддерживает len(), итерацию, индексы и срезы (log[-8:]) — как раньше.
+    """
+    __slots__ = ("capacity", "_buf", "_head", "_len")
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self._buf: List[Optional[tuple]] = [None] * capacity
+        self._head = 0      # куда писать следующую запись
+        self._len = 0
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], capacity: int = 200) -> 'EventLog':
+        log = cls(capacity)
+        for rec in records[-capacity:]:
+            log.append(rec.get("ts"), rec.get("type"), rec.get("source"), rec.get("payload_keys", ()))
+        return log
+
+    def append(self, ts: Optional[float], type_: str, source: str, payload, mono_ns: int = 0):
+        """ts=None — время вычислится из mono_ns при чтении записи."""
+        self._buf[self._head] = (intern_id(type_), intern_id(source), ts, mono_ns, tuple(payload))
+        self._head = (self._head + 1) % self.capacity
+        if self._len < self.capacity:
+            self._len += 1
+
+    def append_event(self, event: 'Event'):
+        # _ts задан только у реплея журнала / явного времени — иначе не считаем его сейчас
+        self.append(event._ts, event.type, event.source, event.payload, event.mono_ns)
+
+    def raw(self) -> List[tuple]:
+        """Компактные записи от старых к новым."""
+        if self._len < self.capacity:
+            return self._buf[:self._len]
+        return self._buf[self._head:] + self._buf[:self._head]
+
+    @staticmethod
+    def _as_dict(raw: tuple) -> Dict[str, Any]:
+        type_id, source_id, ts, mono_ns, keys = raw
+        return {"ts": mono_to_wall(mono_ns) if ts is None else ts,
+                "type": _STR_NAMES[type_id], "source": _STR_NAMES[source_id],
+                "payload_keys": list(keys)}
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        return (self._as_dict(r) for r in self.raw())
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._as_dict(r) for r in self.raw()[idx]]
+        return self._as_dict(self.raw()[idx])
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def clear(self):
+        self._buf = [None] * self.capacity
+        self._head = 0
+        self._len = 0
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [self._as_dict(r) for r in self.raw()]
+
+# ---------- 1b) Очереди подписчиков с ограничением и пул для «медленных» ----------
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest", "coalesce")
+
+@dataclass
+class QueueSpec:
+    """
+    Ограниченная очередь подписчика.
+      - block:       издатель ждёт места (не дольше block_timeout), затем событие отбрасывается;
+      - drop_oldest: вытесняется самое старое событие;
+      - drop_newest: отбрасывается новое событие;
+      - coalesce:    событие с тем же key(event) заменяет ожидающее в очереди,
+                     иначе при переполнении — как drop_oldest.
+    Ёмкость и политика — на подписчика, а порядок — общий для сессии (лента в
+    SessionSerialExecutor): задачи разных подписчиков одной сессии идут в порядке
+    публикации. Схлопнутое событие занимает место заменённого; при drop_oldest
+    новое встаёт в конец ленты.
+    """
+    capacity: int = 64
+    policy: str = "drop_oldest"
+    key: Optional[Callable[[Event], Any]] = None
+    block_timeout: float = 1.0
+
+    def __post_init__(self):
+        if self.policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения: {self.policy}")
+
+class BoundedQueue:
+    """Потокобезопасная очередь фиксированной ёмкости со счётчиками глубины и потерь."""
+    __slots__ = ("spec", "_items", "_cond", "stats")
+
+    def __init__(self, spec: QueueSpec):
+        self.spec = spec
+        self._items: deque = deque()     # элементы: (coalesce_key, item)
+        self._cond = threading.Condition()
+        self.stats = {"enqueued": 0, "dropped_oldest": 0, "dropped_newest": 0,
+                      "coalesced": 0, "blocked": 0, "max_depth": 0}
+
+    def put(self, item: Any, event: Optional[Event] = None) -> bool:
+        spec = self.spec
+        with self._cond:
+            if spec.policy == "block" and len(self._items) >= spec.capacity:
+                self.stats["blocked"] += 1
+                self._cond.wait_for(lambda: len(self._items) < spec.capacity, timeout=spec.block_timeout)
+            return self.offer(item, event) != "dropped"
+
+    def offer(self, item: Any, event: Optional[Event] = None) -> str:
+        """Положить без ожидания: "added" / "coalesced" / "replaced_oldest" / "dropped"."""
+        spec, items, stats = self.spec, self._items, self.stats
+        with self._cond:
+            if spec.policy == "coalesce":
+                k = spec.key(event) if spec.key else (event.type if event is not None else None)
+                for i, (qk, _) in enumerate(items):
+                    if qk == k:
+                        items[i] = (k, item)
+                        stats["coalesced"] += 1
+                        return "coalesced"
+            else:
+                k = None
+            outcome = "added"
+            if len(items) >= spec.capacity:
+                if spec.policy in ("block", "drop_newest"):
+                    stats["dropped_newest"] += 1
+                    return "dropped"
+                # drop_oldest / coalesce без совпадения
+                items.popleft()
+                stats["dropped_oldest"] += 1
+                outcome = "replaced_oldest"
+            items.append((k, item))
+            stats["enqueued"] += 1
+            if len(items) > stats["max_depth"]:
+                stats["max_depth"] = len(items)
+            return outcome
+
+    def get(self) -> Any:
+        with self._cond:
+            if not self._items:
+                return None
+            _, item = self._items.popleft()
+            self._cond.notify()
+            return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"depth": len(self._items), "capacity": self.spec.capacity,
+                "policy": self.spec.policy, **self.stats}
+
+class _Lane:
+    """Лента одной сессии: порядок задач всех её подписчиков + их ограниченные очереди."""
+    __slots__ = ("order", "queues")
+
+    def __init__(self):
+        self.order: deque = deque()                     # ключи подписчиков в порядке публикации
+        self.queues: Dict[Any, BoundedQueue] = {}       # (сессия, подписчик) → очередь
+
+class SessionSerialExecutor:
+    """
+    Общий пул потоков для блокирующих обработчиков (TTS, запись на диск…).
+    Ключ задачи — (сессия, подписчик, …): у каждого подписчика своя ограниченная очередь
+    (политика QueueSpec вместо роста памяти), а у сессии — одна лента, по которой задачи
+    всех её подписчиков выполняются строго в порядке публикации; разные сессии — параллельно.
+    Воркер отдаёт поток после batch задач, поэтому одна сессия не занимает пул целиком.
+    Опустевшая лента удаляется вместе с очередями, их счётчики копятся в totals
+    (по имени подписчика), так что завершённые сессии не держат память.
+    """
+
+    def __init__(self, max_workers: int = 4, batch: int = 8):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bus-blocking")
+        self._batch = batch
+        self._cond = threading.Condition()
+        self._lanes: Dict[Any, _Lane] = {}
+        self._active: set = set()       # сессии, у которых сейчас есть воркер
+        self.errors = 0         # задачи, упавшие с исключением (лента при этом продолжает работу)
+        self.totals: Dict[Any, Dict[str, int]] = {}
+
+    def _queue(self, key: Any, spec: Optional[QueueSpec]) -> Tuple[_Lane, BoundedQueue]:
+        lane = self._lanes.get(_key_session(key))
+        if lane is None:
+            lane = self._lanes[_key_session(key)] = _Lane()
+        q = lane.queues.get(key)
+        if q is None:
+            q = lane.queues[key] = BoundedQueue(spec or QueueSpec())
+        return lane, q
+
+    def submit(self, key: Any, fn: Callable, *args, spec: Optional[QueueSpec] = None,
+               event: Optional[Event] = None) -> bool:
+        session = _key_session(key)
+        with self._cond:
+            lane, q = self._queue(key, spec)
+            qspec = q.spec
+            if qspec.policy == "block" and len(q) >= qspec.capacity:
+                # место освобождает _drain (notify после каждой задачи); пока ждём, лента
+                # могла опустеть и уйти — берём её заново
+                q.stats["blocked"] += 1
+                self._cond.wait_for(lambda: len(q) < qspec.capacity, timeout=qspec.block_timeout)
+                lane, q = self._queue(key, spec)
+            outcome = q.offer((fn, args), event)
+            if outcome == "added":
+                lane.order.append(key)
+            elif outcome == "replaced_oldest":
+                lane.order.remove(key)          # место вытесненной задачи подписчика
+                lane.order.append(key)
+            if outcome == "dropped":
+                if session not in self._active and not lane.order:
+                    self._retire(session)
+                return False
+            if session in self._active:
+                return True
+            self._active.add(session)
+        self._pool.submit(self._drain, session)
+        return True
+
+    def _drain(self, session: Any):
+        handed_off = False      # сессия снята с активных или передана следующему _drain
+        try:
+            for _ in range(self._batch):
+                with self._cond:
+                    lane = self._lanes[session]
+                    task = None
+                    while task is None and lane.order:
+                        task = lane.queues[lane.order.popleft()].get()
+                    if task is None:
+                        # под тем же замком, что и submit(): задача не потеряется
+                        self._retire(session)
+                        self._active.discard(session)
+                        self._cond.notify_all()
+                        handed_off = True
+                        return
+                    self._cond.notify_all()     # место в очереди для policy=block
+                fn, args = task
+                try:
+                    fn(*args)
+                except Exception as e:
+                    # упавшая задача не должна оставить сессию «активной» без воркера
+                    self.errors += 1
+                    print(f"⚠️ Блокирующая задача сессии {session!r} упала: {e!r}")
+            # batch исчерпан — уступаем поток другим сессиям
+            self._pool.submit(self._drain, session)
+            handed_off = True
+        finally:
+            if not handed_off:
+                with self._cond:
+                    self._active.discard(session)
+                    self._cond.notify_all()
+
+    def _retire(self, session: Any):
+        """Убрать пустую ленту (под self._cond); счётчики очередей — в totals."""
+        lane = self._lanes.pop(session, None)
+        if lane is None:
+            return
+        for key, q in lane.queues.items():
+            name = key[1] if isinstance(key, tuple) and len(key) > 1 else key
+            agg = self.totals.setdefault(name, {})
+            for stat, value in q.stats.items():
+                agg[stat] = max(agg.get(stat, 0), value) if stat == "max_depth" else agg.get(stat, 0) + value
+
+    def wait_idle(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Дождаться, пока лента сессии (или все) опустеет."""
+        def _idle():
+            return not self._active if session_id is None else session_id not in self._active
+        with self._cond:
+            return self._cond.wait_for(_idle, timeout=timeout)
+
+    def queue_stats(self, session_id: Optional[str] = None) -> Dict[Any, Dict[str, Any]]:
+        """Очереди с незавершёнными задачами (опустевшие уже учтены в totals)."""
+        with self._cond:
+            return {k: q.snapshot() for sid, lane in self._lanes.items()
+                    if session_id is None or sid == session_id for k, q in lane.queues.items()}
+
+    def forget(self, session_id: str):
+        """Убрать ленту завершённой сессии, если в ней ничего не ждёт."""
+        with self._cond:
+            lane = self._lanes.get(session_id)
+            if lane is not None and session_id not in self._active and not lane.order:
+                self._retire(session_id)
+
+def _key_session(key: Any) -> Any:
+    return key[0] if isinstance(key, tuple) else key
+
+# один пул на процесс
+BLOCKING_EXECUTOR = SessionSerialExecutor()
+
+class _BlockingHandler:
+    """Обёртка подписчика: вызов уходит в BLOCKING_EXECUTOR — очередь (сессия, подписчик) на ленте сессии."""
+    __slots__ = ("handler", "bus", "spec", "key")
+
+    def __init__(self, handler: Callable[[Event], None], bus: 'EventBus', spec: Optional[QueueSpec] = None):
+        self.handler = handler
+        self.bus = bus
+        self.spec = spec or QueueSpec()
+        self.key = (bus.session_id, handler_name(handler), id(handler))
+
+    def __call__(self, event: Event):
+        self.bus.executor.submit(self.key, self._run, event, spec=self.spec, event=event)
+
+    def _run(self, event: Event):
+        bus = self.bus
+        tls = bus._tls
+        tls.depth = getattr(tls, "depth", 0) + 1
+        tracer = bus.tracer
+        if tracer is not None:
+            # current ставим и для несемплированных: потомки наследуют решение
+            prev, tls.current = getattr(tls, "current", None), event
+            t0 = time.perf_counter_ns()
+        try:
+            self.handler(event)
+        except Exception as e:
+            bus._log_error(e, event)
+        finally:
+            tls.depth -= 1
+            if tracer is not None:
+                if event.trace_id:
+                    tracer.span(handler_name(self.handler), event, t0, time.perf_counter_ns())
+                tls.current = prev
+
+# ---------- 1c) Схлопывание частых событий ----------
+
+@dataclass
+class CoalescePolicy:
+    """
+    Политика схлопывания для подписчиков, помеченных coalesce=True:
+      - mode="last":   первое событие в окне доставляется сразу, остальные схлопываются
+                       в одно последнее, которое доставляется по окончании окна;
+      - mode="dedupe": в пределах окна событие с уже виденным key(event) отбрасывается.
+    Остальные подписчики того же типа получают каждое событие как обычно.
+    """
+    mode: str = "last"
+    window_sec: float = 0.5
+    key: Optional[Callable[[Event], Any]] = None
+
+class _CoalesceState:
+    __slots__ = ("window_start", "pending", "seen")
+
+    def __init__(self):
+        self.window_start = float("-inf")
+        self.pending: Optional[Event] = None
+        self.seen: set = set()
 
 # ---------- 2) Шина событий ----------
 
@@ -29,91 +462,440 @@ class EventBus:
     def __init__(self, context: Context):
         self.context = context
         self._subs: Dict[str, List[Callable[[Event], None]]] = {}
-        # простой лог в контексте
+        # простой лог в контексте: кольцевой буфер на 200 записей
         context.progress.setdefault("EventBus", {})
-        context.progress["EventBus"].setdefault("log", [])
+        log = context.progress["EventBus"].get("log")
+        if not isinstance(log, EventLog):
+            log = context.progress["EventBus"]["log"] = EventLog.from_records(log or [])
+        self._events: EventLog = log
         context.progress["EventBus"].setdefault("id", str(uuid.uuid4()))
+        # ключ упорядочивания блокирующих обработчиков
+        self.session_id = context.progress["EventBus"]["id"]
+        self.executor = BLOCKING_EXECUTOR
+        # журнал (EventJournal) — подключается attach_journal(); глубина диспетчеризации
+        # по потокам нужна, чтобы отличать «корневые» события от порождённых обработчиками
+        self.journal = None
+        self._tls = threading.local()
+        # трассировка обработчиков (Tracer) — None = выключено, без накладных расходов
+        self.tracer = None
+        # хранилище сессий (SessionStore) — захват грязных слотов после каскада событий
+        self.store = None
+        # схлопывание: тип события -> политика / подписчики / состояние окна
+        self._coalesce: Dict[str, CoalescePolicy] = {}
+        self._coalesced_subs: Dict[str, List[Callable[[Event], None]]] = {}
+        self._coalesce_state: Dict[str, _CoalesceState] = {}
+        self._coalesce_pending = 0
+        self.coalesce_stats = {"delivered": 0, "merged": 0, "deduped": 0}
 
-    def subscribe(self, event_type: str, handler: Callable[[Event], None]):
-        """Подписка обработчика на тип события."""
-        self._subs.setdefault(event_type, []).append(handler)
+    def subscribe(self, event_type: str, handler: Callable[[Event], None], blocking: bool = False,
+                  coalesce: bool = False, queue: Optional[QueueSpec] = None):
+        """
+        Подписка обработчика на тип события.
+        blocking=True — обработчик медленный (синтез речи, диск): выполняется в пуле
+        потоков, не задерживая остальных подписчиков; порядок в пределах сессии сохраняется.
+        queue=QueueSpec(...) — ограниченная очередь подписчика с политикой переполнения
+        (подразумевает blocking=True).
+        coalesce=True — обработчик получает события по политике set_coalescing(event_type, ...)
+        (пересчёт по пачке событий вместо пересчёта на каждое).
+        """
+        if blocking or queue is not None:
+            handler = _BlockingHandler(handler, self, queue)
+        if coalesce:
+            self._coalesced_subs.setdefault(event_type, []).append(handler)
+            self._coalesce_state.setdefault(event_type, _CoalesceState())
+            self._coalesce.setdefault(event_type, CoalescePolicy())
+        else:
+            self._subs.setdefault(event_type, []).append(handler)
+
+    def set_coalescing(self, event_type: str, policy: Optional[CoalescePolicy]):
+        """Задать политику схлопывания для типа события (None — доставлять каждое)."""
+        if policy is None:
+            self._coalesce[event_type] = CoalescePolicy(window_sec=0.0)
+        else:
+            self._coalesce[event_type] = policy
+        self._coalesce_state.setdefault(event_type, _CoalesceState())
+
+    def attach_journal(self, journal: 'EventJournal'):
+        """Писать все события шины в append-only журнал (запись без fsync на каждое событие)."""
+        self.journal = journal
+
+    def attach_transport(self, channel, event_types, node: str, batch_size: int = 64,
+                         flush_interval: float = 0.0) -> 'TransportLink':
+        """
+        Связать шину с другим процессом: события event_types уходят в channel пачками,
+        всё пришедшее из channel публикуется здесь (с event.origin, без эха обратно).
+        channel — SocketChannel или multiprocessing.Pipe() Connection.
+        """
+        forwarder = EventForwarder(channel, node, batch_size=batch_size, flush_interval=flush_interval)
+        for event_type in event_types:
+            self.subscribe(event_type, forwarder)
+        receiver = EventReceiver(channel, self.publish, Event, name=f"receive-{node}")
+        return TransportLink(channel, forwarder, receiver)
+
+    def attach_store(self, store: 'SessionStore'):
+        """Сохранять слоты контекста в SessionStore (запись — в фоне, пачками)."""
+        self.store = store
+        store.capture(self.session_id, self.context)
+
+    def attach_timers(self, scheduler: InactivityScheduler):
+        """
+        Простой сессии → события inactivity/timeout на эту шину (см. core/timers.py).
+        Активность — события ACTIVITY_EVENTS. Срабатывания публикуются из потока, который
+        вызывает scheduler.advance(): для синхронной шины — тот же поток, что и publish.
+        """
+        sid = self.session_id
+
+        def _sink(session_id: str, event_type: str, idle_sec: float):
+            self.publish(Event(type=event_type, source="scheduler",
+                               payload={"idle_sec": round(idle_sec, 1)}))
+
+        def _touch(ev: Event):
+            scheduler.touch(sid, _sink)
+
+        for event_type in ACTIVITY_EVENTS:
+            self.subscribe(event_type, _touch)
+        scheduler.touch(sid, _sink)
+
+    def wait_blocking(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться завершения блокирующих обработчиков этой сессии."""
+        return self.executor.wait_idle(self.session_id, timeout=timeout)
+
+    def queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Глубина очередей и потери по подписчикам этой сессии (пока в них есть задачи)."""
+        return {name: st for (_, name, _), st in self.executor.queue_stats(self.session_id).items()}
 
     def publish(self, event: Event):
         """Публикация события всем подписчикам + логирование."""
+        # отложенные «хвосты» схлопнутых окон
+        if self._coalesce_pending:
+            self.flush_coalesced()
         # лог
         self._log(event)
         # диспетчеризация
+        self._dispatch(event)
+
+    def _dispatch(self, event: Event):
+        tls = self._tls
+        tls.depth = getattr(tls, "depth", 0) + 1
+        try:
+            if self.tracer is not None:
+                self._dispatch_traced(event)
+            else:
+                for handler in self._subs.get(event.type, []):
+                    try:
+                        handler(event)
+                    except Exception as e:
+                        self._log_error(e, event)
+            if event.type in self._coalesced_subs:
+                self._coalesce_event(event)
+        finally:
+            tls.depth -= 1
+        if not tls.depth and self.store is not None:
+            # каскад корневого события завершён — отдаём изменившиеся слоты хранилищу
+            self.store.capture(self.session_id, self.context)
+
+    # --- схлопывание
+    def _coalesce_event(self, event: Event):
+        policy = self._coalesce[event.type]
+        st = self._coalesce_state[event.type]
+        now = time.monotonic()
+        if now - st.window_start >= policy.window_sec:
+            # окно истекло: сначала хвост прошлого окна, затем новое окно с этим событием
+            if st.pending is not None:
+                self._deliver_pending(event.type, st)
+            st.window_start = now
+            st.seen.clear()
+            if policy.mode == "dedupe":
+                st.seen.add(policy.key(event) if policy.key else event.type)
+            self._deliver_coalesced(event)
+            return
+        if policy.mode == "dedupe":
+            k = policy.key(event) if policy.key else event.type
+            if k in st.seen:
+                self.coalesce_stats["deduped"] += 1
+                return
+            st.seen.add(k)
+            self._deliver_coalesced(event)
+            return
+        # mode == "last": храним только последнее событие окна
+        if st.pending is None:
+            self._coalesce_pending += 1
+            self._schedule_flush(policy.window_sec - (now - st.window_start))
+        else:
+            self.coalesce_stats["merged"] += 1
+        st.pending = event
+
+    def _deliver_pending(self, event_type: str, st: _CoalesceState):
+        event, st.pending = st.pending, None
+        self._coalesce_pending -= 1
+        st.window_start = time.monotonic()
+        self._deliver_coalesced(event)
+        if not getattr(self._tls, "depth", 0) and self.store is not None:
+            # хвост дожат вне каскада (flush_coalesced/таймер) — изменения слотов тоже в хранилище
+            self.store.capture(self.session_id, self.context)
+
+    def _deliver_coalesced(self, event: Event):
+        # событие уже в журнале как часть своего каскада; хвост окна доставляется позже,
+        # но всё, что опубликуют его обработчики, — производное, а не новый корень
+        # (иначе реплей корней применил бы его второй раз)
+        self.coalesce_stats["delivered"] += 1
+        tls = self._tls
+        tls.depth = getattr(tls, "depth", 0) + 1
+        try:
+            for handler in self._coalesced_subs.get(event.type, []):
+                try:
+                    res = handler(event)
+                    if inspect.isawaitable(res):
+                        asyncio.ensure_future(res)
+                except Exception as e:
+                    self._log_error(e, event)
+        finally:
+            tls.depth -= 1
+
+    def _schedule_flush(self, delay: float):
+        """
+        Синхронная шина таймеров не держит: хвост уйдёт при следующем publish или
+        flush_coalesced(). Поэтому в build_event_bus схлопывание включается явно
+        (coalesce_window), а вызывающий сам дожимает хвост в конце пачки.
+        """
+        return None
+
+    def flush_coalesced(self, force: bool = False):
+        """Доставить отложенные схлопнутые события, чьё окно истекло (force — все сразу)."""
+        now = time.monotonic()
+        for event_type, st in self._coalesce_state.items():
+            if st.pending is None:
+                continue
+            if force or now - st.window_start >= self._coalesce[event_type].window_sec:
+                self._deliver_pending(event_type, st)
+
+    def _dispatch_traced(self, event: Event):
+        tls, tracer, perf = self._tls, self.tracer, time.perf_counter_ns
+        # current — и для несемплированного события: его потомки наследуют решение
+        prev, tls.current = getattr(tls, "current", None), event
+        sampled = bool(event.trace_id)
+        try:
+            for handler in self._subs.get(event.type, []):
+                t0 = perf()
+                try:
+                    handler(event)
+                except Exception as e:
+                    self._log_error(e, event)
+                if sampled:
+                    tracer.span(handler_name(handler), event, t0, perf())
+        finally:
+            tls.current = prev
+
+    def enable_tracing(self, tracer: Optional['Tracer'] = None, sample_rate: float = 1.0) -> 'Tracer':
+        self.tracer = tracer or Tracer(sample_rate=sample_rate)
+        return self.tracer
+
+    def _log_error(self, e: Exception, event: Event):
+        self._log(Event(
+            type=EventTypes.ERROR,
+            source="eventbus",
+            payload={"reason": str(e), "during": event.type}
+        ))
+
+    def _log(self, event: Event):
+        if self.tracer is not None and event.trace_id is None:
+            self.tracer.assign(event, getattr(self._tls, "current", None))
+        self._events.append_event(event)
+        if self.journal is not None:
+            self.journal.append(self.session_id, event, root=not getattr(self._tls, "depth", 0))
+
+# ---------- 2a) Асинхронная шина: очередь вместо рекурсии ----------
+
+class AsyncEventBus(EventBus):
+    """
+    publish() только кладёт событие в asyncio.Queue и сразу возвращается;
+    диспетчер (run/drain) разбирает очередь по порядку. Обработчики могут быть
+    корутинами. Вложенные publish из обработчиков тоже попадают в очередь,
+    поэтому глубина стека не растёт с длиной каскада
+    (student_question → expert_answer → motivation_update/tts_done …).
+    """
+
+    def __init__(self, context: Context, loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__(context)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._loop = loop                     # цикл, в котором крутится run()
+        self._own_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def publish(self, event: Event):
+        if self._coalesce_pending:
+            self.flush_coalesced()
+        self._log(event)
+        loop = self._loop
+        if loop is not None and loop.is_running() and not _in_loop_thread(loop):
+            # публикация из чужого потока (например, TTS-воркер)
+            loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        else:
+            self._queue.put_nowait(event)
+
+    async def _dispatch_async(self, event: Event):
+        tls = self._tls
+        tracer = self.tracer
+        sampled = tracer is not None and bool(event.trace_id)
         for handler in self._subs.get(event.type, []):
             try:
-                handler(event)
+                # depth/current держим только на синхронной части вызова: между await
+                # в этом потоке могут выполняться другие задачи цикла
+                tls.depth = getattr(tls, "depth", 0) + 1
+                if tracer is not None:
+                    prev, tls.current = getattr(tls, "current", None), event
+                    t0 = time.perf_counter_ns()
+                try:
+                    res = handler(event)
+                finally:
+                    tls.depth -= 1
+                    if tracer is not None:
+                        tls.current = prev
+                if inspect.isawaitable(res):
+                    await res
+                if sampled:
+                    tracer.span(handler_name(handler), event, t0, time.perf_counter_ns())
             except Exception as e:
-                self._log(Event(
-                    type="error",
-                    source="eventbus",
-                    payload={"reason": str(e), "during": event.type}
-                ))
+                self._log_error(e, event)
+        if event.type in self._coalesced_subs:
+            self._coalesce_event(event)
+        if self.store is not None and self._queue.empty():
+            self.store.capture(self.session_id, self.context)
 
-    def _log(self, event: Event):
-        rec = {
-            "ts": event.ts,
-            "type": event.type,
-            "source": event.source,
-            "payload_keys": list(event.payload.keys())
-        }
-        log = self.context.progress["EventBus"]["log"]
-        log.append(rec)
-        self.context.progress["EventBus"]["log"] = log[-200:]  # обрезаем длинный лог
+    async def run(self):
+        """Бесконечный диспетчер: запускать как задачу в цикле приложения."""
+        self._loop = asyncio.get_running_loop()
+        while True:
+            event = await self._queue.get()
+            try:
+                await self._dispatch_async(event)
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> asyncio.Task:
+        """Запустить диспетчер в текущем (работающем) цикле."""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self.run())
+        return self._dispatcher
+
+    async def drain(self):
+        """Разобрать очередь до пустоты (включая события, порождённые по ходу)."""
+        while not self._queue.empty():
+            event = self._queue.get_nowait()
+            try:
+                await self._dispatch_async(event)
+            finally:
+                self._queue.task_done()
+
+    def _schedule_flush(self, delay: float):
+        # в работающем цикле хвост окна доставится таймером
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.call_later, max(0.0, delay), self.flush_coalesced)
+
+    def run_until_idle(self):
+        """Синхронный хелпер для сценариев/тестов без собственного цикла."""
+        if self._own_loop is None:
+            self._own_loop = asyncio.new_event_loop()
+        self._own_loop.run_until_complete(self.drain())
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+def _in_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+# ---------- 2b) Реплей журнала в свежую шину ----------
+
+def replay_journal(reader: 'JournalReader', session_id: str, bus: EventBus, roots_only: bool = True) -> int:
+    """Восстановить живое занятие: проиграть корневые события сессии из журнала."""
+    return replay_session(reader, session_id, bus, make_event=Event, roots_only=roots_only)
 
 # ---------- 3) Адаптеры под наши модули ----------
+# handle_* — сама логика (без замыканий, годится для общих таблиц маршрутов BusHost);
+# make_*_handler — прежние фабрики подписчиков для отдельной шины.
 
-def make_student_question_handler(expert: 'Expert', bus: EventBus):
+def handle_student_question(expert: 'Expert', bus: EventBus, ev: Event):
     """student_question → Expert.respond → publish(expert_answer)"""
+    q_text = ev.payload.get("text", "").strip()
+    if not q_text:
+        return
+    # ответ эксперта: бюджет задержки минус время ожидания события в очереди
+    waited_ms = max(0.0, ev.age_ms())
+    budget_ms = latency_budget_ms(bus.context) - waited_ms
+    answer = expert.respond(q_text, bus.context, budget_ms=budget_ms)
+    # публикуем событие ответа эксперта
+    bus.publish(Event(
+        type=EventTypes.EXPERT_ANSWER,
+        source="expert",
+        payload={"question": q_text, "answer": answer}
+    ))
+
+def handle_expert_answer_motivation(motivator: Optional['Motivator'], bus: EventBus, ev: Event):
+    """expert_answer → Motivator.observe (если есть) → publish(motivation_update)"""
+    if motivator is None:
+        return
+    ans = ev.payload.get("answer", {})
+    q   = ev.payload.get("question", "")
+    # пусть Motivator использует событие как "student_question"
+    mot = motivator.observe(event="student_question", context=bus.context,
+                            question=q, answer=ans)
+    # публикуем событие с обновлением мотивации/стиля
+    bus.publish(Event(
+        type=EventTypes.MOTIVATION_UPDATE,
+        source="motivator",
+        payload={"last": mot}
+    ))
+
+def handle_inactivity_motivation(motivator: Optional['Motivator'], bus: EventBus, ev: Event):
+    """inactivity/timeout (core/timers.py) → Motivator.observe → publish(motivation_update)"""
+    if motivator is None:
+        return
+    mot = motivator.observe(event=ev.type, context=bus.context)
+    bus.publish(Event(
+        type=EventTypes.MOTIVATION_UPDATE,
+        source="motivator",
+        payload={"last": mot, "idle_sec": ev.payload.get("idle_sec")}
+    ))
+
+def handle_expert_answer_organizer(organizer: Optional['Organizer'], bus: EventBus, ev: Event):
+    """(опционально) expert_answer → Organizer.process → publish(organizer_update)"""
+    if organizer is None:
+        return
+    # при каждом содержательном ответе можем убедиться, что задания сгенерированы
+    org_data = organizer.process(bus.context)
+    bus.publish(Event(
+        type=EventTypes.ORGANIZER_UPDATE,
+        source="organizer",
+        payload={"organizer": org_data}
+    ))
+
+def make_student_question_handler(expert: 'Expert', bus: EventBus):
     def _handler(ev: Event):
-        q_text = ev.payload.get("text", "").strip()
-        if not q_text:
-            return
-        # ответ эксперта
-        answer = expert.respond(q_text, bus.context)
-        # публикуем событие ответа эксперта
-        bus.publish(Event(
-            type="expert_answer",
-            source="expert",
-            payload={"question": q_text, "answer": answer}
-        ))
+        handle_student_question(expert, bus, ev)
     return _handler
 
 def make_expert_answer_handler_motivation(motivator: Optional['Motivator'], bus: EventBus):
-    """expert_answer → Motivator.observe (если есть) → publish(motivation_update)"""
     def _handler(ev: Event):
-        if motivator is None:
-            return
-        ans = ev.payload.get("answer", {})
-        q   = ev.payload.get("question", "")
-        # пусть Motivator использует событие как "student_question"
-        mot = motivator.observe(event="student_question", context=bus.context,
-                                question=q, answer=ans)
-        # публикуем событие с обновлением мотивации/стиля
-        bus.publish(Event(
-            type="motivation_update",
-            source="motivator",
-            payload={"last": mot}
-        ))
+        handle_expert_answer_motivation(motivator, bus, ev)
+    return _handler
+
+def make_inactivity_handler_motivation(motivator: Optional['Motivator'], bus: EventBus):
+    def _handler(ev: Event):
+        handle_inactivity_motivation(motivator, bus, ev)
     return _handler
 
 def make_expert_answer_handler_organizer(organizer: Optional['Organizer'], bus: EventBus):
-    """(опционально) expert_answer → Organizer.process → publish(organizer_update)"""
     def _handler(ev: Event):
-        if organizer is None:
-            return
-        # при каждом содержательном ответе можем убедиться, что задания сгенерированы
-        org_data = organizer.process(bus.context)
-        bus.publish(Event(
-            type="organizer_update",
-            source="organizer",
-            payload={"organizer": org_data}
-        ))
+        handle_expert_answer_organizer(organizer, bus, ev)
     return _handler
 
+def log_event(ev: Event):
+    print(f"🪵 [LOG] {ev.type} <- {ev.source} :: keys={ev.payload_keys}")
+
 # ---------- 4) Вспомогательный адаптер FSM → Bus (необязательно) ----------
 def attach_fsm_bus_adapter(fsm: 'TeachingFSM', bus: EventBus):
     """
@@ -131,26 +913,87 @@ def attach_fsm_bus_adapter(fsm: 'TeachingFSM', bus: EventBus):
     return fsm
 
 # ---------- 5) Сборка bus + подписки ----------
+LOGGED_EVENT_TYPES = (EventTypes.STUDENT_QUESTION, EventTypes.EXPERT_ANSWER, EventTypes.MOTIVATION_UPDATE,
+                      EventTypes.ORGANIZER_UPDATE, EventTypes.INACTIVITY, EventTypes.TIMEOUT, EventTypes.ERROR)
+
 def build_event_bus(context: Context,
                     expert: Optional['Expert']=None,
                     motivator: Optional['Motivator']=None,
-                    organizer: Optional['Organizer']=None) -> EventBus:
-    bus = EventBus(context)
+                    organizer: Optional['Organizer']=None,
+                    asynchronous: bool = False,
+                    coalesce_window: Optional[float] = None,
+                    question_queue: Optional[QueueSpec] = None) -> EventBus:
+    bus = AsyncEventBus(context) if asynchronous else EventBus(context)
+    # coalesce_window (сек) — пачка ответов подряд → один пересчёт Motivator/Organizer
+    # (последний ответ в окне). По умолчанию выключено: синхронная шина доставляет хвост
+    # окна только при следующем publish/flush_coalesced(), AsyncEventBus — по таймеру цикла.
+    coalesce = bool(coalesce_window)
+    if coalesce:
+        bus.set_coalescing("expert_answer", CoalescePolicy(mode="last", window_sec=coalesce_window))
     # маршруты:
     if expert:
-        bus.subscribe("student_question", make_student_question_handler(expert, bus))
+        # question_queue: например QueueSpec(capacity=4, policy="coalesce") — защита от «залипшего» клиента
+        bus.subscribe("student_question", make_student_question_handler(expert, bus), queue=question_queue)
     if motivator:
-        bus.subscribe("expert_answer", make_expert_answer_handler_motivation(motivator, bus))
+        bus.subscribe("expert_answer", make_expert_answer_handler_motivation(motivator, bus), coalesce=coalesce)
+        # простой (события планировщика, см. EventBus.attach_timers) → пересчёт мотивации
+        bus.subscribe(EventTypes.INACTIVITY, make_inactivity_handler_motivation(motivator, bus))
+        bus.subscribe(EventTypes.TIMEOUT, make_inactivity_handler_motivation(motivator, bus))
     if organizer:
-        bus.subscribe("expert_answer", make_expert_answer_handler_organizer(organizer, bus))
-    # можно логировать всё базово
-    def _logger(ev: Event):
-        print(f"🪵 [LOG] {ev.type} <- {ev.source} :: keys={list(ev.payload.keys())}")
+        bus.subscribe("expert_answer", make_expert_answer_handler_organizer(organizer, bus), coalesce=coalesce)
     # подпишем логер на основные события
-    for et in ["student_question", "expert_answer", "motivation_update", "organizer_update", "error"]:
-        bus.subscribe(et, _logger)
+    for et in LOGGED_EVENT_TYPES:
+        bus.subscribe(et, log_event)
     return bus
 
+# ---------- 5a) Микробенчмарк publish: прежний dataclass-Event против slotted ----------
+def benchmark_publish(n: int = 20000) -> Dict[str, Dict[str, float]]:
+    """
+    Время и память на одно событие для прежнего Event (dataclass + time.time() + ключи
+    payload при логировании) и текущего slotted Event. Шина — без подписчиков и журнала,
+    т.е. меряется именно стоимость события и записи в лог.
+    """
+    import tracemalloc
+    from types import SimpleNamespace
+
+    @dataclass
+    class _LegacyEvent:
+        type: str
+        payload: Dict[str, Any]
+        source: str = "system"
+        ts: float = None
+        trace_id: Optional[int] = None
+        parent_id: Optional[int] = None
+        id: Optional[int] = None
+        origin: Optional[str] = None
+
+        def __post_init__(self):
+            if self.ts is None:
+                self.ts = time.time()
+
+    class _LegacyLog(EventLog):
+        # прежняя запись в лог: unix-время события, посчитанное при создании
+        def append_event(self, event):
+            self.append(event.ts, event.type, event.source, event.payload)
+
+    out = {}
+    for label, make, log_cls in (("legacy", _LegacyEvent, _LegacyLog), ("slotted", Event, EventLog)):
+        bus = EventBus(SimpleNamespace(progress={}))
+        bus._events = log_cls(bus._events.capacity)
+        payload = {"text": "q", "n": 1}
+        # память: сколько байт держит одно живое событие
+        tracemalloc.start()
+        keep = [make(type="student_question", payload=payload) for _ in range(1000)]
+        mem, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del keep
+        t0 = time.perf_counter_ns()
+        for _ in range(n):
+            bus.publish(make(type="student_question", payload=payload))
+        dt = time.perf_counter_ns() - t0
+        out[label] = {"ns_per_publish": dt / n, "bytes_per_event": mem / 1000}
+    return out
+
 # ---------- 6) Мини‑проверка (самодостаточный сценарий) ----------
 # Предполагается, что у вас уже созданы kb / expert / motivator / organizer / ctx / fsm ранее.
 # Если нет — раскомментируйте следующие строки-рычаги для простого стенда:
@@ -169,6 +1012,9 @@ bus = build_event_bus(context=ctx, expert=expert, motivator=motivator, organizer
 # добавь TTS:
 tts = attach_tts_to_bus(bus, engine="piper")   # или "rhvoice"
 
+# предвыборка KB/TTS под задания (tasks_ready → фоново греем кэши)
+prefetcher = attach_prefetcher(bus, expert, tts)
+
 # (опционально) подключаем адаптер к FSM, чтобы можно было посылать в шину
 if 'fsm' in globals():
     attach_fsm_bus_adapter(fsm, bus)
\ No newline at end of file
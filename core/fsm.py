@@ -1,127 +1,168 @@
 # core/fsm.py
 
+# ============================================
+# 🧭 Sprint 11.6 — TeachingFSM: таблица переходов (state, event) → guard/action
+# Требуется: Context, Cartographer, Motivator; tuner (RelationalTuner) — если есть
+# ============================================
+from typing import Any, Callable, Dict, Optional, Tuple
+import time
+
+ANY_STATE = "*"   # переход из любого состояния (если для пары нет своего)
+
+# ── 1) Действия: обычные функции (fsm, data), без замыканий на экземпляр
+def _act_init(fsm: 'TeachingFSM', data: Any = None):
+    result = Cartographer().process(fsm.context)
+    fsm.context.update_progress("Cartographer", result)
+
+def _act_question(fsm: 'TeachingFSM', data: Any = None):
+    if not fsm.expert:
+        print("⚠️ Expert не подключен")
+        return None
+    answer = fsm.expert.respond(data, fsm.context)
+    # печать: учтём сброс диалога
+    if isinstance(answer, dict) and answer.get("status") == "dialog_cleared":
+        print("🗑 Память эксперта очищена.\n")
+        return answer
+    tuner = globals().get("tuner")
+    if tuner is None:
+        print(f"\n💬 Expert ответил:\n{answer['answer']}\n")
+        return answer
+    # эмпатическая вставка; последний эмпатичный ответ сохраняем в прогресс
+    enriched = tuner.embellish(answer, fsm.context, user_text=data)
+    fsm.context.progress.setdefault("RelationalTuner", {})["last"] = enriched["empathy"]
+    print(f"\n💬 Expert ответил (empathy):\n{enriched['answer_empathic']}\n")
+    return answer
+
+def _act_autostart(fsm: 'TeachingFSM', data: Any = None):
+    # вопрос в самом начале: сначала инициализация, затем ответ — без повторного входа в handle_event
+    _act_init(fsm, data)
+    return _act_question(fsm, data)
+
+def _act_motivation(fsm: 'TeachingFSM', data: Any = None):
+    motivator = fsm.motivator or Motivator()
+    result = motivator.process(fsm.context)
+    fsm.context.update_progress("Motivator", result)
+    return result
+
+def _act_reflection(fsm: 'TeachingFSM', data: Any = None):
+    # ожидаем, что data — это текст ответа студента
+    text = data if isinstance(data, str) else ""
+    out = fsm.motivator.record_reflection_answer(fsm.context, text)
+    print(f"📝 Рефлексия записана: {text}")
+    return out
+
+def _act_end(fsm: 'TeachingFSM', data: Any = None):
+    tuner = globals().get("tuner")
+    if tuner is None:
+        print("🎓 Занятие завершено.")
+        return None
+    # при завершении — мягкая «end»-реплика
+    end_stub = {"question": "завершение", "answer": "До встречи на следующем занятии!"}
+    enriched = tuner.embellish(end_stub, fsm.context, user_text="конец сессии", tone_override="warm", position="outro")
+    print("🎓 Занятие завершено.\n" + enriched["answer_empathic"])
+    return None
+
+def _has_motivator(fsm: 'TeachingFSM', data: Any = None) -> bool:
+    return fsm.motivator is not None
+
+def _act_no_motivator(fsm: 'TeachingFSM', data: Any = None):
+    return {"status": "error", "reason": "motivator_not_attached"}
+
+# ── 2) Декларативная таблица: (состояния, события, куда, guard, action)
+# target=None — остаёмся в текущем состоянии; для одной пары кандидаты проверяются по порядку
+TRANSITIONS: Tuple[Tuple[Tuple[str, ...], Tuple[str, ...], Optional[str], Optional[Callable], Callable], ...] = (
+    (("start",), ("student_question",), "expertise", None, _act_autostart),
+    (("start",), ("init",), "goals", None, _act_init),
+    (("goals", "task", "expertise"), ("student_question",), "expertise", None, _act_question),
+    (("expertise",), ("timeout", "inactivity"), "motivation", None, _act_motivation),
+    ((ANY_STATE,), ("student_reflection",), None, _has_motivator, _act_reflection),
+    ((ANY_STATE,), ("student_reflection",), None, None, _act_no_motivator),
+    ((ANY_STATE,), ("end",), "finish", None, _act_end),
+)
+
+class Transition:
+    __slots__ = ("source", "event", "target", "guard", "action")
+
+    def __init__(self, source: str, event: str, target: Optional[str],
+                 guard: Optional[Callable], action: Callable):
+        self.source = source
+        self.event = event
+        self.target = target
+        self.guard = guard
+        self.action = action
+
+def compile_transitions(transitions=TRANSITIONS) -> Tuple[Dict[Tuple[str, str], Tuple[Transition, ...]],
+                                                            Dict[str, Tuple[Transition, ...]]]:
+    """
+    Один раз превращаем таблицу в словари: (state, event) → кандидаты и
+    event → кандидаты из любого состояния (ANY_STATE).
+    """
+    table: Dict[Tuple[str, str], list] = {}
+    wildcard: Dict[str, list] = {}
+    for states, events, target, guard, action in transitions:
+        for event in events:
+            for state in states:
+                tr = Transition(state, event, target, guard, action)
+                if state == ANY_STATE:
+                    wildcard.setdefault(event, []).append(tr)
+                else:
+                    table.setdefault((state, event), []).append(tr)
+    return ({k: tuple(v) for k, v in table.items()},
+            {k: tuple(v) for k, v in wildcard.items()})
+
+TRANSITION_TABLE, WILDCARD_TABLE = compile_transitions()
+
+# ── 3) Автомат
 class TeachingFSM:
-    def __init__(self, context: Context, expert: 'Expert' = None):
+    """
+    Состояния занятия: start → goals → expertise ⇄ motivation → finish.
+    handle_event — один поиск в словаре по (state, event) (или по event для «*»),
+    затем guard/action кандидата. Для каждого перехода считаются число срабатываний
+    и время действия: transition_stats()[(from, event, to)] = {count, total_ms, max_ms}.
+    """
+
+    def __init__(self, context: Context, expert: 'Expert' = None, motivator: 'Motivator' = None,
+                 table=None, wildcard=None):
         self.context = context
         self.state = "start"
         self.expert = expert
-
-    def handle_event(self, event: str, data: str = None):
+        self.motivator = motivator
+        self.table = TRANSITION_TABLE if table is None else table
+        self.wildcard = WILDCARD_TABLE if wildcard is None else wildcard
+        # (from, event, to) → [count, total_ns, max_ns]
+        self.metrics: Dict[Tuple[str, str, str], list] = {}
+
+    def _lookup(self, event: str, data: Any) -> Optional[Transition]:
+        candidates = self.table.get((self.state, event)) or self.wildcard.get(event, ())
+        for tr in candidates:
+            if tr.guard is None or tr.guard(self, data):
+                return tr
+        return None
+
+    def handle_event(self, event: str, data: Any = None):
         print(f"\n📍 Событие: {event}, текущее состояние: {self.state}")
-
-        # --- автозапуск: если студент задаёт вопрос в самом начале
-        if self.state == "start" and event == "student_question":
-            # сначала инициализируем занятие
-            self.handle_event("init")
-            # и повторяем вопрос уже в новом состоянии
-            return self.handle_event("student_question", data)
-
-        if self.state == "start" and event == "init":
-            self.state = "goals"
-            result = Cartographer().process(self.context)
-            self.context.update_progress("Cartographer", result)
-            return
-
-        elif self.state in ["goals", "task", "expertise"] and event == "student_question":
-            self.state = "expertise"
-            if self.expert:
-                answer = self.expert.respond(data, self.context)
-                # печать — с учётом сброса
-                if isinstance(answer, dict) and answer.get("status") == "dialog_cleared":
-                    print("🗑 Память эксперта очищена.\n")
-                else:
-                    print(f"\n💬 Expert ответил:\n{answer['answer']}\n")
-            else:
-                print("⚠️ Expert не подключен")
-            return
-
-        elif self.state == "expertise" and event in ["timeout", "inactivity"]:
-            self.state = "motivation"
-            result = Motivator().process(self.context)
-            self.context.update_progress("Motivator", result)
-            return
-        
-        #####
-        elif event == "student_reflection":
-            answer_text = kwargs.get("text", "")
-            return self.motivator.record_reflection_answer(context, answer_text)
-        #####        
-
-        elif event == "end":
-            self.state = "finish"
-            print("🎓 Занятие завершено.")
-            return
-
-        else:
+        tr = self._lookup(event, data)
+        if tr is None:
             print("⚠️ Событие не распознано или переход невозможен.")
-
-# Патчим FSM так, чтобы после Expert.answer прогонять через тюнер
-# (если FSM уже определён — переопределим только handle_event; при необходимости верни старую версию)
-old_TeachingFSM = TeachingFSM
-
-class TeachingFSM(old_TeachingFSM):
-    def handle_event(self, event: str, data: str = None):
-        print(f"\n📍 Событие: {event}, текущее состояние: {self.state}")
-
-        # автозапуск
-        if self.state == "start" and event == "student_question":
-            self.handle_event("init")
-            return self.handle_event("student_question", data)
-
-        if self.state == "start" and event == "init":
-            self.state = "goals"
-            result = Cartographer().process(self.context)
-            self.context.update_progress("Cartographer", result)
-            return
-
-        elif self.state in ["goals", "task", "expertise"] and event == "student_question":
-            self.state = "expertise"
-            if self.expert:
-                answer = self.expert.respond(data, self.context)
-
-                # печать: учтём сброс диалога
-                if isinstance(answer, dict) and answer.get("status") == "dialog_cleared":
-                    print("🗑 Память эксперта очищена.\n")
-                    return
-
-                # эмпатическая вставка
-                enriched = tuner.embellish(answer, self.context, user_text=data)
-                # сохраним последний эмпатичный ответ (по желанию)
-                self.context.progress.setdefault("RelationalTuner", {})
-                self.context.progress["RelationalTuner"]["last"] = enriched["empathy"]
-
-                print(f"\n💬 Expert ответил (empathy):\n{enriched['answer_empathic']}\n")
-            else:
-                print("⚠️ Expert не подключен")
-            return
-
-        elif self.state == "expertise" and event in ["timeout", "inactivity"]:
-            self.state = "motivation"
-            result = Motivator().process(self.context)
-            self.context.update_progress("Motivator", result)
-            return
-        
-        #####
-        elif event == "student_reflection":
-            # ожидаем, что data — это текст ответа студента
-            text = data if isinstance(data, str) else ""
-            if hasattr(self, "motivator") and self.motivator:
-                out = self.motivator.record_reflection_answer(ctx, text)
-                print(f"📝 Рефлексия записана: {text}")
-                return out
+            return None
+        source = self.state
+        target = tr.target or source
+        # состояние меняем до действия (как раньше): действие видит уже новое состояние
+        self.state = target
+        t0 = time.perf_counter_ns()
+        try:
+            return tr.action(self, data)
+        finally:
+            dt = time.perf_counter_ns() - t0
+            m = self.metrics.get((source, event, target))
+            if m is None:
+                self.metrics[(source, event, target)] = [1, dt, dt]
             else:
-                return {"status": "error", "reason": "motivator_not_attached"}
-        #####
-        
-
-        elif event == "end":
-            self.state = "finish"
-            # при завершении — мягкая «end»-реплика
-            end_stub = {"question": "завершение", "answer": "До встречи на следующем занятии!"}
-            enriched = tuner.embellish(end_stub, self.context, user_text="конец сессии", tone_override="warm", position="outro")
-            print("🎓 Занятие завершено.\n" + enriched["answer_empathic"])
-            return
-
-        else:
-            print("⚠️ Событие не распознано или переход невозможен.")
-            return
\ No newline at end of file
+                m[0] += 1
+                m[1] += dt
+                if dt > m[2]:
+                    m[2] = dt
+
+    def transition_stats(self) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+        return {key: {"count": c, "total_ms": total / 1e6, "max_ms": mx / 1e6}
+                for key, (c, total, mx) in self.metrics.items()}
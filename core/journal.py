@@ -0,0 +1,180 @@
+# core/journal.py
+
+# ============================================
+# 💾 Sprint 10.1 — Журнал событий (append-only) + реплей
+# ============================================
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import os
+import struct
+import threading
+import zlib
+
+from core.records import decode_record, encode_record
+
+# кадр: <длина:uint32><crc32:uint32><тело>; тело — компактный JSON (utf-8)
+_HEADER = struct.Struct("<II")
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".log"
+
+
+class EventJournal:
+    """
+    Журнал событий шины: append() только дописывает кадр в память (без системных вызовов),
+    фоновый поток раз в fsync_interval секунд пишет накопленное одним write + fsync
+    (group commit); буфер подменяется под замком, а write/fsync идут вне его — append()
+    на пути события не ждёт диска. Сегменты ротируются по размеру segment_bytes.
+    Последний сегмент после падения обрезается до последнего целого кадра: новые записи
+    не должны оказаться за оборванным кадром, на котором читатель останавливается.
+    """
+
+    def __init__(self, directory: str, fsync_interval: float = 0.05,
+                 segment_bytes: int = 8 * 1024 * 1024,
+                 encode: Callable[[Dict[str, Any]], bytes] = encode_record):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self._encode = encode
+        self._lock = threading.Lock()        # буфер кадров
+        self._io_lock = threading.Lock()     # файл сегмента: write/fsync/ротация
+        self._buf = bytearray()
+        self.stats = {"appended": 0, "commits": 0, "bytes": 0, "segments": 1, "truncated_bytes": 0}
+        self._seq = self._last_segment_seq()
+        self._truncate_torn_tail(self._segment_path(self._seq))
+        self._fh = open(self._segment_path(self._seq), "ab")
+        self._size = self._fh.tell()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="journal-flush", daemon=True)
+        self._flusher.start()
+
+    # --- сегменты
+    def _segment_path(self, seq: int) -> Path:
+        return self.dir / f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}"
+
+    def _last_segment_seq(self) -> int:
+        seqs = [int(p.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) for p in list_segments(self.dir)]
+        return max(seqs) if seqs else 0
+
+    def _truncate_torn_tail(self, path: Path):
+        if not path.exists():
+            return
+        data = path.read_bytes()
+        valid = _valid_length(data)
+        if valid < len(data):
+            with open(path, "r+b") as fh:
+                fh.truncate(valid)
+                os.fsync(fh.fileno())
+            self.stats["truncated_bytes"] += len(data) - valid
+
+    def _rotate(self):
+        self._fh.close()
+        self._seq += 1
+        self._fh = open(self._segment_path(self._seq), "ab")
+        self._size = 0
+        self.stats["segments"] += 1
+
+    # --- запись
+    def append(self, session_id: str, event, root: bool = True):
+        body = self._encode({
+            "sid": session_id, "type": event.type, "source": event.source,
+            "ts": event.ts, "root": root, "payload": event.payload,
+        })
+        frame = _HEADER.pack(len(body), zlib.crc32(body)) + body
+        with self._lock:
+            self._buf += frame
+            self.stats["appended"] += 1
+
+    def sync(self):
+        """Записать накопленное и сделать fsync (group commit)."""
+        with self._io_lock:
+            with self._lock:
+                if not self._buf:
+                    return
+                data, self._buf = self._buf, bytearray()
+            self._fh.write(data)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._size += len(data)
+            self.stats["commits"] += 1
+            self.stats["bytes"] += len(data)
+            if self._size >= self.segment_bytes:
+                self._rotate()
+
+    def _run(self):
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except Exception:
+                # диск недоступен — попробуем на следующем тике
+                pass
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join()
+        self.sync()
+        self._fh.close()
+
+
+def list_segments(directory) -> List[Path]:
+    return sorted(Path(directory).glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+
+
+def _frames(data: bytes) -> Iterator[tuple]:
+    """(конец кадра, тело) по порядку до первого недописанного/битого кадра."""
+    pos, end = 0, len(data)
+    while pos + _HEADER.size <= end:
+        length, crc = _HEADER.unpack_from(data, pos)
+        body = data[pos + _HEADER.size: pos + _HEADER.size + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            return
+        pos += _HEADER.size + length
+        yield pos, body
+
+
+def _valid_length(data: bytes) -> int:
+    valid = 0
+    for valid, _ in _frames(data):
+        pass
+    return valid
+
+
+class JournalReader:
+    """Чтение сегментов по порядку; оборванный/битый хвост (после падения) пропускается."""
+
+    def __init__(self, directory: str, decode: Callable[[bytes], Dict[str, Any]] = decode_record):
+        self.dir = Path(directory)
+        self._decode = decode
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for seg in list_segments(self.dir):
+            with open(seg, "rb") as fh:
+                data = fh.read()
+            # недописанный кадр — конец валидных данных сегмента
+            for _, body in _frames(data):
+                yield self._decode(body)
+
+    def session(self, session_id: str, roots_only: bool = False) -> Iterator[Dict[str, Any]]:
+        for rec in self:
+            if rec.get("sid") == session_id and (rec.get("root") or not roots_only):
+                yield rec
+
+    def sessions(self) -> List[str]:
+        seen: Dict[str, None] = {}
+        for rec in self:
+            seen.setdefault(rec.get("sid"), None)
+        return list(seen)
+
+
+def replay_session(reader: JournalReader, session_id: str, bus, make_event: Callable[..., Any],
+                   roots_only: bool = True) -> int:
+    """
+    Проиграть события сессии в свежую шину. По умолчанию только «корневые» события
+    (пришедшие извне: вопросы, init, restart…) — производные шина породит сама.
+    """
+    n = 0
+    for rec in reader.session(session_id, roots_only=roots_only):
+        bus.publish(make_event(type=rec["type"], payload=rec.get("payload") or {},
+                               source=rec.get("source", "system"), ts=rec.get("ts")))
+        n += 1
+    return n
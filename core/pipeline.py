@@ -0,0 +1,93 @@
+# core/pipeline.py
+
+# ============================================
+# 🧩 Sprint 9.1 — Явный конвейер стадий с таймингами
+# ============================================
+from typing import Callable, Dict, List, Any, Optional, Tuple
+import time
+
+# стадия получает общий «стейт» запроса и меняет его на месте
+StageFn = Callable[[Dict[str, Any]], None]
+
+
+class RespondPipeline:
+    """
+    Упорядоченный набор стадий. Каждая стадия регистрируется ОДИН раз по имени,
+    выполняется по порядку объявления и замеряется через perf_counter_ns.
+
+    Управляющие ключи стейта:
+      - st["stop"] = True      → прервать конвейер (например, сброс памяти)
+      - st["skip"] = {"stage"} → пропустить стадии (например, при попадании в кэш)
+      - st["result"]           → что вернуть вызывающему
+    """
+
+    def __init__(self, order: Tuple[str, ...]):
+        self.order = tuple(order)
+        self._stages: Dict[str, StageFn] = {}
+        self._plan: List[Tuple[str, StageFn]] = []
+        # агрегат: stage -> [count, total_ns, max_ns]
+        self.stats: Dict[str, List[int]] = {name: [0, 0, 0] for name in self.order}
+
+    def register(self, name: str, fn: StageFn) -> StageFn:
+        if name not in self.order:
+            raise ValueError(f"Неизвестная стадия: {name}")
+        if name in self._stages:
+            raise ValueError(f"Стадия уже зарегистрирована: {name}")
+        self._stages[name] = fn
+        # план пересобираем один раз при регистрации, а не на каждом вызове
+        self._plan = [(n, self._stages[n]) for n in self.order if n in self._stages]
+        return fn
+
+    def stage(self, name: str):
+        """Декоратор: @pipeline.stage("retrieve")"""
+        def _wrap(fn: StageFn) -> StageFn:
+            return self.register(name, fn)
+        return _wrap
+
+    def run(self, st: Dict[str, Any]) -> Any:
+        perf = time.perf_counter_ns
+        stats = self.stats
+        timings: Dict[str, int] = {}
+        st["timings_ns"] = timings
+        st.setdefault("skip", set())
+        t_start = perf()
+        for name, fn in self._plan:
+            if name in st["skip"]:
+                continue
+            t0 = perf()
+            fn(st)
+            dt = perf() - t0
+            timings[name] = dt
+            agg = stats[name]
+            agg[0] += 1
+            agg[1] += dt
+            if dt > agg[2]:
+                agg[2] = dt
+            if st.get("stop"):
+                break
+        timings["total"] = perf() - t_start
+        result = st.get("result")
+        if isinstance(result, dict):
+            result["timings_ns"] = timings
+        return result
+
+    def avg_ns(self, name: str) -> Optional[float]:
+        """Средняя длительность стадии (нс) или None, если данных ещё нет."""
+        count, total, _ = self.stats[name]
+        return (total / count) if count else None
+
+    def report(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Сводка по стадиям: сколько раз, среднее и максимум (мс)."""
+        out = {}
+        for name in self.order:
+            count, total, mx = self.stats[name]
+            out[name] = {
+                "count": count,
+                "avg_ms": (total / count / 1e6) if count else None,
+                "max_ms": mx / 1e6 if count else None,
+            }
+        return out
+
+    def reset_stats(self):
+        for agg in self.stats.values():
+            agg[0] = agg[1] = agg[2] = 0
@@ -0,0 +1,24 @@
+# core/records.py
+
+# ============================================
+# 🧾 Записи событий в JSON — общий формат журнала (core/journal.py) и транспорта (core/transport.py)
+# ============================================
+from collections.abc import Mapping
+from typing import Any, Dict
+import json
+
+
+def json_default(obj):
+    # типизированные слоты состояния (core/state.py) — как обычные словари, без рабочих полей
+    to_record = getattr(obj, "to_record", None)
+    if to_record is not None:
+        return to_record()
+    return dict(obj) if isinstance(obj, Mapping) else str(obj)
+
+
+def encode_record(rec: Dict[str, Any]) -> bytes:
+    return json.dumps(rec, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+def decode_record(body: bytes) -> Dict[str, Any]:
+    return json.loads(body.decode("utf-8"))
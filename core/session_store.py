@@ -0,0 +1,317 @@
+# core/session_store.py
+
+# ============================================
+# 🗄️ Sprint 11.3 — Хранилище сессий на SQLite (WAL): грязные слоты, пачки, ленивая загрузка
+# ============================================
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from core.codec import CONTEXT_FIELDS, decode_or_json, encode_json
+from core.context import Context
+from core.state import STATE_TYPES, ModuleState, SessionProgress, StateSnapshot
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    meta       TEXT NOT NULL,
+    updated    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slots (
+    session_id TEXT NOT NULL,
+    module     TEXT NOT NULL,
+    data       BLOB NOT NULL,
+    updated    REAL NOT NULL,
+    PRIMARY KEY (session_id, module)
+);
+CREATE TABLE IF NOT EXISTS history (
+    session_id TEXT NOT NULL,
+    module     TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    data       BLOB NOT NULL,
+    PRIMARY KEY (session_id, module, field, seq)
+);
+"""
+
+
+def _new_record() -> Dict[str, Any]:
+    return {"meta": None, "slots": {}, "hist": {}}
+
+
+def _merge_tail(hist: Dict[Tuple[str, str], list], key: Tuple[str, str], tail: list):
+    """Склеить хвосты истории одного поля: сброс заменяет накопленное, дописывание продолжает."""
+    prev = hist.get(key)
+    if prev is None or tail[0]:
+        hist[key] = [tail[0], tail[1], list(tail[2])]
+    else:
+        prev[2].extend(tail[2])
+
+
+class SessionStore:
+    """
+    Сессии в SQLite (WAL). Путь события ничего не пишет на диск:
+      - capture(session_id, context) после каскада событий берёт только изменившиеся
+        слоты — по версии ModuleState (её повышает и правка вложенных заданий/списков);
+        снимок слота — копирование при записи, O(число полей): поле копируется, только
+        если его тронут до записи на диск;
+      - поля APPEND_ONLY (история диалога) в слот не входят: пишется только новый хвост
+        отдельной строкой history, поэтому ход занятия стоит O(ответа), а не O(истории);
+      - фоновый поток раз в flush_interval кодирует и пишет накопленное одной транзакцией;
+        если транзакция не прошла, записи возвращаются в очередь, а учёт crc не меняется;
+      - load(session_id) поднимает Context при первом событии после рестарта.
+    Формат записи — json (encode_json); бинарный кодек (core/codec.py) подключается через
+    encode=codec.encode, чтение понимает оба формата (decode_or_json).
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.2,
+                 encode: Callable[[Any], bytes] = encode_json,
+                 decode: Callable[[bytes], Any] = decode_or_json):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._encode = encode
+        self._decode = decode
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # session_id -> {"meta": dict|None, "slots": {module: values},
+        #                "hist": {(module, field): [reset, start, items]}}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, Dict[str, int]] = {}     # последняя захваченная версия слота
+        self._crc: Dict[str, Dict[str, int]] = {}           # crc последней записи слота
+        # (module, field) -> (список, сколько его элементов уже в очереди/в базе)
+        self._hist_len: Dict[str, Dict[Tuple[str, str], Tuple[list, int]]] = {}
+        self._released: set = set()                         # выгружены из памяти: учёт снять после записи
+        self.stats = {"captures": 0, "slots_written": 0, "slots_skipped": 0, "history_chunks": 0,
+                      "commits": 0, "failed_flushes": 0, "loads": 0}
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="session-store-flush", daemon=True)
+        self._flusher.start()
+
+    # --- захват (поток событий): только ссылки, без кодирования и диска
+    def capture(self, session_id: str, context: Context):
+        versions = self._versions.get(session_id)
+        meta = None
+        if versions is None:
+            versions = self._versions[session_id] = {}
+            meta = {f: getattr(context, f, None) for f in CONTEXT_FIELDS}
+        hist_len = self._hist_len.setdefault(session_id, {})
+        dirty, tails = {}, {}
+        for name, slot in context.progress.items():
+            if isinstance(slot, ModuleState):
+                if versions.get(name) == slot._version:
+                    continue
+                dirty[name] = slot.snapshot(skip=slot.APPEND_ONLY + slot.TRANSIENT)
+                versions[name] = slot._version
+                for field in slot.APPEND_ONLY:
+                    tail = self._tail(hist_len, name, field, slot._raw(field) or [])
+                    if tail is not None:
+                        tails[(name, field)] = tail
+            elif isinstance(slot, dict):
+                dirty[name] = dict(slot)   # небольшие нетипизированные слоты; сверим crc при записи
+        if not dirty and not tails and meta is None:
+            return
+        with self._lock:
+            rec = self._pending.setdefault(session_id, _new_record())
+            if meta is not None:
+                rec["meta"] = meta
+            for name, values in dirty.items():
+                old = rec["slots"].get(name)
+                if isinstance(old, StateSnapshot):
+                    old.release()           # ещё не записан — вытесняется свежим снимком
+                rec["slots"][name] = values
+            for key, tail in tails.items():
+                _merge_tail(rec["hist"], key, tail)
+            self.stats["captures"] += 1
+
+    @staticmethod
+    def _tail(hist_len: Dict[Tuple[str, str], Tuple[list, int]], name: str, field: str, items: list):
+        """Новые элементы истории с прошлого захвата: [reset, start, items] или None."""
+        key = (name, field)
+        seen, written = hist_len.get(key, (None, 0))
+        n = len(items)
+        if seen is items and n == written:
+            return None
+        hist_len[key] = (items, n)
+        if (seen is not None and seen is not items) or n < written:
+            # список заменили или укоротили (сброс диалога) — переписываем поле целиком
+            return [True, 0, list(items)]
+        return [False, written, list(items[written:])]
+
+    def release(self, session_id: str, context: Context):
+        """Сессия уходит из памяти: последний захват, учёт версий снимется после записи."""
+        self.capture(session_id, context)
+        with self._lock:
+            self._released.add(session_id)
+
+    # --- запись (фоновый поток)
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            released, self._released = self._released, set()
+        if not pending:
+            self._drop(released)
+            return
+        now = time.time()
+        sessions, slots, resets, chunks = [], [], [], []
+        crcs: Dict[str, Dict[str, int]] = {}     # применим к self._crc только после COMMIT
+        for sid, rec in pending.items():
+            written = self._crc.get(sid, {})
+            if rec["meta"] is not None:
+                sessions.append((sid, json.dumps(rec["meta"], ensure_ascii=False, default=str), now))
+            for name, values in rec["slots"].items():
+                if isinstance(values, StateSnapshot):
+                    body = values.read(self._encode)
+                else:
+                    body = self._encode(values)
+                crc = zlib.crc32(body)
+                if written.get(name) == crc:
+                    self.stats["slots_skipped"] += 1
+                    continue
+                crcs.setdefault(sid, {})[name] = crc
+                slots.append((sid, name, body, now))
+            for (name, field), (reset, start, items) in rec["hist"].items():
+                if reset:
+                    resets.append((sid, name, field))
+                if items:
+                    chunks.append((sid, name, field, start, self._encode(items)))
+        try:
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT INTO sessions(session_id, meta, updated) VALUES (?, ?, ?) "
+                        "ON CONFLICT(session_id) DO UPDATE SET meta=excluded.meta, updated=excluded.updated",
+                        sessions)
+                    self._conn.executemany(
+                        "INSERT INTO slots(session_id, module, data, updated) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(session_id, module) DO UPDATE SET data=excluded.data, updated=excluded.updated",
+                        slots)
+                    self._conn.executemany(
+                        "DELETE FROM history WHERE session_id = ? AND module = ? AND field = ?", resets)
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO history(session_id, module, field, seq, data) VALUES (?, ?, ?, ?, ?)",
+                        chunks)
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except Exception:
+            self._requeue(pending, released)
+            self.stats["failed_flushes"] += 1
+            raise
+        for rec in pending.values():
+            for values in rec["slots"].values():
+                if isinstance(values, StateSnapshot):
+                    values.release()
+        for sid, names in crcs.items():
+            self._crc.setdefault(sid, {}).update(names)
+        self.stats["slots_written"] += len(slots)
+        self.stats["history_chunks"] += len(chunks)
+        self.stats["commits"] += 1
+        self._drop(released)
+
+    def _requeue(self, pending: Dict[str, Dict[str, Any]], released: set):
+        """Неудачная запись: вернуть записи в очередь (более свежие захваты — поверх)."""
+        with self._lock:
+            for sid, old in pending.items():
+                new = self._pending.get(sid)
+                if new is not None:
+                    for name, values in new["slots"].items():
+                        stale = old["slots"].get(name)
+                        if isinstance(stale, StateSnapshot):
+                            stale.release()
+                        old["slots"][name] = values
+                    if new["meta"] is not None:
+                        old["meta"] = new["meta"]
+                    for key, tail in new["hist"].items():
+                        _merge_tail(old["hist"], key, tail)
+                self._pending[sid] = old
+            self._released |= released
+
+    def _drop(self, released: set):
+        for sid in released:
+            self.forget(sid)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # диск занят/недоступен — попробуем на следующем тике
+                pass
+
+    # --- чтение
+    def load(self, session_id: str) -> Optional[Context]:
+        with self._db_lock:
+            row = self._conn.execute("SELECT meta FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            slot_rows = self._conn.execute(
+                "SELECT module, data FROM slots WHERE session_id = ?", (session_id,)).fetchall()
+            hist_rows = self._conn.execute(
+                "SELECT module, field, data FROM history WHERE session_id = ? ORDER BY module, field, seq",
+                (session_id,)).fetchall()
+        with self._lock:
+            self._released.discard(session_id)    # подняли снова до записи — учёт нужен
+        meta = json.loads(row[0])
+        context = Context(**{f: meta.get(f) for f in CONTEXT_FIELDS})
+        progress: SessionProgress = context.progress
+        versions = self._versions[session_id] = {}
+        written = self._crc[session_id] = {}
+        hist_len = self._hist_len[session_id] = {}
+        history: Dict[str, Dict[str, list]] = {}
+        for name, field, body in hist_rows:
+            history.setdefault(name, {}).setdefault(field, []).extend(self._decode(body))
+        for name, body in slot_rows:
+            data = self._decode(body)
+            if isinstance(data, dict) and name in history:
+                data.update(history[name])
+            cls = STATE_TYPES.get(name)
+            if cls is not None and isinstance(data, dict):
+                slot = cls.from_dict(data)
+                dict.__setitem__(progress, name, slot)
+                versions[name] = slot._version
+                for field in slot.APPEND_ONLY:
+                    items = slot._raw(field)
+                    if isinstance(items, list):
+                        hist_len[(name, field)] = (items, len(items))
+            else:
+                progress[name] = data
+            written[name] = zlib.crc32(body)
+        self.stats["loads"] += 1
+        return context
+
+    def sessions(self) -> List[str]:
+        with self._db_lock:
+            return [r[0] for r in self._conn.execute("SELECT session_id FROM sessions ORDER BY updated")]
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._pending.pop(session_id, None)
+        self.forget(session_id)
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM slots WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM history WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.execute("COMMIT")
+
+    def forget(self, session_id: str):
+        """Сбросить учёт версий сессии (после выгрузки из памяти)."""
+        self._versions.pop(session_id, None)
+        self._crc.pop(session_id, None)
+        self._hist_len.pop(session_id, None)
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
@@ -0,0 +1,200 @@
+# core/sessions.py
+
+# ============================================
+# 🗂️ Sprint 11.5 — Реестр сессий: student_id/task_id → Context, TTL и бюджет памяти
+# ============================================
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional
+import sys
+
+from core.clock import get_clock
+from core.context import Context
+from core.state import ModuleState
+
+# грубая оценка: контейнеры обходим, у остального берём getsizeof
+_SIZE_DEPTH = 6
+
+
+def approx_size(obj: Any, _depth: int = 0) -> int:
+    """Приблизительный размер объекта в байтах (без учёта общих строк и рабочих объектов)."""
+    size = sys.getsizeof(obj)
+    if _depth >= _SIZE_DEPTH:
+        return size
+    d = _depth + 1
+    if isinstance(obj, ModuleState):
+        for key in obj:
+            size += approx_size(obj._raw(key), d)
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            size += approx_size(k, d) + approx_size(v, d)
+    elif isinstance(obj, (list, tuple, deque, set, frozenset)):
+        for v in obj:
+            size += approx_size(v, d)
+    else:
+        raw = getattr(obj, "raw", None)    # EventLog (core/event_bus.py): кольцо компактных записей
+        if raw is not None and hasattr(obj, "capacity"):
+            size += approx_size(raw(), d)
+    return size
+
+
+def session_key(student_id: Optional[str], task_id: Optional[str] = None) -> str:
+    return f"{student_id or 'anon'}/{task_id or '-'}"
+
+
+class SessionEntry:
+    __slots__ = ("session_id", "context", "last_seen", "size", "size_stamp")
+
+    def __init__(self, session_id: str, context: Context, now: float):
+        self.session_id = session_id
+        self.context = context
+        self.last_seen = now
+        self.size = 0
+        self.size_stamp = None      # сумма версий слотов на момент последней оценки размера
+
+
+class SessionManager:
+    """
+    Владелец всех Context узла. Сессия ищется по (student_id, task_id):
+      - get_or_create — из памяти, иначе из SessionStore, иначе новый Context;
+      - touch — отметка активности, O(1) (OrderedDict в порядке последней активности);
+      - sweep — выгружает в хранилище сессии старше ttl, затем самые давние, пока
+        оценка памяти выше max_bytes. Размер пересчитывается только у сессий,
+        чьи слоты поменяли версию с прошлой оценки.
+    С host=BusHost сессии открываются/закрываются и в нём, а publish хоста
+    сам отмечает активность. Без хранилища выгрузка просто освобождает память.
+    clock — как у InactivityScheduler: часы процесса на момент создания, одни на всё время.
+    """
+
+    def __init__(self, store=None, ttl: float = 1800.0, max_bytes: int = 256 * 1024 * 1024,
+                 sweep_interval: float = 30.0, host=None,
+                 clock: Optional[Callable[[], float]] = None):
+        self.store = store
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.clock = clock = clock or get_clock().monotonic
+        self.host = None
+        self._entries: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = clock()
+        self.stats = {"created": 0, "loaded": 0, "evicted_ttl": 0, "evicted_memory": 0}
+        if host is not None:
+            self.attach_host(host)
+
+    def attach_host(self, host):
+        self.host = host
+        host.registry = self
+        if self.store is None:
+            self.store = host.store
+
+    # --- поиск / создание
+    def get_or_create(self, student_id: Optional[str] = None, task_id: Optional[str] = None,
+                      **meta) -> Context:
+        sid = session_key(student_id, task_id)
+        context = self.get(sid)
+        if context is None:
+            context = Context(student_id=student_id, task_id=task_id, **meta)
+            self._add(sid, context)
+            self.stats["created"] += 1
+        return context
+
+    def get(self, session_id: str) -> Optional[Context]:
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._touch(entry)
+            return entry.context
+        if self.store is None:
+            return None
+        context = self.store.load(session_id)
+        if context is not None:
+            self._add(session_id, context)
+            self.stats["loaded"] += 1
+        return context
+
+    def _add(self, session_id: str, context: Context):
+        entry = self._entries[session_id] = SessionEntry(session_id, context, self.clock())
+        self._measure(entry)
+        if self.host is not None:
+            self.host.open_session(context, session_id)
+        self.maybe_sweep()
+
+    # --- активность
+    def touch(self, session_id: str):
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._touch(entry)
+
+    def _touch(self, entry: SessionEntry):
+        entry.last_seen = self.clock()
+        self._entries.move_to_end(entry.session_id)
+
+    # --- выгрузка
+    def release(self, session_id: str) -> bool:
+        """Выгрузить сессию из памяти (состояние уходит в хранилище)."""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        if self.host is not None and session_id in self.host.sessions:
+            self.host.close_session(session_id)
+        elif self.store is not None:
+            self.store.release(session_id, entry.context)
+        return True
+
+    def maybe_sweep(self) -> int:
+        if self.clock() - self._last_sweep < self.sweep_interval:
+            return 0
+        return self.sweep()
+
+    def sweep(self) -> int:
+        # посреди каскада событий хоста не выгружаем: в очереди могут быть его сессии
+        if self.host is not None and self.host._dispatching:
+            return 0
+        now = self._last_sweep = self.clock()
+        evicted = 0
+        entries = self._entries
+        # 1) TTL: записи упорядочены по активности — смотрим только голову
+        while entries:
+            entry = next(iter(entries.values()))
+            if now - entry.last_seen < self.ttl:
+                break
+            self.release(entry.session_id)
+            self.stats["evicted_ttl"] += 1
+            evicted += 1
+        # 2) бюджет памяти: сначала освежаем оценки, потом выгружаем самые давние
+        for entry in entries.values():
+            self._measure(entry)
+        if self.max_bytes is not None:
+            while entries and self._bytes > self.max_bytes:
+                self.release(next(iter(entries)))
+                self.stats["evicted_memory"] += 1
+                evicted += 1
+        return evicted
+
+    def _measure(self, entry: SessionEntry):
+        progress = entry.context.progress
+        # дописывание в лог шины версию слота не меняет — длину лога учитываем отдельно
+        log = (progress.get("EventBus") or {}).get("log")
+        stamp = (len(progress), sum(s._version for s in progress.values() if isinstance(s, ModuleState)),
+                 len(log) if log is not None else 0)
+        if stamp == entry.size_stamp:
+            return
+        size = approx_size(progress)
+        self._bytes += size - entry.size
+        entry.size = size
+        entry.size_stamp = stamp
+
+    def close(self):
+        """Выгрузить все сессии (конец дня / остановка узла)."""
+        for sid in list(self._entries):
+            self.release(sid)
+
+    # --- сводка
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"sessions": len(self._entries), "approx_bytes": self._bytes, **self.stats}
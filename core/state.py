@@ -0,0 +1,594 @@
+# core/state.py
+
+# ============================================
+# 🧱 Sprint 11.1 — Типизированное состояние сессии (__slots__) + совместимый вид-словарь
+# ============================================
+from collections import deque
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import copy
+import threading
+import weakref
+from core.clock import wall_time
+
+_MISSING = object()
+
+EXPERT_LATENCY_WINDOW = 8   # окно средней задержки (как LAT_WINDOW_N)
+
+# неизменяемые значения снимок разделяет с живым слотом без всяких копий
+_IMMUTABLE = (str, int, float, bool, bytes, type(None))
+
+# копирование в снимки (запись в общее поле) и чтение снимка другим потоком не пересекаются
+_COW_LOCK = threading.Lock()
+
+
+class TrackedDict(dict):
+    """
+    dict внутри поля слота: любая запись (и во вложенные контейнеры) сначала сообщает
+    слоту — версия +1, а снимки, которые ещё делят это поле, получают свою копию.
+    Вложенные dict/list оборачиваются при вставке.
+    """
+    __slots__ = ("_state", "_field")
+
+    def __init__(self, state: 'ModuleState', field: str, data=()):
+        dict.__init__(self)
+        self._state = state
+        self._field = field
+        for key, value in dict(data).items():
+            dict.__setitem__(self, key, _track(value, state, field))
+
+    def _write(self):
+        self._state._will_write(self._field)
+
+    def __setitem__(self, key, value):
+        self._write()
+        dict.__setitem__(self, key, _track(value, self._state, self._field))
+
+    def __delitem__(self, key):
+        self._write()
+        dict.__delitem__(self, key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        self._write()
+        for key, value in dict(*args, **kwargs).items():
+            dict.__setitem__(self, key, _track(value, self._state, self._field))
+
+    def pop(self, *args):
+        self._write()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._write()
+        return dict.popitem(self)
+
+    def clear(self):
+        self._write()
+        dict.clear(self)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    # копии и сериализация — обычные словари, без ссылки на слот
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {copy.deepcopy(k, memo): copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce_ex__(self, protocol):
+        return dict, (dict(self),)
+
+
+class TrackedList(list):
+    """list внутри поля слота — см. TrackedDict."""
+    __slots__ = ("_state", "_field")
+
+    def __init__(self, state: 'ModuleState', field: str, data=()):
+        list.__init__(self, (_track(v, state, field) for v in data))
+        self._state = state
+        self._field = field
+
+    def _write(self):
+        self._state._will_write(self._field)
+
+    def __setitem__(self, index, value):
+        self._write()
+        if isinstance(index, slice):
+            value = [_track(v, self._state, self._field) for v in value]
+        else:
+            value = _track(value, self._state, self._field)
+        list.__setitem__(self, index, value)
+
+    def __delitem__(self, index):
+        self._write()
+        list.__delitem__(self, index)
+
+    def append(self, value):
+        self._write()
+        list.append(self, _track(value, self._state, self._field))
+
+    def extend(self, values):
+        self._write()
+        list.extend(self, [_track(v, self._state, self._field) for v in values])
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def __imul__(self, n):
+        self._write()
+        return list.__imul__(self, n)
+
+    def insert(self, index, value):
+        self._write()
+        list.insert(self, index, _track(value, self._state, self._field))
+
+    def pop(self, *args):
+        self._write()
+        return list.pop(self, *args)
+
+    def remove(self, value):
+        self._write()
+        list.remove(self, value)
+
+    def clear(self):
+        self._write()
+        list.clear(self)
+
+    def sort(self, *args, **kwargs):
+        self._write()
+        list.sort(self, *args, **kwargs)
+
+    def reverse(self):
+        self._write()
+        list.reverse(self)
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce_ex__(self, protocol):
+        return list, (list(self),)
+
+
+_TRACKED = (TrackedDict, TrackedList)
+
+
+def _track(value: Any, state: 'ModuleState', field: str) -> Any:
+    """Значение поля слота: dict/list (вглубь) — в отслеживаемые контейнеры этого поля."""
+    t = type(value)
+    if t in _TRACKED:
+        if value._state is state and value._field == field:
+            return value
+        return t(state, field, value)
+    if t is dict:
+        return TrackedDict(state, field, value)
+    if t is list:
+        return TrackedList(state, field, value)
+    return value
+
+
+def _copy_tracked(value: Any, state: 'ModuleState', field: str) -> Any:
+    """Копия отслеживаемого значения поля (для снимка, в который идёт копирование при записи)."""
+    t = type(value)
+    if t is TrackedDict:
+        out = TrackedDict(state, field)
+        for key, item in value.items():
+            dict.__setitem__(out, key, _copy_tracked(item, state, field))
+        return out
+    if t is TrackedList:
+        out = TrackedList(state, field)
+        list.extend(out, [_copy_tracked(item, state, field) for item in value])
+        return out
+    if isinstance(value, _IMMUTABLE):
+        return value
+    return copy.deepcopy(value)
+
+
+class StateSnapshot:
+    """
+    Снимок слота: ссылки на значения полей + версия слота на момент снимка (O(число полей)).
+    shared — поля, которые снимок ещё делит с живым слотом: первая запись в такое поле
+    (в том числе во вложенный контейнер или через старую ссылку) сначала копирует в снимок
+    только это поле. Изменяемые значения других типов (deque и т.п.) копируются сразу.
+    """
+    __slots__ = ("state", "version", "values", "shared", "__weakref__")
+
+    def __init__(self, state: 'ModuleState', version: int, values: Dict[str, Any], shared: set):
+        self.state = state
+        self.version = version
+        self.values = values
+        self.shared = shared
+
+    def read(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """fn(values) из другого потока: на это время копирование при записи ждёт."""
+        with _COW_LOCK:
+            return fn(self.values)
+
+    def release(self):
+        """Снимок больше не нужен: запись в слот перестаёт копировать в него поля."""
+        self.state._forget_snapshot(self)
+        self.shared = set()
+
+
+class ModuleState(MutableMapping):
+    """
+    Состояние одного модуля в сессии. Известные поля лежат в __slots__ и читаются
+    атрибутами (ex.engagement); значения по умолчанию ставятся один раз при создании,
+    поэтому «ensure»-цепочки setdefault на каждом вызове больше не нужны.
+    Для совместимости объект ведёт себя как dict: progress["Expert"]["engagement"],
+    .get/.setdefault/in/items работают как раньше; незнакомые ключи уходят в _extra.
+    Неустановленное поле — это отсутствующий ключ.
+
+    dict/list в полях хранятся как TrackedDict/TrackedList: любая запись — через вид-словарь,
+    атрибутом или во вложенное задание/подсказку — повышает версию (слот «грязный» для
+    хранилища). Прочие изменяемые значения (deque) правят на месте — такую запись отмечает touch().
+
+    Снимки — копирование при записи: snapshot() берёт ссылки на значения полей, а первая
+    запись в поле после снимка копирует в снимок только это поле. restore() возвращает
+    только поля, изменённые после снимка, отдавая слоту значение снимка без копии (снимок
+    снова делит его со слотом), — один снимок можно восстанавливать сколько угодно раз.
+    """
+    __slots__ = ("_extra", "_version", "_snaps")
+    FIELDS: Tuple[str, ...] = ()
+    APPEND_ONLY: Tuple[str, ...] = ()
+    TRANSIENT: Tuple[str, ...] = ()         # рабочие объекты: не сохраняются, пересоздаются
+    _FIELD_SET: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        self._extra: Optional[Dict[str, Any]] = None
+        self._version = 0
+        self._snaps: Optional[List[weakref.ref]] = None     # живые снимки слота
+        self._init_defaults()
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    def _init_defaults(self):
+        pass
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ModuleState':
+        """Восстановить слот из сохранённого словаря (см. core/session_store.py)."""
+        return cls(data)
+
+    def touch(self, *fields: str):
+        """Отметить правку на месте неотслеживаемого значения (deque): версия +1 — слот «грязный»."""
+        self._version += 1
+
+    def __setattr__(self, key: str, value: Any):
+        if key in self._FIELD_SET:
+            self._will_write(key)
+            value = _track(value, self, key)
+        object.__setattr__(self, key, value)
+
+    def _will_write(self, key: str):
+        """Перед записью в поле: версия +1; снимки, делящие поле, получают свою копию."""
+        object.__setattr__(self, "_version", self._version + 1)
+        if self._snaps is None:
+            return
+        with _COW_LOCK:
+            alive = []
+            for ref in self._snaps:
+                snap = ref()
+                if snap is None:
+                    continue
+                alive.append(ref)
+                if key in snap.shared:
+                    snap.shared.discard(key)
+                    snap.values[key] = _copy_tracked(snap.values[key], self, key)
+            object.__setattr__(self, "_snaps", alive or None)
+
+    def _forget_snapshot(self, snap: 'StateSnapshot'):
+        with _COW_LOCK:
+            if self._snaps is not None:
+                alive = [ref for ref in self._snaps if ref() is not None and ref() is not snap]
+                object.__setattr__(self, "_snaps", alive or None)
+
+    # --- вид-словарь
+    def _raw(self, key: str, default: Any = None) -> Any:
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        return default if self._extra is None else self._extra.get(key, default)
+
+    def _store(self, key: str, value: Any):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)       # версия и снимки — в __setattr__
+        else:
+            self._will_write(key)
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = _track(value, self, key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        return default if self._extra is None else self._extra.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        if key in self._FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key: str, value: Any):
+        self._store(key, value)
+
+    def __delitem__(self, key: str):
+        self._will_write(key)
+        if key in self._FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        self._store(key, default)
+        return self[key]                # уже отслеживаемый контейнер, а не исходный default
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self._raw(key) for key in self}
+
+    def to_record(self) -> Dict[str, Any]:
+        """Поля для сохранения/передачи: всё, кроме TRANSIENT."""
+        skip = self.TRANSIENT
+        return {key: self._raw(key) for key in self if key not in skip}
+
+    # --- снимки
+    def snapshot(self, skip: Tuple[str, ...] = ()) -> StateSnapshot:
+        values, shared = {}, set()
+        for key in self:
+            if key in skip:
+                continue
+            value = self._raw(key)
+            if type(value) in _TRACKED:
+                shared.add(key)             # копия — только при первой записи в поле
+            elif not isinstance(value, _IMMUTABLE):
+                value = copy.deepcopy(value)
+            values[key] = value
+        snap = StateSnapshot(self, self._version, values, shared)
+        if shared:
+            with _COW_LOCK:
+                object.__setattr__(self, "_snaps", (self._snaps or []) + [weakref.ref(snap)])
+        return snap
+
+    def restore(self, snap: StateSnapshot) -> int:
+        """Вернуть поля снимка (слияние, как dict.update); возвращает число изменённых полей."""
+        changed = 0
+        own = snap.state is self
+        for key, value in snap.values.items():
+            current = self._raw(key, _MISSING)
+            if current is value:
+                continue                    # поле не трогали после снимка
+            if type(value) in _TRACKED:
+                if own:
+                    # значение снимка уходит в слот без копии; снимок снова делит поле
+                    self._store(key, value)
+                    snap.shared.add(key)
+                else:
+                    self._store(key, _copy_tracked(value, self, key))
+            elif current is _MISSING or type(current) is not type(value) or current != value:
+                self._store(key, value if isinstance(value, _IMMUTABLE) else copy.deepcopy(value))
+            else:
+                continue
+            changed += 1
+        if own:
+            snap.version = self._version    # слот снова совпадает со снимком
+        return changed
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class ExpertState(ModuleState):
+    __slots__ = FIELDS = ("dialog_history", "last_answer", "engagement", "confidence",
+                          "last_interaction_time", "latency_buffer", "latency_sec",
+                          "latency_avg_sec", "dedup")
+    # списки, которые только растём в конец: хранилище пишет их хвостами (см. core/session_store.py)
+    APPEND_ONLY = ("dialog_history",)
+    TRANSIENT = ("dedup",)      # детектор почти-дублей (core/dedup.py)
+
+    def _init_defaults(self):
+        self.dialog_history = []
+        self.last_answer = None
+        self.engagement = 0.5
+        self.confidence = 0.5
+        self.last_interaction_time = wall_time()
+        self.latency_buffer = deque(maxlen=EXPERT_LATENCY_WINDOW)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExpertState':
+        # dedup (детектор почти-дублей) — рабочий объект, пересоздаётся по требованию
+        state = cls({k: v for k, v in data.items() if k not in cls.TRANSIENT})
+        state.latency_buffer = deque(state.latency_buffer or (), maxlen=EXPERT_LATENCY_WINDOW)
+        return state
+
+
+class MotivatorState(ModuleState):
+    __slots__ = FIELDS = ("level", "history", "last_check_ts", "last", "drop_count")
+
+    def _init_defaults(self):
+        self.level = 1                  # S1 по умолчанию
+        self.history = []               # история снимков
+        self.last_check_ts = wall_time()
+
+
+class ConductorState(ModuleState):
+    """
+    agg — итоги занятия, которые ведутся по ходу событий (а не пересчитываются в конце):
+    ответы эксперта, секунды по этапам, задания (всего/выполнено), гистограмма уровней
+    мотивации. lesson_summary() — O(1), без обхода dialog_history/tasks/history.
+    """
+    __slots__ = FIELDS = ("stage", "work_turns", "summary", "timestamps", "agg")
+
+    def _init_defaults(self):
+        self.stage = "start"
+        self.work_turns = 0
+        self.summary = {}
+        self.timestamps = {}
+        self.agg = _new_aggregates()
+
+    def _agg(self) -> Dict[str, Any]:
+        # запись атрибутами: версия +1 — итоги уйдут в хранилище
+        self.touch("agg")
+        return self.agg
+
+    def note_answer(self):
+        self._agg()["answers"] += 1
+
+    def note_stage(self, stage: str, ts: float):
+        agg = self._agg()
+        prev, since = agg["stage"], agg["stage_since"]
+        if prev is not None and since is not None:
+            agg["stage_sec"][prev] = agg["stage_sec"].get(prev, 0.0) + max(0.0, ts - since)
+        agg["stage"], agg["stage_since"] = stage, ts
+
+    def note_tasks(self, task_ids: List[str]):
+        # organizer_update приходит и без смены заданий: выполненными остаются те, что ещё в списке
+        agg = self._agg()
+        present = set(task_ids)
+        agg["tasks_total"] = len(task_ids)
+        agg["tasks_done"] = [t for t in agg["tasks_done"] if t in present]
+
+    def note_task_done(self, task_id: str):
+        done = self.agg["tasks_done"]
+        if task_id not in done:         # заданий единицы — список, не множество (сериализуется как есть)
+            self._agg()["tasks_done"].append(task_id)
+
+    def note_motivation(self, level: int):
+        agg = self._agg()
+        key = str(level)
+        agg["motivation_hist"][key] = agg["motivation_hist"].get(key, 0) + 1
+        agg["motivation_level"] = level
+
+    def lesson_summary(self, now: float) -> Dict[str, Any]:
+        agg = self.agg
+        stage_sec = dict(agg["stage_sec"])
+        if agg["stage"] is not None and agg["stage_since"] is not None:
+            # текущий этап ещё идёт — досчитываем до now
+            stage_sec[agg["stage"]] = stage_sec.get(agg["stage"], 0.0) + max(0.0, now - agg["stage_since"])
+        return {
+            "answers_count": agg["answers"],
+            "work_turns": self.work_turns,
+            "stage_sec": stage_sec,
+            "tasks_total": agg["tasks_total"],
+            "tasks_done": len(agg["tasks_done"]),
+            "tasks_available": agg["tasks_total"] > 0,
+            "motivation_level": agg["motivation_level"],
+            "motivation_hist": dict(agg["motivation_hist"]),
+        }
+
+
+def _new_aggregates() -> Dict[str, Any]:
+    return {"answers": 0, "stage": None, "stage_since": None, "stage_sec": {},
+            "tasks_total": 0, "tasks_done": [], "motivation_hist": {}, "motivation_level": None}
+
+
+class TTSState(ModuleState):
+    __slots__ = FIELDS = ("cache", "dir")
+
+    def _init_defaults(self):
+        self.cache = {}                 # hash -> {"path", "sr", "word_ts", "phonemes"}
+        self.dir = "/mnt/data/tts_cache"
+
+
+class OrganizerState(ModuleState):
+    __slots__ = FIELDS = ("tasks", "task_status")
+
+
+class CartographerState(ModuleState):
+    __slots__ = FIELDS = ("goals",)
+
+
+class ReflectionState(ModuleState):
+    __slots__ = FIELDS = ("asked", "answers")
+
+
+class EventBusState(ModuleState):
+    __slots__ = FIELDS = ("id", "log")
+
+
+# имя модуля в context.progress → тип его состояния
+STATE_TYPES: Dict[str, type] = {
+    "Expert": ExpertState,
+    "Motivator": MotivatorState,
+    "Conductor": ConductorState,
+    "TTS": TTSState,
+    "Organizer": OrganizerState,
+    "Cartographer": CartographerState,
+    "Reflection": ReflectionState,
+    "EventBus": EventBusState,
+}
+
+
+class SessionProgress(dict):
+    """
+    context.progress: обычный dict для произвольных модулей, но слоты из STATE_TYPES
+    хранятся типизированными объектами. progress["Expert"] создаёт ExpertState при
+    первом обращении; присваивание/update_progress словаря оборачивает его в нужный тип.
+    """
+    __slots__ = ()
+
+    def __missing__(self, key: str):
+        cls = STATE_TYPES.get(key)
+        if cls is None:
+            raise KeyError(key)
+        state = cls()
+        dict.__setitem__(self, key, state)
+        return state
+
+    def __setitem__(self, key: str, value: Any):
+        cls = STATE_TYPES.get(key)
+        if cls is not None and not isinstance(value, cls):
+            value = cls(value)
+        dict.__setitem__(self, key, value)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: (value.to_dict() if isinstance(value, ModuleState) else value)
+                for key, value in self.items()}
@@ -0,0 +1,171 @@
+# core/timers.py
+
+# ============================================
+# ⏲️ Sprint 11.7 — Колесо таймеров: inactivity/timeout по тысячам сессий в одном потоке
+# ============================================
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+
+from core.clock import get_clock
+
+# события, которые считаются активностью студента (сбрасывают отсчёт простоя)
+ACTIVITY_EVENTS = ("init", "student_question", "student_reflection", "reflection_answer")
+
+INACTIVITY = "inactivity"
+TIMEOUT = "timeout"
+
+# фазы таймера сессии
+_WAIT_INACTIVITY, _WAIT_TIMEOUT, _DISARMED = 0, 1, 2
+
+# sink(session_id, event_type, idle_sec) — куда отдать сработавшее событие
+Sink = Callable[[str, str, float], None]
+
+
+class _Timer:
+    __slots__ = ("session_id", "last", "phase", "due_tick", "sink")
+
+    def __init__(self, session_id: str, last: float, sink: Sink):
+        self.session_id = session_id
+        self.last = last
+        self.phase = _WAIT_INACTIVITY
+        self.due_tick = 0
+        self.sink = sink
+
+
+class InactivityScheduler:
+    """
+    Хэшированное колесо таймеров (slots корзин по tick секунд) с ленивым переносом:
+      - touch(session_id) — O(1): только запоминает время активности; таймер в колесе
+        не двигается. Когда его корзина подходит, срок пересчитывается от last и таймер
+        либо срабатывает, либо переезжает в новую корзину;
+      - advance(now) — проходит корзины за прошедшие тики (стоимость ~ число таймеров
+        в этих корзинах, а не число сессий);
+      - после inactivity_after секунд простоя → "inactivity", после timeout_after → "timeout";
+        дальше таймер молчит до следующей активности.
+    Срабатывание — с точностью до tick. Потокобезопасен: touch из потока событий,
+    advance — из фонового потока start() или вручную (симуляции, тесты).
+    clock — монотонные часы колеса; по умолчанию — часы процесса на момент создания
+    (get_clock().monotonic), и дальше колесо читает только их: отсчёт _origin и все
+    сроки всегда в одной шкале, даже если потом сменят часы процесса (use_clock).
+    Для симуляции колесо создают под use_clock(sim) и вешают sim.add_listener(advance).
+    """
+
+    def __init__(self, sink: Optional[Sink] = None, inactivity_after: float = 120.0,
+                 timeout_after: float = 600.0, tick: float = 1.0, slots: int = 512,
+                 clock: Optional[Callable[[], float]] = None):
+        if timeout_after < inactivity_after:
+            raise ValueError("timeout_after должен быть не меньше inactivity_after")
+        self.sink = sink
+        self.inactivity_after = inactivity_after
+        self.timeout_after = timeout_after
+        self.tick = tick
+        self.clock = clock = clock or get_clock().monotonic
+        self._origin = clock()
+        self._tick = 0                                   # последний обработанный тик
+        self._wheel: List[Dict[str, _Timer]] = [{} for _ in range(slots)]
+        self._timers: Dict[str, _Timer] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"fired": 0, "rescheduled": 0, INACTIVITY: 0, TIMEOUT: 0}
+
+    # --- активность
+    def touch(self, session_id: str, sink: Optional[Sink] = None):
+        now = self.clock()
+        timer = self._timers.get(session_id)
+        if timer is not None and timer.phase == _WAIT_INACTIVITY:
+            timer.last = now       # горячий путь: без колеса и без блокировки
+            if timer.phase == _WAIT_INACTIVITY:   # не сработал между проверкой и записью
+                return
+        with self._lock:
+            if timer is None:
+                timer = self._timers[session_id] = _Timer(session_id, now, sink or self.sink)
+            else:
+                timer.last = now
+                self._unlink(timer)
+                timer.phase = _WAIT_INACTIVITY
+            self._schedule(timer, now + self.inactivity_after)
+
+    def remove(self, session_id: str):
+        with self._lock:
+            timer = self._timers.pop(session_id, None)
+            if timer is not None:
+                self._unlink(timer)
+
+    # --- колесо
+    def _tick_of(self, t: float) -> int:
+        # срабатываем не раньше срока: корзина первого тика, который целиком после t
+        return int((t - self._origin) / self.tick) + 1
+
+    def _schedule(self, timer: _Timer, due: float):
+        timer.due_tick = max(self._tick_of(due), self._tick + 1)
+        self._wheel[timer.due_tick % len(self._wheel)][timer.session_id] = timer
+
+    def _unlink(self, timer: _Timer):
+        if timer.phase != _DISARMED:
+            self._wheel[timer.due_tick % len(self._wheel)].pop(timer.session_id, None)
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Обработать все тики до now; возвращает число сработавших событий."""
+        now = self.clock() if now is None else now
+        target = int((now - self._origin) / self.tick)
+        fired: List[Tuple[Sink, str, str, float]] = []
+        with self._lock:
+            wheel, n = self._wheel, len(self._wheel)
+            while self._tick < target:
+                self._tick += 1
+                bucket = wheel[self._tick % n]
+                if not bucket:
+                    continue
+                due = [t for t in bucket.values() if t.due_tick <= self._tick]
+                for timer in due:
+                    del bucket[timer.session_id]
+                    self._expire(timer, fired)
+        # отдаём события без блокировки: обработчик может снова вызвать touch()
+        for sink, session_id, event_type, idle in fired:
+            if sink is not None:
+                sink(session_id, event_type, idle)
+        return len(fired)
+
+    def _expire(self, timer: _Timer, fired: list):
+        after = self.inactivity_after if timer.phase == _WAIT_INACTIVITY else self.timeout_after
+        deadline = timer.last + after
+        if self._tick_of(deadline) > self._tick:
+            # была активность после постановки — переносим, не срабатывая
+            self._schedule(timer, deadline)
+            self.stats["rescheduled"] += 1
+            return
+        event_type = INACTIVITY if timer.phase == _WAIT_INACTIVITY else TIMEOUT
+        at = self._origin + self._tick * self.tick        # время тика, а не конца advance()
+        fired.append((timer.sink, timer.session_id, event_type, at - timer.last))
+        self.stats["fired"] += 1
+        self.stats[event_type] += 1
+        if timer.phase == _WAIT_INACTIVITY:
+            timer.phase = _WAIT_TIMEOUT
+            self._schedule(timer, timer.last + self.timeout_after)
+        else:
+            timer.phase = _DISARMED
+
+    # --- фоновый поток
+    def start(self) -> 'InactivityScheduler':
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="inactivity-wheel", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            self.advance()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def summary(self) -> Dict[str, int]:
+        return {"sessions": len(self._timers), "tick": self._tick, **self.stats}
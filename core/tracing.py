@@ -0,0 +1,92 @@
+# core/tracing.py
+
+# ============================================
+# 🔬 Sprint 10.2 — Трассировка обработчиков шины (Chrome trace JSON)
+# ============================================
+from typing import Any, Dict, List, Optional
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+# trace_id несемплированной цепочки: решение уже принято, потомки его наследуют
+NOT_SAMPLED = 0
+
+
+class Tracer:
+    """
+    Семплирующий трассировщик EventBus.
+    - Решение о записи принимается на корневом событии (sample_rate), потомки наследуют trace_id.
+    - Для каждого вызова обработчика пишется span (perf_counter_ns начала и длительность).
+    - Несемплированные события получают trace_id = NOT_SAMPLED: span не пишется, а потомки
+      такого корня не разыгрывают семплирование заново.
+    Выключенная трассировка: bus.tracer = None (одна проверка атрибута на событие).
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_spans: int = 100_000):
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # (name, event_type, trace_id, event_id, parent_id, t0_ns, dur_ns, tid)
+        self.spans: List[tuple] = []
+        self.dropped = 0
+
+    def assign(self, event, parent) -> None:
+        """Проставить trace_id/parent_id/id публикуемому событию."""
+        if parent is not None:
+            if not parent.trace_id:
+                event.trace_id = NOT_SAMPLED
+                return
+            event.trace_id = parent.trace_id
+            event.parent_id = parent.id
+        elif random.random() < self.sample_rate:
+            event.trace_id = next(self._ids)
+        else:
+            event.trace_id = NOT_SAMPLED
+            return
+        event.id = next(self._ids)
+
+    def span(self, name: str, event, t0_ns: int, t1_ns: int) -> None:
+        rec = (name, event.type, event.trace_id, event.id, event.parent_id,
+               t0_ns, t1_ns - t0_ns, threading.get_ident())
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return
+            self.spans.append(rec)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.dropped = 0
+
+    # --- экспорт
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = []
+        for name, etype, trace_id, event_id, parent_id, t0, dur, tid in self.spans:
+            events.append({
+                "name": name, "cat": etype, "ph": "X",
+                "ts": t0 / 1000.0, "dur": dur / 1000.0,
+                "pid": pid, "tid": tid,
+                "args": {"trace_id": trace_id, "event_id": event_id, "parent_id": parent_id},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"dropped_spans": self.dropped, "exported_at": time.time()}}
+
+    def export_chrome_trace(self, path: str) -> str:
+        """Сохранить в формате Chrome trace-event (открывается в chrome://tracing / Perfetto)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+
+def handler_name(handler) -> str:
+    inner = getattr(handler, "handler", None)  # обёртка блокирующего подписчика
+    if inner is not None:
+        return handler_name(inner) + " [enqueue]"
+    return getattr(handler, "__qualname__", None) or type(handler).__name__
@@ -0,0 +1,240 @@
+# core/transport.py
+
+# ============================================
+# 🔌 Sprint 10.6 — Межпроцессный транспорт событий (Unix-сокеты / multiprocessing.Pipe)
+# ============================================
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import socket
+import struct
+import threading
+
+from core.records import decode_record, encode_record
+
+# кадр канала: <длина:uint32><тело>; тело — пачка: <count:uint32> + count × (<len:uint32><запись>)
+_LEN = struct.Struct("<I")
+MAX_FRAME = 64 * 1024 * 1024
+
+
+def encode_batch(records: List[bytes]) -> bytes:
+    parts = [_LEN.pack(len(records))]
+    for rec in records:
+        parts.append(_LEN.pack(len(rec)))
+        parts.append(rec)
+    return b"".join(parts)
+
+
+def decode_batch(data: bytes) -> List[bytes]:
+    """Записи пачки; обрезанная пачка — ValueError (или struct.error на заголовке)."""
+    (count,), pos = _LEN.unpack_from(data, 0), _LEN.size
+    out = []
+    for _ in range(count):
+        (length,) = _LEN.unpack_from(data, pos)
+        pos += _LEN.size
+        if pos + length > len(data):
+            raise ValueError("Пачка обрезана")
+        out.append(data[pos:pos + length])
+        pos += length
+    return out
+
+
+# ---------- 1) Каналы: общий интерфейс send_bytes / recv_bytes / close ----------
+
+class SocketChannel:
+    """Потоковый сокет (AF_UNIX) с length-prefixed кадрами — тот же интерфейс, что у Connection."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._send_lock = threading.Lock()
+
+    def send_bytes(self, data: bytes):
+        with self._send_lock:
+            self.sock.sendall(_LEN.pack(len(data)) + data)
+
+    def _read_exact(self, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise EOFError("канал закрыт")
+            buf += chunk
+        return bytes(buf)
+
+    def recv_bytes(self) -> bytes:
+        (length,) = _LEN.unpack(self._read_exact(_LEN.size))
+        if length > MAX_FRAME:
+            raise ValueError(f"Слишком большой кадр: {length}")
+        return self._read_exact(length)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def channel_pair() -> Tuple[SocketChannel, SocketChannel]:
+    """Пара связанных каналов (socketpair) — для fork/тестов на одной машине."""
+    a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    return SocketChannel(a), SocketChannel(b)
+
+
+def listen_unix(path: str, backlog: int = 16) -> socket.socket:
+    if os.path.exists(path):
+        os.unlink(path)
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(path)
+    srv.listen(backlog)
+    return srv
+
+
+def accept_channel(server: socket.socket) -> SocketChannel:
+    sock, _ = server.accept()
+    return SocketChannel(sock)
+
+
+def connect_unix(path: str) -> SocketChannel:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    return SocketChannel(sock)
+
+
+# ---------- 2) Отправка: подписчик шины копит события и шлёт пачками ----------
+
+class EventForwarder:
+    """
+    Подписчик шины для выбранных типов событий. Обработчик только кладёт закодированную
+    запись в буфер и будит фоновый поток; тот ждёт на условии (без опроса) и отправляет
+    накопленное одним кадром. Пачки складываются сами: пока идёт отправка, новые записи
+    копятся в буфере. flush_interval > 0 — дополнительно подождать столько после первой
+    записи (или до batch_size записей), чтобы кадры были крупнее.
+    События, пришедшие из другого процесса (event.origin задан), обратно не пересылаются.
+    """
+
+    def __init__(self, channel, node: str, batch_size: int = 64, flush_interval: float = 0.0,
+                 encode: Callable[[Dict[str, Any]], bytes] = encode_record):
+        self.channel = channel
+        self.node = node
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._encode = encode
+        self._buf: List[bytes] = []
+        self._cv = threading.Condition()
+        self._closed = False
+        self.stats = {"events": 0, "batches": 0, "bytes": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name=f"forward-{node}", daemon=True)
+        self._thread.start()
+
+    def __call__(self, event):
+        if getattr(event, "origin", None) is not None:
+            return
+        rec = self._encode({"type": event.type, "source": event.source, "ts": event.ts,
+                            "mono_ns": getattr(event, "mono_ns", None),
+                            "origin": self.node, "payload": event.payload})
+        with self._cv:
+            self._buf.append(rec)
+            if len(self._buf) == 1 or len(self._buf) >= self.batch_size:
+                self._cv.notify()
+
+    def flush(self):
+        with self._cv:
+            batch, self._buf = self._buf, []
+        if not batch:
+            return
+        frame = encode_batch(batch)
+        try:
+            self.channel.send_bytes(frame)
+        except (OSError, EOFError, ValueError):
+            self.stats["errors"] += 1
+            return
+        self.stats["events"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["bytes"] += len(frame)
+
+    def _run(self):
+        cv = self._cv
+        while True:
+            with cv:
+                cv.wait_for(lambda: self._buf or self._closed)
+                if self.flush_interval > 0 and not self._closed and len(self._buf) < self.batch_size:
+                    cv.wait_for(lambda: self._closed or len(self._buf) >= self.batch_size,
+                                timeout=self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        self._thread.join()
+
+
+# ---------- 3) Приём: поток читает пачки и публикует события в локальную шину ----------
+
+class EventReceiver:
+    """
+    Читает кадры из канала и публикует события через deliver(event).
+    Для AsyncEventBus deliver = bus.publish (потокобезопасно, обработчики — в цикле шины);
+    для синхронной шины обработчики выполнятся в потоке приёмника.
+    """
+
+    def __init__(self, channel, deliver: Callable[[Any], None], make_event: Callable[..., Any],
+                 decode: Callable[[bytes], Dict[str, Any]] = decode_record, name: str = "receive"):
+        self.channel = channel
+        self.deliver = deliver
+        self.make_event = make_event
+        self._decode = decode
+        self.stats = {"events": 0, "batches": 0, "errors": 0, "bad_frames": 0, "bad_records": 0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                data = self.channel.recv_bytes()
+            except (OSError, EOFError, ValueError):
+                return  # канал закрыт с той стороны
+            self.stats["batches"] += 1
+            try:
+                bodies = decode_batch(data)
+            except (struct.error, ValueError):
+                # битый кадр от соседа: пропускаем его, приём продолжается
+                self.stats["bad_frames"] += 1
+                continue
+            for body in bodies:
+                try:
+                    rec = self._decode(body)
+                    ev = self.make_event(type=rec["type"], payload=rec.get("payload") or {},
+                                         source=rec.get("source", "system"), ts=rec.get("ts"),
+                                         origin=rec.get("origin") or "remote", mono_ns=rec.get("mono_ns"))
+                except Exception:
+                    self.stats["bad_records"] += 1
+                    continue
+                try:
+                    self.deliver(ev)
+                    self.stats["events"] += 1
+                except Exception:
+                    self.stats["errors"] += 1
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+
+class TransportLink:
+    """Двусторонняя связь шины с другим процессом: forwarder (наружу) + receiver (внутрь)."""
+
+    def __init__(self, channel, forwarder: EventForwarder, receiver: EventReceiver):
+        self.channel = channel
+        self.forwarder = forwarder
+        self.receiver = receiver
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sent": dict(self.forwarder.stats), "received": dict(self.receiver.stats)}
+
+    def close(self):
+        self.forwarder.close()
+        self.channel.close()
+        self.receiver.join(1.0)
@@ -34,6 +34,7 @@ class KnowledgeBase:
     - load(discipline_path) собирает .txt|.md из папки
     - index() строит векторизатор
     - search(query, top_k) возвращает топ документов с весами
+    - version растёт при каждом изменении корпуса/индекса (ключ для кэшей ответов)
     """
 
     def __init__(self) -> None:
@@ -41,6 +42,7 @@ class KnowledgeBase:
         self.doc_names: List[str] = []
         self.vectorizer: TfidfVectorizer | None = None
         self.doc_vectors = None
+        self.version: int = 0
 
     def load(self, path: str | Path) -> int:
         p = Path(path)
@@ -56,11 +58,14 @@ class KnowledgeBase:
                 text = fp.read_text(encoding="cp1251", errors="ignore")
             self.docs.append(text)
             self.doc_names.append(fp.name)
+        if files:
+            self.version += 1
         return len(self.docs)
 
     def index(self) -> None:
         self.vectorizer = TfidfVectorizer(stop_words=list(RU_STOP) if RU_STOP else None)
         self.doc_vectors = self.vectorizer.fit_transform(self.docs)
+        self.version += 1
 
     def ensure_ready(self) -> None:
         if self.vectorizer is None or self.doc_vectors is None:
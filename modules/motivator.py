@@ -5,7 +5,9 @@
 # ============================================
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
-import time
+
+from core.clock import wall_time
+from core.state import MotivatorState
 
 # Уровни мотивационного состояния (S1–S4)
 LEVEL_NAMES = {
@@ -89,13 +91,9 @@ class Motivator(TeachingFunction):
             pass
 
     # Инициализация хранилища в контексте
-    def _ensure_slot(self, context: Context):
-        context.progress.setdefault("Motivator", {})
-        slot = context.progress["Motivator"]
-        slot.setdefault("level", 1)                  # S1 по умолчанию
-        slot.setdefault("history", [])               # история снимков
-        slot.setdefault("last_check_ts", time.time())
-        return slot
+    def _ensure_slot(self, context: Context) -> MotivatorState:
+        # MotivatorState: level (S1 по умолчанию), history, last_check_ts — задаются при создании
+        return context.progress["Motivator"]
 
     def _read_expert_metrics(self, context: Context):
         ex = context.progress.get("Expert", {})
@@ -163,7 +161,7 @@ class Motivator(TeachingFunction):
     def record_reflection_answer(self, context: Context, text: str):
         """Фиксирует ответ студента на рефлексивный вопрос"""
         store = context.progress.setdefault("Reflection", {})
-        store.setdefault("answers", []).append({"ts": time.time(), "text": text})
+        store.setdefault("answers", []).append({"ts": wall_time(), "text": text})
 
         # 🔹 простая реакция-пример: если студент пишет "времени не хватает"
         if "врем" in text.lower():
@@ -189,7 +187,7 @@ class Motivator(TeachingFunction):
             name=LEVEL_NAMES[next_level],
             style=LEVEL_STYLES[next_level],
             engagement=_clamp(engagement), confidence=_clamp(confidence),
-            latency_avg_sec=lat_avg, signals=signals, ts=time.time()
+            latency_avg_sec=lat_avg, signals=signals, ts=wall_time()
         )
         self.last_snapshot = snap
         # Лёгкая история (хранить только последние 20)
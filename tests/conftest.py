@@ -0,0 +1,61 @@
+# tests/conftest.py
+#
+# core/__init__.py — это ноутбук целиком (KB, nltk, демо-прогоны), поэтому пакет core
+# регистрируем без него: самостоятельные модули (core.state, core.codec, …) импортируются
+# как обычно, а ячейки-модули (event_bus, conductor, bus_host, fsm) исполняются в общем
+# пространстве имён — так же, как их склеивает ноутбук.
+from pathlib import Path
+import sys
+import types
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+if "core" not in sys.modules:
+    _pkg = types.ModuleType("core")
+    _pkg.__path__ = [str(ROOT / "core")]
+    sys.modules["core"] = _pkg
+
+# ячейка → граница, до которой она исполняется (дальше — демо-прогон на глобальных ctx/bus)
+CELLS = {
+    "event_bus": ("core/event_bus.py", "# ---------- 6)"),
+    "conductor": ("core/conductor.py", "# ── 2)"),
+    "bus_host": ("core/bus_host.py", None),
+    "fsm": ("core/fsm.py", None),
+}
+
+
+def load_cells(*names: str, **globals_) -> dict:
+    """Исполнить ячейки по порядку в одном пространстве имён; globals_ — то, что ноутбук задаёт раньше."""
+    from core.context import Context
+
+    ns = {"__name__": "notebook", "Context": Context,
+          "latency_budget_ms": lambda context: 1500.0}
+    ns.update(globals_)
+    for name in names:
+        path, stop = CELLS[name]
+        src = (ROOT / path).read_text(encoding="utf-8")
+        if stop is not None:
+            src = src.split(stop)[0]
+        exec(compile(src, str(ROOT / path), "exec"), ns)
+    return ns
+
+
+def make_context(**kw):
+    from core.context import Context
+
+    meta = dict(discipline="Цифровая культура", lesson_number=1, topic="Инфографика", student_level=1)
+    meta.update(kw)
+    return Context(**meta)
+
+
+@pytest.fixture
+def bus_ns():
+    return load_cells("event_bus")
+
+
+@pytest.fixture
+def context():
+    return make_context()
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from core.answer_cache import AnswerCache, make_answer_key, normalize_question, retrieval_key
+
+from conftest import make_context
+
+
+def test_normalize_question():
+    assert normalize_question("  Что такое   ИНФОГРАФИКА?! ") == "что такое инфографика"
+
+
+def test_retrieval_key_separates_knowledge_bases():
+    kb_a = SimpleNamespace(discipline="Цифровая культура", version=1)
+    kb_b = SimpleNamespace(discipline="История", version=1)
+    assert retrieval_key(kb_a, "Что такое граф?", 2) != retrieval_key(kb_b, "что такое граф", 2)
+    assert retrieval_key(kb_a, "Что такое граф?", 2) == retrieval_key(kb_a, "что такое граф", 2)
+    kb_a.version += 1
+    assert retrieval_key(kb_a, "что такое граф", 2) != retrieval_key(kb_a, "что такое граф", 1)
+
+
+def test_lru_eviction_and_loose_lookup():
+    cache = AnswerCache(maxsize=2)
+    ctx = make_context()
+    k1 = make_answer_key(ctx, "вопрос 1", "brief", ["define"], 1)
+    k1_detail = make_answer_key(ctx, "вопрос 1", "full", ["example"], 1)
+    k2 = make_answer_key(ctx, "вопрос 2", "brief", [], 1)
+    k3 = make_answer_key(ctx, "вопрос 3", "brief", [], 1)
+    cache.put(k1, {"base": 1})
+    assert cache.get_loose(k1_detail) == {"base": 1}
+    cache.put(k2, {"base": 2})
+    cache.get(k1)
+    cache.put(k3, {"base": 3})
+    assert cache.get(k2) is None and cache.get(k1) == {"base": 1}
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+
+
+def _bus(bus_ns, context):
+    return bus_ns["AsyncEventBus"](context)
+
+
+def test_publish_only_queues(bus_ns, context):
+    bus = _bus(bus_ns, context)
+    seen = []
+    bus.subscribe("init", seen.append)
+    bus.publish(bus_ns["Event"](type="init", source="system", payload={}))
+    assert seen == [] and bus.pending() == 1
+    bus.run_until_idle()
+    assert len(seen) == 1 and bus.pending() == 0
+
+
+def test_long_cascade_does_not_grow_the_stack(bus_ns, context):
+    Event = bus_ns["Event"]
+    bus = _bus(bus_ns, context)
+    depth = sys.getrecursionlimit() * 2
+    count = []
+
+    def hop(ev):
+        count.append(ev.payload["n"])
+        if ev.payload["n"] < depth:
+            bus.publish(Event(type="hop", source="system", payload={"n": ev.payload["n"] + 1}))
+
+    bus.subscribe("hop", hop)
+    bus.publish(Event(type="hop", source="system", payload={"n": 0}))
+    bus.run_until_idle()
+    assert count == list(range(depth + 1))
+
+
+def test_coroutine_handlers_and_errors(bus_ns, context):
+    Event = bus_ns["Event"]
+    bus = _bus(bus_ns, context)
+    seen = []
+
+    async def slow(ev):
+        await asyncio.sleep(0)
+        seen.append("async")
+
+    def boom(ev):
+        raise RuntimeError("обработчик упал")
+
+    bus.subscribe("student_question", boom)
+    bus.subscribe("student_question", slow)
+    bus.publish(Event(type="student_question", source="student", payload={"text": "?"}))
+    bus.run_until_idle()
+    assert seen == ["async"]                       # ошибка одного не мешает следующему
+    last = bus._events[-1]
+    assert last["type"] == "error" and last["payload_keys"] == ["reason", "during"]
+
+
+def test_dispatcher_task_in_running_loop(bus_ns, context):
+    Event = bus_ns["Event"]
+
+    async def scenario():
+        bus = _bus(bus_ns, context)
+        got = asyncio.Event()
+        bus.subscribe("init", lambda ev: got.set())
+        task = bus.start()
+        bus.publish(Event(type="init", source="system", payload={}))
+        await asyncio.wait_for(got.wait(), 5)
+        task.cancel()
+
+    asyncio.run(scenario())
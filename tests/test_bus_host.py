@@ -0,0 +1,89 @@
+import pytest
+
+from conftest import load_cells, make_context
+
+
+class StubOrganizer:
+    def process(self, context):
+        tasks = [{"id": "t1", "title": "Диаграмма"}]
+        context.progress["Organizer"]["tasks"] = [dict(t) for t in tasks]
+        return {"tasks": tasks}
+
+
+@pytest.fixture
+def ns():
+    return load_cells("event_bus", "conductor", "bus_host",
+                      make_restart_handler=lambda conductor, bus: (lambda ev: None))
+
+
+def _publish(ns, host, sid, type_, **payload):
+    host.publish(sid, ns["Event"](type=type_, source="system", payload=payload))
+
+
+def test_hosted_session_has_no_dict(ns):
+    host = ns["BusHost"]()
+    s = host.open_session(make_context(), "s1")
+    assert not hasattr(s, "__dict__")
+    with pytest.raises(AttributeError):
+        s.stage = "work"                # лишние поля сессии завести негде
+    assert ns["ConductorBase"].__slots__ == ()
+
+
+def test_sessions_share_routes_but_not_state(ns):
+    host = ns["BusHost"](organizer=StubOrganizer(), min_work_turns=1)
+    a = host.open_session(make_context(student_id="a"), "a")
+    b = host.open_session(make_context(student_id="b"), "b")
+    _publish(ns, host, "a", "init")
+    assert a.ctx.progress["Conductor"]["stage"] == "work"
+    assert b.ctx.progress["Conductor"]["stage"] == "start"
+    assert a.ctx.progress["Organizer"]["tasks"][0]["id"] == "t1"
+
+    _publish(ns, host, "a", "expert_answer", answer="ок")
+    assert a.ctx.progress["Conductor"]["stage"] == "reflection"
+    assert b.ctx.progress["Conductor"]["stage"] == "start"
+
+
+def test_handler_error_is_logged_not_raised(ns):
+    host = ns["BusHost"]()
+    s = host.open_session(make_context(), "s1")
+
+    def boom(session, ev):
+        raise RuntimeError("сломалось")
+
+    host.table = {"init": (boom,)}
+    _publish(ns, host, "s1", "init")
+    assert host.stats()["pending"] == 0
+    _publish(ns, host, "s1", "init")        # очередь не застряла в режиме «разбираем»
+    assert len(s.events) == 4
+
+
+def test_journal_root_is_decided_per_call(ns, tmp_path):
+    import threading
+
+    from core.journal import EventJournal, JournalReader
+
+    journal = EventJournal(str(tmp_path / "journal"), fsync_interval=3600)
+    host = ns["BusHost"](journal=journal)
+    host.open_session(make_context(student_id="a"), "a")
+    host.open_session(make_context(student_id="b"), "b")
+    inside, release = threading.Event(), threading.Event()
+
+    def slow(session, ev):
+        host.publish(session, ns["Event"](type="expert_answer", source="expert", payload={}))
+        inside.set()
+        release.wait(5)
+
+    host.table = {"student_question": (slow,)}
+    t = threading.Thread(target=_publish, args=(ns, host, "a", "student_question"))
+    t.start()
+    assert inside.wait(5)
+    # пока поток a разбирает каскад, внешний вопрос сессии b — всё равно корень
+    _publish(ns, host, "b", "student_question")
+    release.set()
+    t.join()
+    journal.sync()
+    recs = [(r["sid"], r["type"], r["root"]) for r in JournalReader(str(tmp_path / "journal"))]
+    journal.close()
+    assert ("a", "student_question", True) in recs
+    assert ("a", "expert_answer", False) in recs
+    assert ("b", "student_question", True) in recs
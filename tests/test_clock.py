@@ -0,0 +1,46 @@
+import pytest
+
+from core.clock import SimulatedClock, clock_sleep, get_clock, mono_time, use_clock, wall_time
+
+
+def test_sleep_is_instant_and_moves_both_clocks():
+    sim = SimulatedClock(start=1_000.0)
+    ticks = []
+    sim.add_listener(ticks.append)
+    sim.sleep(30)
+    sim.advance(0.5)
+    assert sim.time() == 1_030.5 and sim.monotonic() == 30.5
+    assert ticks == [30, 30.5]
+    with pytest.raises(ValueError):
+        sim.advance(-1)
+
+
+def test_use_clock_swaps_module_helpers_and_restores():
+    before = get_clock()
+    sim = SimulatedClock(start=0.0)
+    with use_clock(sim):
+        clock_sleep(3600)
+        assert wall_time() == 3600.0 and mono_time() == 3600.0
+    assert get_clock() is before
+
+
+def test_use_clock_restores_after_error():
+    before = get_clock()
+    with pytest.raises(RuntimeError):
+        with use_clock(SimulatedClock()):
+            raise RuntimeError
+    assert get_clock() is before
+
+
+def test_lesson_summary_uses_simulated_time():
+    from conftest import load_cells, make_context
+
+    ns = load_cells("event_bus", "conductor")
+    sim = SimulatedClock(start=0.0)
+    with use_clock(sim):
+        context = make_context()
+        bus = ns["EventBus"](context)
+        conductor = ns["Conductor"](context, bus)
+        sim.advance(45 * 60)                    # пара в 45 минут — за микросекунды
+        summary = conductor.lesson_summary()
+    assert summary["stage_sec"] == {"start": pytest.approx(45 * 60)}
@@ -0,0 +1,89 @@
+import inspect
+
+import pytest
+
+
+@pytest.fixture
+def bus(bus_ns, context):
+    return bus_ns["EventBus"](context)
+
+
+def _answer(bus_ns, n):
+    return bus_ns["Event"](type="expert_answer", source="expert", payload={"n": n})
+
+
+def test_build_event_bus_does_not_coalesce_by_default(bus_ns):
+    params = inspect.signature(bus_ns["build_event_bus"]).parameters
+    assert params["coalesce_window"].default is None
+
+
+def test_last_mode_delivers_leading_and_trailing(bus, bus_ns):
+    got, every = [], []
+    bus.set_coalescing("expert_answer", bus_ns["CoalescePolicy"](mode="last", window_sec=60.0))
+    bus.subscribe("expert_answer", lambda ev: got.append(ev.payload["n"]), coalesce=True)
+    bus.subscribe("expert_answer", lambda ev: every.append(ev.payload["n"]))
+    for n in range(5):
+        bus.publish(_answer(bus_ns, n))
+    assert every == [0, 1, 2, 3, 4]
+    assert got == [0]                       # первое — сразу, хвост ждёт конца окна
+    assert bus.coalesce_stats["merged"] == 3
+    bus.flush_coalesced(force=True)
+    assert got == [0, 4]
+
+
+def test_trailing_event_flushed_after_window(bus, bus_ns, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(bus_ns["time"], "monotonic", lambda: now[0])
+    got = []
+    bus.set_coalescing("expert_answer", bus_ns["CoalescePolicy"](mode="last", window_sec=0.5))
+    bus.subscribe("expert_answer", lambda ev: got.append(ev.payload["n"]), coalesce=True)
+    bus.publish(_answer(bus_ns, 1))
+    bus.publish(_answer(bus_ns, 2))
+    bus.flush_coalesced()
+    assert got == [1]
+    now[0] += 1.0
+    bus.publish(bus_ns["Event"](type="init", source="system", payload={}))
+    assert got == [1, 2]
+
+
+def test_dedupe_mode(bus, bus_ns):
+    got = []
+    bus.set_coalescing("expert_answer", bus_ns["CoalescePolicy"](
+        mode="dedupe", window_sec=60.0, key=lambda ev: ev.payload["n"] % 2))
+    bus.subscribe("expert_answer", lambda ev: got.append(ev.payload["n"]), coalesce=True)
+    for n in range(4):
+        bus.publish(_answer(bus_ns, n))
+    assert got == [0, 1]
+    assert bus.coalesce_stats["deduped"] == 2
+
+
+def test_policy_none_delivers_every_event(bus, bus_ns):
+    got = []
+    bus.set_coalescing("expert_answer", None)
+    bus.subscribe("expert_answer", lambda ev: got.append(ev.payload["n"]), coalesce=True)
+    for n in range(3):
+        bus.publish(_answer(bus_ns, n))
+    assert got == [0, 1, 2]
+
+
+def test_flushed_tail_is_not_a_new_journal_root(bus, bus_ns, tmp_path):
+    from core.journal import EventJournal, JournalReader
+
+    journal = EventJournal(str(tmp_path / "journal"), fsync_interval=3600)
+    bus.attach_journal(journal)
+    captured = []
+    bus.store = type("Store", (), {"capture": lambda self, sid, ctx: captured.append(sid)})()
+    bus.set_coalescing("expert_answer", bus_ns["CoalescePolicy"](mode="last", window_sec=60.0))
+    bus.subscribe("expert_answer", lambda ev: bus.publish(bus_ns["Event"](
+        type="motivation_update", source="motivator", payload={"n": ev.payload["n"]})), coalesce=True)
+    for n in range(3):
+        bus.publish(_answer(bus_ns, n))
+    captured.clear()
+    bus.flush_coalesced(force=True)             # хвост (n=2) дожат вне каскада
+    assert captured == [bus.session_id]         # изменения сохранены одним захватом
+    journal.sync()
+    recs = [(r["type"], r["payload"]["n"], r["root"]) for r in JournalReader(str(tmp_path / "journal"))]
+    journal.close()
+    assert ("motivation_update", 0, False) in recs
+    assert ("motivation_update", 2, False) in recs
+    assert [r for r in recs if r[2]] == [("expert_answer", n, True) for n in range(3)]
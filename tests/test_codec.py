@@ -0,0 +1,79 @@
+from collections import deque
+import json
+
+import pytest
+
+from core.codec import (CodecError, benchmark_codec, decode, decode_context, decode_or_json,
+                        encode, encode_context, encode_json)
+from core.state import ExpertState
+
+from conftest import make_context
+
+
+SAMPLE = {
+    "none": None, "flags": [True, False], "ints": [0, 1, -1, 300, -(2 ** 40)],
+    "float": 0.25, "text": "инфографика", "again": "инфографика", "bytes": b"\x00\x01",
+    "nested": {"tasks": [{"id": "t1", "hints": ["оси", "подписи"]}]},
+    "series": [float(i) / 3 for i in range(20)], "counts": list(range(-5, 15)),
+    "buffer": deque([1.0, 2.0], maxlen=8),
+}
+
+
+def test_round_trip():
+    out = decode(encode(SAMPLE))
+    assert out["buffer"] == deque([1.0, 2.0]) and out["buffer"].maxlen == 8
+    out.pop("buffer")
+    expected = dict(SAMPLE)
+    expected.pop("buffer")
+    assert out == expected
+
+
+def test_repeated_strings_are_referenced():
+    once = len(encode(["длинная строка задания"]))
+    twice = len(encode(["длинная строка задания"] * 2))
+    assert twice - once < 4
+
+
+def test_unencodable_object_raises():
+    with pytest.raises(CodecError):
+        encode({"worker": object()})
+    with pytest.raises(TypeError):
+        encode_json({"worker": object()})
+
+
+def test_transient_fields_are_skipped_explicitly():
+    ex = ExpertState()
+    ex["dedup"] = object()
+    ex.dialog_history.append({"question": "q"})
+    for enc, dec in ((encode, decode), (encode_json, decode_or_json)):
+        data = dec(enc(ex))
+        assert "dedup" not in data
+        assert data["dialog_history"] == [{"question": "q"}]
+
+
+def test_decode_or_json_reads_both_formats():
+    assert decode_or_json(encode({"a": 1})) == {"a": 1}
+    assert decode_or_json(json.dumps({"a": 1}).encode()) == {"a": 1}
+
+
+def test_bad_header():
+    with pytest.raises(CodecError):
+        decode(b"XX\x01\x00")
+
+
+def test_context_round_trip():
+    ctx = make_context(student_id="s1")
+    ctx.progress["Expert"].dialog_history.append({"question": "q"})
+    ctx.progress["Motivator"]["level"] = 3
+    back = decode_context(encode_context(ctx))
+    assert back.student_id == "s1" and back.topic == ctx.topic
+    assert isinstance(back.progress["Expert"], ExpertState)
+    assert back.progress["Motivator"]["level"] == 3
+    assert back.progress["Expert"].latency_buffer.maxlen == ctx.progress["Expert"].latency_buffer.maxlen
+
+
+def test_benchmark_reports_both_formats():
+    sample = {k: v for k, v in SAMPLE.items() if k != "bytes"}
+    res = benchmark_codec(sample, n=5)
+    assert set(res) == {"binary", "json"}
+    assert res["binary"]["bytes"] < res["json"]["bytes"]
@@ -0,0 +1,102 @@
+import pytest
+
+from core.state import ConductorState
+
+
+TASKS = [{"id": "t1", "title": "Диаграмма"}, {"id": "t2", "title": "Легенда"}]
+
+
+class StubOrganizer:
+    def process(self, context):
+        context.progress["Organizer"]["tasks"] = [dict(t) for t in TASKS]
+        return {"tasks": [dict(t) for t in TASKS]}
+
+
+@pytest.fixture
+def ns():
+    from conftest import load_cells
+    return load_cells("event_bus", "conductor")
+
+
+@pytest.fixture
+def lesson(ns, context):
+    bus = ns["EventBus"](context)
+    events = []
+    for et in ("goals_ready", "tasks_ready", "stage_changed", "ask_reflection", "lesson_finished"):
+        bus.subscribe(et, events.append)
+    conductor = ns["Conductor"](context, bus, organizer=StubOrganizer(), min_work_turns=2)
+    return bus, conductor, events
+
+
+def _publish(ns, bus, type_, source="system", **payload):
+    bus.publish(ns["Event"](type=type_, source=source, payload=payload))
+
+
+def test_init_runs_to_work_in_one_pass(ns, lesson, context):
+    bus, conductor, events = lesson
+    _publish(ns, bus, "init")
+    assert context.progress["Conductor"]["stage"] == "work"
+    stages = [ev.payload["stage"] for ev in events if ev.type == "stage_changed"]
+    assert stages == ["goals", "tasks", "work"]
+    assert [ev.type for ev in events].count("tasks_ready") == 1
+
+
+def test_full_lesson_summary(ns, lesson, context):
+    bus, conductor, events = lesson
+    _publish(ns, bus, "init")
+    for _ in range(2):
+        _publish(ns, bus, "expert_answer", source="expert", answer="ok")
+    assert context.progress["Conductor"]["stage"] == "reflection"
+    _publish(ns, bus, "reflection_answer", source="student", text="понял")
+    assert context.progress["Conductor"]["stage"] == "finished"
+    summary = [ev for ev in events if ev.type == "lesson_finished"][-1].payload["summary"]
+    assert summary["answers_count"] == 2
+    assert summary["tasks_total"] == 2 and summary["tasks_available"]
+
+
+def test_repeated_organizer_update_keeps_done_tasks(ns, lesson, context):
+    bus, conductor, events = lesson
+    _publish(ns, bus, "init")
+    context.progress["Conductor"].note_task_done("t1")
+    _publish(ns, bus, "organizer_update", source="organizer", organizer={"tasks": TASKS})
+    assert conductor.lesson_summary()["tasks_done"] == 1
+    # набор сменился: t1 исчез — его отметка тоже
+    _publish(ns, bus, "organizer_update", source="organizer",
+             organizer={"tasks": [{"id": "t2"}, {"id": "t3"}]})
+    summary = conductor.lesson_summary()
+    assert summary["tasks_done"] == 0 and summary["tasks_total"] == 2
+
+
+def test_motivation_histogram(ns, lesson, context):
+    bus, conductor, events = lesson
+    for level in (1, 2, 2):
+        _publish(ns, bus, "motivation_update", source="motivator", last={"level": level})
+    _publish(ns, bus, "motivation_update", source="conductor", last={"level": 3})   # повторная рассылка
+    summary = conductor.lesson_summary()
+    assert summary["motivation_hist"] == {"1": 1, "2": 2}
+    assert summary["motivation_level"] == 2
+
+
+def test_state_aggregates():
+    c = ConductorState()
+    c.note_tasks(["t1", "t2"])
+    c.note_task_done("t1")
+    c.note_task_done("t1")
+    c.note_answer()
+    c.note_stage("work", 10.0)
+    summary = c.lesson_summary(25.0)
+    assert summary["tasks_total"] == 2 and summary["tasks_done"] == 1
+    assert summary["answers_count"] == 1
+    assert summary["stage_sec"]["work"] == pytest.approx(15.0)
+
+
+def test_degraded_brief_answer_is_not_a_work_turn(ns, lesson, context):
+    bus, conductor, events = lesson
+    _publish(ns, bus, "init")
+    placeholder = {"answer": "Коротко: …", "tier": "brief", "degraded": True}
+    for _ in range(3):
+        _publish(ns, bus, "expert_answer", source="expert", answer=placeholder)
+    assert context.progress["Conductor"]["stage"] == "work"
+    assert context.progress["Conductor"]["work_turns"] == 0
+    _publish(ns, bus, "expert_answer", source="expert", answer={"answer": "ok", "tier": "brief"})
+    assert context.progress["Conductor"]["work_turns"] == 1
@@ -0,0 +1,32 @@
+from core.dedup import NearDuplicateDetector, get_session_detector, minhash, similarity
+
+
+def test_rephrased_question_is_a_duplicate():
+    det = NearDuplicateDetector()
+    sig, hit, _ = det.lookup("Что такое инфографика?")
+    assert hit is None
+    det.remember(sig, {"base": "ответ", "sources": ["doc_1"]})
+
+    _, hit, sim = det.lookup("что такое  инфографика")
+    assert hit == {"base": "ответ", "sources": ["doc_1"]} and sim >= det.threshold
+    _, hit, _ = det.lookup("Как построить диаграмму рассеяния в таблице?")
+    assert hit is None
+
+
+def test_signature_is_deterministic():
+    assert minhash("Легенда диаграммы") == minhash("легенда, диаграммы!")
+    assert similarity(minhash("a"), minhash("a")) == 1.0
+
+
+def test_only_recent_turns_are_kept():
+    det = NearDuplicateDetector(turns=2)
+    for text in ("первый вопрос про цвет", "второй вопрос про шрифт", "третий вопрос про масштаб"):
+        sig, _, _ = det.lookup(text)
+        det.remember(sig, {"question": text})
+    _, hit, _ = det.lookup("первый вопрос про цвет")
+    assert hit is None
+
+
+def test_detector_lives_in_session_state(context):
+    det = get_session_detector(context)
+    assert get_session_detector(context) is det
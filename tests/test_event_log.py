@@ -0,0 +1,61 @@
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def log(bus_ns):
+    return bus_ns["EventLog"](capacity=3)
+
+
+def test_ring_buffer_keeps_last_records(log):
+    for i in range(5):
+        log.append(float(i), "init", "system", {"n": i})
+    assert len(log) == 3
+    assert [r["ts"] for r in log] == [2.0, 3.0, 4.0]
+    assert log[-1]["payload_keys"] == ["n"]
+    assert [r["ts"] for r in log[:2]] == [2.0, 3.0]
+
+
+def test_payload_is_not_retained(log, bus_ns):
+    payload = {"text": "вопрос"}
+    log.append_event(bus_ns["Event"](type="student_question", source="student", payload=payload))
+    payload["extra"] = object()
+    assert log[0]["payload_keys"] == ["text"]
+    assert all(v is not payload for v in log.raw()[0])
+
+
+def test_ts_is_lazy(log, bus_ns):
+    ev = bus_ns["Event"](type="init", source="system", payload={})
+    log.append_event(ev)
+    assert ev._ts is None                        # запись в лог не вычисляет время
+    assert log[0]["ts"] == pytest.approx(ev.ts)
+
+
+def test_explicit_ts_is_kept(log, bus_ns):
+    ev = bus_ns["Event"](type="init", source="system", payload={}, ts=123.0)
+    log.append_event(ev)
+    assert log[0]["ts"] == 123.0
+
+
+def test_from_records_round_trip(log, bus_ns):
+    log.append(1.0, "init", "system", {"a": 1})
+    back = bus_ns["EventLog"].from_records(log.to_list(), capacity=3)
+    assert back.to_list() == log.to_list()
+
+
+def test_bus_logs_published_events(bus_ns, context):
+    bus = bus_ns["EventBus"](context)
+    ev = bus_ns["Event"](type="init", source="system", payload={"k": 1})
+    bus.publish(ev)
+    rec = context.progress["EventBus"]["log"][-1]
+    assert rec["type"] == "init" and rec["payload_keys"] == ["k"]
+    assert ev._ts is None
+
+
+def test_event_is_slotted_and_interned(bus_ns):
+    Event = bus_ns["Event"]
+    ev = Event(type="".join(["student_", "question"]), source="student", payload={"text": "?"})
+    assert not hasattr(ev, "__dict__")
+    assert ev.type is sys.intern("student_question")
+    assert ev.payload_keys == ["text"] and ev.age_ms() >= 0
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def executor(bus_ns):
+    return bus_ns["SessionSerialExecutor"](max_workers=2, batch=2)
+
+
+def test_tasks_of_one_key_run_in_order(executor):
+    seen = []
+    for i in range(20):
+        executor.submit(("s1", "tts", 1), seen.append, i)
+    assert executor.wait_idle("s1", timeout=5)
+    assert seen == list(range(20))
+
+
+def test_raising_task_does_not_stall_the_key(executor, capsys):
+    seen = []
+
+    def boom():
+        raise RuntimeError("диск недоступен")
+
+    executor.submit(("s1", "tts", 1), boom)
+    for i in range(5):
+        executor.submit(("s1", "tts", 1), seen.append, i)
+    assert executor.wait_idle("s1", timeout=5)
+    assert seen == [0, 1, 2, 3, 4]
+    assert executor.errors == 1
+    assert "диск недоступен" in capsys.readouterr().out
+    # ключ снова неактивен — следующая задача запускает новый воркер
+    executor.submit(("s1", "tts", 1), seen.append, 5)
+    assert executor.wait_idle("s1", timeout=5)
+    assert seen[-1] == 5
+
+
+def test_sessions_run_in_parallel(executor):
+    gate = threading.Event()
+    done = []
+    executor.submit(("slow", "tts", 1), gate.wait, 5)
+    executor.submit(("fast", "tts", 1), done.append, "fast")
+    assert executor.wait_idle("fast", timeout=5)
+    assert done == ["fast"]
+    gate.set()
+    assert executor.wait_idle(timeout=5)
+
+
+@pytest.mark.parametrize("policy,expected", [
+    ("drop_oldest", [2, 3]),
+    ("drop_newest", [0, 1]),
+])
+def test_bounded_queue_overflow(bus_ns, policy, expected):
+    q = bus_ns["BoundedQueue"](bus_ns["QueueSpec"](capacity=2, policy=policy))
+    for i in range(4):
+        q.put(i)
+    assert [q.get(), q.get()] == expected
+    assert q.get() is None
+
+
+def test_bounded_queue_coalesce(bus_ns):
+    Event = bus_ns["Event"]
+    q = bus_ns["BoundedQueue"](bus_ns["QueueSpec"](capacity=4, policy="coalesce",
+                                                   key=lambda ev: ev.payload["k"]))
+    for k, n in (("a", 1), ("b", 2), ("a", 3)):
+        ev = Event(type="student_question", source="student", payload={"k": k, "n": n})
+        q.put(ev.payload["n"], ev)
+    assert [q.get(), q.get()] == [3, 2]
+
+
+def test_unknown_policy_rejected(bus_ns):
+    with pytest.raises(ValueError):
+        bus_ns["QueueSpec"](policy="spill")
+
+
+def test_blocking_subscribers_of_a_session_keep_publish_order(bus_ns, context):
+    import time
+
+    Event = bus_ns["Event"]
+    bus = bus_ns["EventBus"](context)
+    bus.executor = bus_ns["SessionSerialExecutor"](max_workers=4)
+    seen = []
+
+    def slow_tts(ev):
+        time.sleep(0.01)
+        seen.append(("tts", ev.payload["n"]))
+
+    bus.subscribe("expert_answer", slow_tts, blocking=True)
+    bus.subscribe("expert_answer", lambda ev: seen.append(("disk", ev.payload["n"])), blocking=True)
+    for n in range(3):
+        bus.publish(Event(type="expert_answer", source="expert", payload={"n": n}))
+    assert bus.wait_blocking(timeout=5)
+    assert seen == [(name, n) for n in range(3) for name in ("tts", "disk")]
+
+
+def test_drained_sessions_do_not_accumulate(executor):
+    seen = []
+    for i in range(50):
+        executor.submit((f"s{i}", "tts", 1), seen.append, i)
+    assert executor.wait_idle(timeout=5)
+    assert len(seen) == 50
+    assert executor._lanes == {}
+    assert executor.totals["tts"]["enqueued"] == 50
+    assert executor.queue_stats() == {}
+
+
+
+def test_drop_oldest_keeps_lane_order(bus_ns):
+    import threading
+
+    executor = bus_ns["SessionSerialExecutor"](max_workers=1)
+    gate = threading.Event()
+    seen = []
+    spec = bus_ns["QueueSpec"](capacity=1, policy="drop_oldest")
+    executor.submit(("s1", "gate", 0), gate.wait, 5)
+    executor.submit(("s1", "a", 1), seen.append, "a1", spec=spec)
+    executor.submit(("s1", "b", 2), seen.append, "b1")
+    executor.submit(("s1", "a", 1), seen.append, "a2", spec=spec)    # вытесняет a1 — встаёт в конец
+    gate.set()
+    assert executor.wait_idle("s1", timeout=5)
+    assert seen == ["b1", "a2"]
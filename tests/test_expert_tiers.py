@@ -0,0 +1,78 @@
+import re
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import ROOT
+
+# кусок ноутбука core/__init__.py: бюджет задержки, кэш выдачи и стадии конвейера Expert
+_START = "from typing import Optional\nfrom core.pipeline import RespondPipeline"
+_STOP = '@EXPERT_PIPELINE.stage("format")'
+
+
+@pytest.fixture
+def expert_ns():
+    src = (ROOT / "core" / "__init__.py").read_text(encoding="utf-8")
+    src = _START + src.split(_START, 1)[1].split(_STOP, 1)[0]
+    ns = {"__name__": "notebook", "time": time, "re": re}
+    exec(compile(src, str(ROOT / "core" / "__init__.py"), "exec"), ns)
+    ns["RETRIEVAL_CACHE"].clear()
+    ns["ANSWER_CACHE"].clear()
+    return ns
+
+
+class CountingKB:
+    discipline, version = "Цифровая культура", 1
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, top_k=2):
+        self.calls += 1
+        return [("Инфографика — визуальное представление данных.", "doc_1", 0.9)][:top_k]
+
+
+def _state(ns, kb, context, tier_budget_ns):
+    return {"expert": SimpleNamespace(kb=kb), "question": "Что такое инфографика и зачем она нужна?",
+            "augmented_query": "Что такое инфографика и зачем она нужна?", "in_reply_to": None,
+            "context": context, "intents": [], "detail": "short", "tier": "full",
+            "deadline_ns": time.perf_counter_ns() + tier_budget_ns}
+
+
+def test_brief_tier_skips_search(expert_ns, context):
+    kb = CountingKB()
+    st = _state(expert_ns, kb, context, tier_budget_ns=-1)      # бюджет уже исчерпан
+    expert_ns["_stage_retrieve"](st)
+    assert st["tier"] == "brief"
+    assert kb.calls == 0
+    assert st["base"] == expert_ns["BRIEF_NO_RETRIEVAL"] and st["sources"] == []
+    assert st["degraded"] is True
+
+
+def test_brief_tier_uses_cached_retrieval(expert_ns, context):
+    kb = CountingKB()
+    expert_ns["kb_retrieve"](kb, "Что такое инфографика и зачем она нужна?", 1)
+    st = _state(expert_ns, kb, context, tier_budget_ns=-1)
+    expert_ns["_stage_retrieve"](st)
+    assert st["tier"] == "brief" and kb.calls == 1
+    assert st["sources"] == ["doc_1"]
+    assert "degraded" not in st                 # выдача из кэша — настоящий, хоть и краткий ответ
+
+
+def test_full_tier_searches_once_then_hits_cache(expert_ns, context):
+    kb = CountingKB()
+    for _ in range(2):
+        st = _state(expert_ns, kb, context, tier_budget_ns=10 ** 12)
+        expert_ns["kb_retrieve"](kb, st["augmented_query"], 2)
+    assert kb.calls == 1
+
+
+def test_pick_tier_thresholds(expert_ns):
+    expert_ns["_SEARCH_COST"]["ewma_ns"] = 1_000_000
+    pipeline = expert_ns["EXPERT_PIPELINE"]
+    pipeline.stats["format"] = [1, 1_000_000, 1_000_000]
+    now = time.perf_counter_ns()
+    assert expert_ns["_pick_tier"]({"deadline_ns": now + 10 ** 9}) == "full"
+    assert expert_ns["_pick_tier"]({"deadline_ns": now + 1_700_000}) == "top1"
+    assert expert_ns["_pick_tier"]({"deadline_ns": now}) == "brief"
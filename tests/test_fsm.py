@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import load_cells
+
+
+class StubCartographer:
+    def process(self, context):
+        return {"goals": {"main_goal": "Изучить инфографику"}}
+
+
+class StubMotivator:
+    def __init__(self):
+        self.reflections = []
+
+    def process(self, context):
+        return {"level": "средний"}
+
+    def record_reflection_answer(self, context, text):
+        self.reflections.append(text)
+        return {"status": "ok"}
+
+
+class StubExpert:
+    def respond(self, question, context):
+        return {"question": question, "answer": "ответ"}
+
+
+@pytest.fixture
+def ns():
+    return load_cells("fsm", Cartographer=StubCartographer, Motivator=StubMotivator)
+
+
+def test_table_is_compiled_once_per_pair(ns):
+    table, wildcard = ns["TRANSITION_TABLE"], ns["WILDCARD_TABLE"]
+    assert [tr.target for tr in table[("goals", "student_question")]] == ["expertise"]
+    assert [tr.target for tr in table[("expertise", "inactivity")]] == ["motivation"]
+    assert len(wildcard["student_reflection"]) == 2
+    assert ("motivation", "student_question") not in table
+
+
+def test_lesson_walk_and_stats(ns, context, capsys):
+    fsm = ns["TeachingFSM"](context, expert=StubExpert(), motivator=StubMotivator())
+    fsm.handle_event("init")
+    assert fsm.state == "goals"
+    assert context.progress["Cartographer"]["goals"]["main_goal"] == "Изучить инфографику"
+    assert fsm.handle_event("student_question", "Что такое инфографика?")["answer"] == "ответ"
+    fsm.handle_event("student_question", "А легенда?")
+    fsm.handle_event("timeout")
+    assert fsm.state == "motivation"
+    fsm.handle_event("end")
+    assert fsm.state == "finish"
+    stats = fsm.transition_stats()
+    assert stats[("goals", "student_question", "expertise")]["count"] == 1
+    assert stats[("expertise", "student_question", "expertise")]["count"] == 1
+
+
+def test_guard_picks_fallback_and_unknown_event_keeps_state(ns, context, capsys):
+    fsm = ns["TeachingFSM"](context)
+    assert fsm.handle_event("student_reflection", "понял") == {
+        "status": "error", "reason": "motivator_not_attached"}
+    assert fsm.state == "start"                 # target=None — остаёмся на месте
+
+    motivator = StubMotivator()
+    fsm.motivator = motivator
+    fsm.handle_event("student_reflection", "понял")
+    assert motivator.reflections == ["понял"]
+
+    assert fsm.handle_event("timeout") is None
+    assert fsm.state == "start"
+    assert "переход невозможен" in capsys.readouterr().out
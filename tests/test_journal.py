@@ -0,0 +1,149 @@
+import pytest
+
+from core.journal import EventJournal, JournalReader, list_segments, replay_session
+from core.records import decode_record, encode_record
+from core.state import ExpertState
+
+
+@pytest.fixture
+def journal(tmp_path):
+    j = EventJournal(str(tmp_path / "journal"), fsync_interval=3600)
+    yield j
+    j.close()
+
+
+def test_record_helpers_round_trip():
+    ex = ExpertState()
+    ex["dedup"] = object()
+    rec = decode_record(encode_record({"slot": ex, "when": object.__name__}))
+    assert "dedup" not in rec["slot"] and rec["slot"]["engagement"] == 0.5
+
+
+def test_bus_journal_marks_roots_and_replays(bus_ns, context, journal, tmp_path):
+    Event = bus_ns["Event"]
+    bus = bus_ns["EventBus"](context)
+    bus.attach_journal(journal)
+    bus.subscribe("student_question",
+                  lambda ev: bus.publish(Event(type="expert_answer", source="expert", payload={"a": 1})))
+    for text in ("вопрос 1", "вопрос 2"):
+        bus.publish(Event(type="student_question", source="student", payload={"text": text}))
+    journal.sync()
+    reader = JournalReader(str(tmp_path / "journal"))
+    recs = list(reader.session(bus.session_id))
+    assert [(r["type"], r["root"]) for r in recs] == [
+        ("student_question", True), ("expert_answer", False)] * 2
+    assert reader.sessions() == [bus.session_id]
+
+    fresh = bus_ns["EventBus"](bus_ns["Context"](**{f: getattr(context, f) for f in (
+        "discipline", "lesson_number", "topic", "student_level")}))
+    seen = []
+    fresh.subscribe("student_question", lambda ev: seen.append(ev.payload["text"]))
+    assert bus_ns["replay_journal"](reader, bus.session_id, fresh) == 2
+    assert seen == ["вопрос 1", "вопрос 2"]
+
+
+def test_rotation_by_size(tmp_path):
+    directory = tmp_path / "journal"
+    j = EventJournal(str(directory), fsync_interval=3600, segment_bytes=200)
+
+    class Ev:
+        type, source, ts, payload = "init", "system", 1.0, {"text": "x" * 50}
+
+    for _ in range(3):
+        for _ in range(3):
+            j.append("s1", Ev())
+        j.sync()
+    j.close()
+    assert len(list_segments(directory)) >= 3
+    assert len(list(JournalReader(str(directory)))) == 9
+    # новый журнал продолжает с последнего сегмента
+    j2 = EventJournal(str(directory), fsync_interval=3600)
+    assert j2._seq == j._seq
+    j2.close()
+
+
+def test_torn_tail_is_skipped(journal, tmp_path):
+    class Ev:
+        type, source, ts, payload = "init", "system", 1.0, {}
+
+    journal.append("s1", Ev())
+    journal.append("s1", Ev())
+    journal.sync()
+    seg = list_segments(tmp_path / "journal")[-1]
+    data = seg.read_bytes()
+    seg.write_bytes(data[:-3])              # оборванная запись после падения
+    assert len(list(JournalReader(str(tmp_path / "journal")))) == 1
+
+
+def test_replay_session_all_events(tmp_path, journal):
+    class Ev:
+        def __init__(self, type_):
+            self.type, self.source, self.ts, self.payload = type_, "system", 1.0, {}
+
+    journal.append("s1", Ev("init"), root=True)
+    journal.append("s1", Ev("goals_ready"), root=False)
+    journal.append("s2", Ev("init"), root=True)
+    journal.sync()
+    published = []
+
+    class Bus:
+        def publish(self, ev):
+            published.append(ev["type"])
+
+    reader = JournalReader(str(tmp_path / "journal"))
+    assert replay_session(reader, "s1", Bus(), make_event=lambda **kw: kw, roots_only=False) == 2
+    assert published == ["init", "goals_ready"]
+
+
+def test_reopen_after_torn_tail_keeps_new_records(tmp_path):
+    directory = tmp_path / "journal"
+
+    class Ev:
+        def __init__(self, text):
+            self.type, self.source, self.ts, self.payload = "student_question", "student", 1.0, {"text": text}
+
+    j = EventJournal(str(directory), fsync_interval=3600)
+    for text in ("q1", "q2"):
+        j.append("s1", Ev(text))
+    j.close()
+    seg = list_segments(directory)[-1]
+    seg.write_bytes(seg.read_bytes()[:-3])          # q2 оборван при падении
+
+    j2 = EventJournal(str(directory), fsync_interval=3600)
+    assert j2.stats["truncated_bytes"] > 0
+    for text in ("q3", "q4"):
+        j2.append("s1", Ev(text))
+    j2.close()
+    assert len(list_segments(directory)) == 1
+    texts = [r["payload"]["text"] for r in JournalReader(str(directory)).session("s1")]
+    assert texts == ["q1", "q3", "q4"]
+
+
+def test_append_does_not_wait_for_fsync(tmp_path, monkeypatch):
+    import os
+    import threading
+
+    j = EventJournal(str(tmp_path / "journal"), fsync_interval=3600)
+    in_fsync, release = threading.Event(), threading.Event()
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        in_fsync.set()
+        release.wait(5)
+        real_fsync(fd)
+
+    class Ev:
+        type, source, ts, payload = "init", "system", 1.0, {}
+
+    j.append("s1", Ev())
+    monkeypatch.setattr("core.journal.os.fsync", slow_fsync)
+    t = threading.Thread(target=j.sync)
+    t.start()
+    assert in_fsync.wait(5)
+    j.append("s1", Ev())                # не блокируется, пока идёт fsync
+    assert j.stats["appended"] == 2
+    release.set()
+    t.join()
+    monkeypatch.setattr("core.journal.os.fsync", real_fsync)
+    j.close()
+    assert len(list(JournalReader(str(tmp_path / "journal")))) == 2
@@ -0,0 +1,59 @@
+import pytest
+
+from core.pipeline import RespondPipeline
+
+
+@pytest.fixture
+def pipeline():
+    p = RespondPipeline(("cache", "retrieve", "format"))
+    seen = []
+
+    @p.stage("format")
+    def _format(st):
+        seen.append("format")
+        st["result"] = {"answer": st["base"]}
+
+    @p.stage("cache")
+    def _cache(st):
+        seen.append("cache")
+        if st.get("hit"):
+            st["skip"] = {"retrieve"}
+
+    @p.stage("retrieve")
+    def _retrieve(st):
+        seen.append("retrieve")
+        st["base"] = "найдено"
+
+    p.seen = seen
+    return p
+
+
+def test_stages_run_in_declared_order(pipeline):
+    result = pipeline.run({})
+    assert pipeline.seen == ["cache", "retrieve", "format"]
+    assert result["answer"] == "найдено"
+    assert set(result["timings_ns"]) == {"cache", "retrieve", "format", "total"}
+    assert pipeline.stats["retrieve"][0] == 1 and pipeline.avg_ns("retrieve") >= 0
+
+
+def test_skip_and_stop(pipeline):
+    pipeline.run({"hit": True, "base": "из кэша"})
+    assert pipeline.seen == ["cache", "format"]
+    assert pipeline.report()["retrieve"]["count"] == 0
+
+
+def test_stop_breaks_the_pipeline():
+    p = RespondPipeline(("reset", "format"))
+    p.register("reset", lambda st: st.update(stop=True, result="сброс"))
+    p.register("format", lambda st: st.update(result="не дошли"))
+    assert p.run({}) == "сброс"
+    assert p.stats["format"][0] == 0
+
+
+def test_register_rejects_unknown_and_duplicate(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.register("tts", lambda st: None)
+    with pytest.raises(ValueError):
+        pipeline.register("cache", lambda st: None)
+    pipeline.reset_stats()
+    assert pipeline.avg_ns("cache") is None
@@ -0,0 +1,240 @@
+import sqlite3
+
+import pytest
+
+from core.session_store import SessionStore
+from core.state import ExpertState, SessionProgress
+
+from conftest import make_context
+
+
+class FailingCommit:
+    """Соединение, у которого следующие n COMMIT падают."""
+
+    def __init__(self, conn, fails: int = 1):
+        self._conn = conn
+        self.fails = fails
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT" and self.fails:
+            self.fails -= 1
+            raise sqlite3.OperationalError("disk I/O error")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SessionStore(str(tmp_path / "sessions.db"), flush_interval=3600)
+    yield s
+    s.close()
+
+
+def _expert_context():
+    ctx = make_context()
+    ctx.progress["Expert"] = ExpertState()
+    return ctx
+
+
+def _say(ctx, n):
+    ex = ctx.progress["Expert"]
+    for i in range(n):
+        ex.dialog_history.append({"question": f"q{len(ex.dialog_history)}", "answer": "a"})
+    ex.last_answer = ex.dialog_history[-1]["answer"]
+    ex.touch("dialog_history", "last_answer")
+
+
+def _count(store, table):
+    return store._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_round_trip(store):
+    ctx = _expert_context()
+    ctx.progress["Custom"] = {"k": 1}
+    _say(ctx, 3)
+    store.capture("s1", ctx)
+    store.flush()
+    loaded = store.load("s1")
+    assert isinstance(loaded.progress, SessionProgress)
+    assert loaded.topic == ctx.topic
+    assert [h["question"] for h in loaded.progress["Expert"]["dialog_history"]] == ["q0", "q1", "q2"]
+    assert loaded.progress["Custom"] == {"k": 1}
+
+
+def test_failed_commit_keeps_pending_and_crc(store):
+    ctx = _expert_context()
+    _say(ctx, 2)
+    store.capture("s1", ctx)
+    store._conn = FailingCommit(store._conn)
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    assert "s1" in store._pending
+    assert "s1" not in store._crc or "Expert" not in store._crc["s1"]
+    assert store.stats["failed_flushes"] == 1
+    # пока запись лежала в очереди, сессия успела продвинуться
+    _say(ctx, 1)
+    store.capture("s1", ctx)
+    store.flush()
+    loaded = store.load("s1")
+    assert len(loaded.progress["Expert"]["dialog_history"]) == 3
+    assert store.stats["commits"] == 1
+
+
+def test_failed_commit_keeps_released_accounting(store):
+    ctx = _expert_context()
+    _say(ctx, 1)
+    store.release("s1", ctx)
+    store._conn = FailingCommit(store._conn)
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    assert "s1" in store._released
+    store.flush()
+    assert "s1" not in store._versions
+    assert store.load("s1") is not None
+
+
+def test_history_is_written_in_chunks(store):
+    ctx = _expert_context()
+    for turn in range(5):
+        _say(ctx, 1)
+        store.capture("s1", ctx)
+        store.flush()
+    assert _count(store, "history") == 5
+    slot = store._conn.execute("SELECT data FROM slots WHERE module = 'Expert'").fetchone()[0]
+    assert "dialog_history" not in store._decode(slot)
+    assert len(store.load("s1").progress["Expert"]["dialog_history"]) == 5
+
+
+def test_history_chunks_merge_between_flushes(store):
+    ctx = _expert_context()
+    for turn in range(3):
+        _say(ctx, 1)
+        store.capture("s1", ctx)
+    store.flush()
+    assert _count(store, "history") == 1
+    assert store.stats["history_chunks"] == 1
+
+
+def test_history_reset_rewrites_field(store):
+    ctx = _expert_context()
+    _say(ctx, 4)
+    store.capture("s1", ctx)
+    store.flush()
+    ex = ctx.progress["Expert"]
+    ex["dialog_history"] = []          # очистка диалога
+    _say(ctx, 6)                       # новый список длиннее старого
+    store.capture("s1", ctx)
+    store.flush()
+    history = store.load("s1").progress["Expert"]["dialog_history"]
+    assert [h["question"] for h in history] == [f"q{i}" for i in range(6)]
+
+
+def test_loaded_session_continues_history(store):
+    ctx = _expert_context()
+    _say(ctx, 2)
+    store.capture("s1", ctx)
+    store.flush()
+    store.forget("s1")
+    loaded = store.load("s1")
+    _say(loaded, 1)
+    store.capture("s1", loaded)
+    store.flush()
+    assert _count(store, "history") == 2
+    assert len(store.load("s1").progress["Expert"]["dialog_history"]) == 3
+
+
+def test_unchanged_slots_are_skipped(store):
+    ctx = _expert_context()
+    _say(ctx, 1)
+    store.capture("s1", ctx)
+    store.flush()
+    store.capture("s1", ctx)
+    store.flush()
+    assert store.stats["slots_written"] == 1
+
+
+def test_delete(store):
+    ctx = _expert_context()
+    _say(ctx, 1)
+    store.capture("s1", ctx)
+    store.flush()
+    store.delete("s1")
+    assert store.load("s1") is None
+    assert _count(store, "history") == 0
+
+
+def _notebook_task_helpers():
+    # start_task / mark_task_complete / update_task_status из ноутбука core/__init__.py
+    from datetime import datetime
+    from conftest import ROOT
+
+    src = (ROOT / "core" / "__init__.py").read_text(encoding="utf-8")
+    src = "def _note_task_done" + src.split("def _note_task_done", 1)[1].split("from sklearn", 1)[0]
+    ns = {"datetime": datetime, "Context": object}
+    exec(compile(src, str(ROOT / "core" / "__init__.py"), "exec"), ns)
+    return ns
+
+
+def test_nested_task_edits_are_saved(store):
+    helpers = _notebook_task_helpers()
+    ctx = make_context()
+    ctx.progress["Organizer"] = {"tasks": [{"id": "t1", "start_time": None}, {"id": "t2", "start_time": None}]}
+    store.capture("s1", ctx)
+    store.flush()
+
+    helpers["mark_task_complete"](ctx, "t1")
+    store.capture("s1", ctx)
+    store.flush()
+    helpers["update_task_status"](ctx, "t2", "needs_review", answer="черновик")
+    store.capture("s1", ctx)
+    store.flush()
+
+    tasks = store.load("s1").progress["Organizer"]["tasks"]
+    assert tasks[0]["is_completed"] is True
+    assert tasks[1]["status"] == "needs_review" and tasks[1]["student_answer"] == "черновик"
+
+
+def test_reflection_appends_are_saved(store):
+    from conftest import load_cells
+
+    ns = load_cells("event_bus", "conductor")
+    ctx = make_context()
+    conductor = ns["Conductor"](ctx, ns["EventBus"](ctx))
+    for turns in (2, 3):
+        conductor.on_ask_reflection(ns["Event"](type="ask_reflection", source="conductor",
+                                                payload={"reason": "work_turns", "turns": turns}))
+        store.capture("s1", ctx)
+        store.flush()
+    asked = store.load("s1").progress["Reflection"]["asked"]
+    assert [a["turns"] for a in asked] == [2, 3]
+
+
+def test_tts_cache_entries_are_saved(store):
+    ctx = make_context()
+    tts = ctx.progress["TTS"]
+    store.capture("s1", ctx)
+    store.flush()
+    tts.cache["h1"] = {"path": "file://a.wav", "sr": 16000, "word_ts": []}
+    store.capture("s1", ctx)
+    store.flush()
+    assert store.load("s1").progress["TTS"]["cache"]["h1"]["path"] == "file://a.wav"
+
+
+def test_capture_shares_fields_and_keeps_captured_value(store):
+    ctx = make_context()
+    org = ctx.progress["Organizer"]
+    org["tasks"] = [{"id": "t1", "status": "not_started"}]
+    store.capture("s1", ctx)
+    snap = store._pending["s1"]["slots"]["Organizer"]
+    assert snap.values["tasks"] is org["tasks"]            # захват без копии
+
+    org["tasks"][0]["status"] = "in_progress"              # копия поля — только сейчас
+    store.flush()
+    assert store.load("s1").progress["Organizer"]["tasks"][0]["status"] == "not_started"
+    assert org._snaps is None                              # записанный снимок отпущен
+
+    store.capture("s1", ctx)
+    store.flush()
+    assert store.load("s1").progress["Organizer"]["tasks"][0]["status"] == "in_progress"
@@ -0,0 +1,79 @@
+import pytest
+
+from core.clock import SimulatedClock, use_clock
+from core.session_store import SessionStore
+from core.sessions import SessionManager, approx_size, session_key
+
+META = dict(discipline="Цифровая культура", lesson_number=1, topic="Инфографика", student_level=1)
+
+
+@pytest.fixture
+def sim():
+    return SimulatedClock()
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SessionStore(str(tmp_path / "sessions.db"), flush_interval=3600)
+    yield s
+    s.close()
+
+
+def test_get_or_create_reuses_session(sim):
+    mgr = SessionManager(clock=sim.monotonic)
+    a = mgr.get_or_create("st1", "t1", **META)
+    assert mgr.get_or_create("st1", "t1") is a
+    assert session_key("st1", "t1") in mgr and len(mgr) == 1
+
+
+def test_ttl_eviction_goes_through_store(sim, store):
+    mgr = SessionManager(store=store, ttl=60.0, sweep_interval=10.0, clock=sim.monotonic)
+    ctx = mgr.get_or_create("st1", "t1", **META)
+    ctx.progress["Motivator"]["level"] = 2
+    mgr.get_or_create("st2", "t1", **META)
+    sim.advance(40)
+    mgr.touch(session_key("st2", "t1"))
+    sim.advance(30)
+    assert mgr.sweep() == 1
+    assert session_key("st1", "t1") not in mgr and session_key("st2", "t1") in mgr
+    store.flush()
+    back = mgr.get(session_key("st1", "t1"))
+    assert back is not ctx and back.progress["Motivator"]["level"] == 2
+    assert mgr.stats["loaded"] == 1
+
+
+def test_memory_cap_evicts_least_recent(sim):
+    mgr = SessionManager(max_bytes=1, clock=sim.monotonic)
+    mgr.get_or_create("st1", **META)
+    mgr.get_or_create("st2", **META)
+    mgr.sweep()
+    assert len(mgr) == 0 and mgr.stats["evicted_memory"] == 2
+
+
+def test_default_clock_is_bound_at_creation(sim):
+    with use_clock(sim):
+        mgr = SessionManager(ttl=60.0)
+    mgr.get_or_create("st1", **META)
+    sim.advance(61)
+    assert mgr.sweep() == 1
+
+
+def test_approx_size_grows_with_history(context):
+    small = approx_size(context.progress)
+    context.progress["Expert"].dialog_history.extend({"question": "q" * 100} for _ in range(50))
+    assert approx_size(context.progress) > small
+
+
+def test_event_log_counts_toward_memory_budget(sim, bus_ns):
+    mgr = SessionManager(max_bytes=None, clock=sim.monotonic)
+    ctx1 = mgr.get_or_create("st1", **META)
+    bus = bus_ns["EventBus"](ctx1)
+    mgr.get_or_create("st2", **META)
+    mgr.sweep()
+    before = mgr.summary()["approx_bytes"]
+
+    for i in range(200):
+        bus.publish(bus_ns["Event"](type="student_question", source="student", payload={"text": f"q{i}"}))
+    mgr.max_bytes = before + 10_000
+    assert mgr.sweep() == 1                     # лог st1 вырос — выгружаем самую давнюю
+    assert "st1/-" not in mgr and mgr.stats["evicted_memory"] == 1
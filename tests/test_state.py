@@ -0,0 +1,124 @@
+import gc
+
+from core.state import ExpertState, MotivatorState, OrganizerState, SessionProgress, STATE_TYPES
+
+
+def _organizer():
+    return OrganizerState({"tasks": [{"id": "t1", "title": "Диаграмма", "hints": ["оси"]}],
+                           "status": {"t1": {"done": False}}})
+
+
+def test_dict_view_and_defaults():
+    m = MotivatorState()
+    assert m["level"] == 1 and m.level == 1
+    m["custom"] = 5
+    assert "custom" in m and m.get("custom") == 5
+    assert set(m) >= {"level", "history", "custom"}
+    del m["custom"]
+    assert "custom" not in m
+
+
+def test_session_progress_creates_typed_slots():
+    p = SessionProgress()
+    assert isinstance(p["Expert"], ExpertState)
+    p["Organizer"] = {"tasks": []}
+    assert isinstance(p["Organizer"], STATE_TYPES["Organizer"])
+
+
+def test_snapshot_isolated_from_nested_mutation():
+    org = _organizer()
+    snap = org.snapshot()
+    org["tasks"][0]["hints"].append("подписи")
+    org["status"]["t1"]["done"] = True
+    assert snap.values["tasks"][0]["hints"] == ["оси"]
+    assert snap.values["status"]["t1"]["done"] is False
+
+
+def test_snapshot_isolated_from_references_taken_before():
+    org = _organizer()
+    tasks, hints = org["tasks"], org["tasks"][0]["hints"]
+    snap = org.snapshot()
+    tasks.append({"id": "t2"})
+    hints.append("легенда")
+    assert [t["id"] for t in snap.values["tasks"]] == ["t1"]
+    assert snap.values["tasks"][0]["hints"] == ["оси"]
+
+
+def test_restore_undoes_nested_mutation_and_can_repeat():
+    org = _organizer()
+    snap = org.snapshot()
+    for _ in range(2):
+        org["tasks"][0]["hints"].append("лишнее")
+        org["tasks"].append({"id": "t9"})
+        assert org.restore(snap) == 1
+        assert org["tasks"] == [{"id": "t1", "title": "Диаграмма", "hints": ["оси"]}]
+    assert org.restore(snap) == 0
+
+
+def test_restore_detects_attribute_writes():
+    m = MotivatorState()
+    snap = m.snapshot()
+    m.history.append({"level": 2})      # запись мимо вида-словаря — её видит TrackedList
+    m.restore(snap)
+    assert m.history == []
+
+
+def test_snapshot_skip_and_touch():
+    ex = ExpertState()
+    ex.dialog_history.append({"q": 1})
+    v = ex._version
+    ex.touch("dialog_history")
+    assert ex._version == v + 1
+    assert "dialog_history" not in ex.snapshot(skip=ExpertState.APPEND_ONLY).values
+
+
+
+def test_snapshot_shares_fields_until_first_write():
+    org = _organizer()
+    org["notes"] = {"t1": ["черновик"]}
+    snap = org.snapshot()
+    assert snap.values["tasks"] is org["tasks"] and snap.values["notes"] is org["notes"]
+
+    org["tasks"][0]["hints"].append("подписи")      # копируется только поле tasks
+    assert snap.values["tasks"] is not org["tasks"]
+    assert snap.values["notes"] is org["notes"]
+    assert snap.shared == {"notes", "status"}
+
+
+def test_restore_hands_back_without_copy():
+    org = _organizer()
+    snap = org.snapshot()
+    org["tasks"].append({"id": "t2"})
+    saved = snap.values["tasks"]
+    assert org.restore(snap) == 1
+    assert org["tasks"] is saved and "tasks" in snap.shared
+    org["tasks"][0]["title"] = "другое"              # снимок снова получает свою копию
+    assert snap.values["tasks"][0]["title"] == "Диаграмма"
+
+
+def test_nested_writes_bump_version():
+    org = _organizer()
+    v = org._version
+    org["tasks"][0]["is_completed"] = True
+    org.tasks[0].setdefault("hints", []).append("x")
+    assert org._version > v
+
+
+def test_dropped_snapshot_stops_copying():
+    org = _organizer()
+    snap = org.snapshot()
+    assert org._snaps
+    del snap
+    gc.collect()
+    org["tasks"].append({"id": "t2"})
+    assert org._snaps is None
+
+
+def test_tracked_values_copy_and_encode_as_plain():
+    import copy
+    import json
+
+    org = _organizer()
+    plain = copy.deepcopy(org["tasks"])
+    assert type(plain) is list and type(plain[0]) is dict
+    assert json.loads(json.dumps(org.to_record()))["tasks"] == plain
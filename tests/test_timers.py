@@ -0,0 +1,109 @@
+import pytest
+
+from core.clock import SimulatedClock, SystemClock, use_clock
+from core.timers import INACTIVITY, TIMEOUT, InactivityScheduler
+
+
+@pytest.fixture
+def sim():
+    return SimulatedClock(start=1_000.0)
+
+
+def _scheduler(sim, fired, **kw):
+    kw.setdefault("inactivity_after", 60.0)
+    kw.setdefault("timeout_after", 300.0)
+    sched = InactivityScheduler(lambda sid, et, idle: fired.append((sid, et, idle)),
+                                tick=1.0, slots=16, clock=sim.monotonic, **kw)
+    sim.add_listener(sched.advance)
+    return sched
+
+
+def test_inactivity_then_timeout(sim):
+    fired = []
+    sched = _scheduler(sim, fired)
+    sched.touch("s1")
+    sim.advance(59)
+    assert fired == []
+    sim.advance(2)
+    assert [(sid, et) for sid, et, _ in fired] == [("s1", INACTIVITY)]
+    sim.advance(300)
+    assert [et for _, et, _ in fired] == [INACTIVITY, TIMEOUT]
+    assert fired[1][2] == pytest.approx(300.0, abs=1.0)
+    sim.advance(1000)
+    assert len(fired) == 2                      # дальше молчит до активности
+    sched.touch("s1")
+    sim.advance(61)
+    assert len(fired) == 3
+
+
+def test_activity_postpones_without_firing(sim):
+    fired = []
+    sched = _scheduler(sim, fired)
+    sched.touch("s1")
+    for _ in range(10):
+        sim.advance(30)
+        sched.touch("s1")
+    assert fired == []
+    assert sched.stats["rescheduled"] > 0
+
+
+def test_remove(sim):
+    fired = []
+    sched = _scheduler(sim, fired)
+    sched.touch("s1")
+    sched.remove("s1")
+    sim.advance(400)
+    assert fired == [] and len(sched) == 0
+
+
+def test_many_sessions_wrap_the_wheel(sim):
+    fired = []
+    sched = _scheduler(sim, fired, inactivity_after=40.0, timeout_after=40.0)
+    for i in range(100):
+        sched.touch(f"s{i}")
+        sim.advance(0.5)
+    sim.advance(100)
+    assert sorted(sid for sid, et, _ in fired if et == INACTIVITY) == sorted(f"s{i}" for i in range(100))
+
+
+def test_default_clock_is_bound_at_creation():
+    fired = []
+    sim = SimulatedClock()
+    with use_clock(sim):
+        sched = InactivityScheduler(lambda *a: fired.append(a), inactivity_after=10.0,
+                                    timeout_after=20.0, slots=8)
+    sim.add_listener(sched.advance)
+    sched.touch("s1")                           # уже вне use_clock — часы те же
+    sim.advance(11)
+    assert [a[1] for a in fired] == [INACTIVITY]
+
+
+def test_system_clock_scheduler_ignores_later_clock_swap():
+    fired = []
+    sched = InactivityScheduler(lambda *a: fired.append(a), inactivity_after=10.0,
+                                timeout_after=20.0, slots=8, clock=SystemClock().monotonic)
+    sched.touch("s1")
+    with use_clock(SimulatedClock()):
+        sched.touch("s1")
+        assert sched.advance() == 0
+    assert sched._timers["s1"].last >= sched._origin
+
+
+def test_timeout_must_not_precede_inactivity():
+    with pytest.raises(ValueError):
+        InactivityScheduler(inactivity_after=10.0, timeout_after=5.0)
+
+
+def test_bus_attach_timers_publishes_events(bus_ns, context, sim):
+    bus = bus_ns["EventBus"](context)
+    seen = []
+    bus.subscribe("inactivity", lambda ev: seen.append(ev.payload["idle_sec"]))
+    sched = InactivityScheduler(inactivity_after=30.0, timeout_after=60.0, clock=sim.monotonic)
+    sim.add_listener(sched.advance)
+    bus.attach_timers(sched)
+    sim.advance(20)
+    bus.publish(bus_ns["Event"](type="student_question", source="student", payload={}))
+    sim.advance(25)
+    assert seen == []
+    sim.advance(10)
+    assert len(seen) == 1 and seen[0] >= 30.0
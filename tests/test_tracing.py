@@ -0,0 +1,71 @@
+import pytest
+
+import core.tracing as tracing
+from core.tracing import NOT_SAMPLED, Tracer
+
+
+@pytest.fixture
+def bus(bus_ns, context):
+    return bus_ns["EventBus"](context)
+
+
+def _cascade(bus, bus_ns, seen):
+    Event = bus_ns["Event"]
+
+    def on_question(ev):
+        seen.append(ev)
+        bus.publish(Event(type="expert_answer", source="expert", payload={}))
+
+    def on_answer(ev):
+        seen.append(ev)
+        bus.publish(Event(type="tts_done", source="tts", payload={}))
+
+    bus.subscribe("student_question", on_question)
+    bus.subscribe("expert_answer", on_answer)
+    bus.subscribe("tts_done", seen.append)
+
+
+def test_children_inherit_trace(bus, bus_ns):
+    tracer = bus.enable_tracing(sample_rate=1.0)
+    seen = []
+    _cascade(bus, bus_ns, seen)
+    bus.publish(bus_ns["Event"](type="student_question", source="student", payload={}))
+    root, answer, tts = seen
+    assert root.trace_id and answer.trace_id == root.trace_id == tts.trace_id
+    assert answer.parent_id == root.id and tts.parent_id == answer.id
+    assert len(tracer.spans) == 3
+
+
+def test_unsampled_root_is_not_resampled_downstream(bus, bus_ns, monkeypatch):
+    draws = iter([0.9] + [0.0] * 10)     # корень мимо, всё дальше «выиграло» бы
+    monkeypatch.setattr(tracing.random, "random", lambda: next(draws))
+    tracer = bus.enable_tracing(sample_rate=0.5)
+    seen = []
+    _cascade(bus, bus_ns, seen)
+    bus.publish(bus_ns["Event"](type="student_question", source="student", payload={}))
+    assert [ev.trace_id for ev in seen] == [NOT_SAMPLED] * 3
+    assert tracer.spans == []
+    assert next(draws) == 0.0 and next(draws) == 0.0   # розыгрыш был один
+
+
+def test_assign_marks_unsampled():
+    tracer = Tracer(sample_rate=0.0)
+
+    class Ev:
+        trace_id = parent_id = id = None
+
+    root, child = Ev(), Ev()
+    tracer.assign(root, None)
+    tracer.assign(child, root)
+    assert root.trace_id == NOT_SAMPLED and child.trace_id == NOT_SAMPLED
+    assert child.parent_id is None
+
+
+def test_chrome_trace_export(bus, bus_ns, tmp_path):
+    tracer = bus.enable_tracing()
+    bus.subscribe("init", lambda ev: None)
+    bus.publish(bus_ns["Event"](type="init", source="system", payload={}))
+    path = tracer.export_chrome_trace(str(tmp_path / "trace.json"))
+    data = tracer.to_chrome_trace()
+    assert data["traceEvents"][0]["cat"] == "init"
+    assert path.endswith("trace.json")
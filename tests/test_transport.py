@@ -0,0 +1,82 @@
+import threading
+
+from core.transport import channel_pair, decode_batch, encode_batch
+
+
+def test_batch_framing():
+    records = [b"", b"a", "запись".encode("utf-8")]
+    assert decode_batch(encode_batch(records)) == records
+
+
+def test_bus_to_bus_without_echo(bus_ns, context):
+    from conftest import make_context
+
+    Event = bus_ns["Event"]
+    left, right = channel_pair()
+    bus_a = bus_ns["EventBus"](context)
+    bus_b = bus_ns["EventBus"](make_context(student_id="b"))
+    got_b, got_a = [], []
+    arrived = threading.Event()
+
+    def on_b(ev):
+        got_b.append(ev)
+        arrived.set()
+
+    bus_b.subscribe("expert_answer", on_b)
+    bus_a.subscribe("expert_answer", got_a.append)
+    link_a = bus_a.attach_transport(left, ["expert_answer"], node="a", flush_interval=0.001)
+    link_b = bus_b.attach_transport(right, ["expert_answer"], node="b", flush_interval=0.001)
+    try:
+        bus_a.publish(Event(type="expert_answer", source="expert", payload={"answer": "ок"}))
+        assert arrived.wait(5)
+        ev = got_b[0]
+        assert ev.origin == "a" and ev.payload == {"answer": "ок"}
+        link_b.forwarder.flush()
+        assert link_b.forwarder.stats["events"] == 0        # пришедшее извне обратно не уходит
+        assert len(got_a) == 1
+    finally:
+        link_a.close()
+        link_b.close()
+
+
+def test_bad_frame_does_not_stop_receiver():
+    from core.records import encode_record
+    from core.transport import EventReceiver
+
+    left, right = channel_pair()
+    got, arrived = [], threading.Event()
+
+    def deliver(ev):
+        got.append(ev)
+        arrived.set()
+
+    receiver = EventReceiver(right, deliver, lambda **kw: kw)
+    try:
+        left.send_bytes(b"\x05\x00")                                   # обрезанный заголовок пачки
+        left.send_bytes(encode_batch([b"x" * 10])[:-4])                # обрезанная запись
+        left.send_bytes(encode_batch([b"{not json", encode_record({"type": "init"})]))
+        assert arrived.wait(5)
+        assert [ev["type"] for ev in got] == ["init"]
+        assert receiver.stats["bad_frames"] == 2 and receiver.stats["bad_records"] == 1
+    finally:
+        left.close()
+        right.close()
+        receiver.join(1.0)
+
+
+def test_forwarder_sends_without_polling_interval():
+    from core.transport import EventForwarder
+
+    left, right = channel_pair()
+    forwarder = EventForwarder(left, node="a")
+
+    class Ev:
+        type, source, ts, mono_ns, origin, payload = "expert_answer", "expert", 1.0, 0, None, {}
+
+    try:
+        forwarder(Ev())
+        assert decode_batch(right.recv_bytes()) and forwarder.flush_interval == 0.0
+    finally:
+        forwarder.close()
+        left.close()
+        right.close()